@@ -0,0 +1,44 @@
+"""Add refresh_jobs table
+
+Revision ID: j0k1l2m3n4o5
+Revises: i9j0k1l2m3n4
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "j0k1l2m3n4o5"
+down_revision: Union[str, None] = "i9j0k1l2m3n4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "refresh_jobs",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("team_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("riot_account_ids", sa.JSON(), nullable=False),
+        sa.Column("accounts_done", sa.Integer(), nullable=False),
+        sa.Column("matches_fetched", sa.Integer(), nullable=False),
+        sa.Column("results", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["team_id"], ["teams.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_refresh_jobs_team_id"), "refresh_jobs", ["team_id"], unique=False)
+    op.create_index(op.f("ix_refresh_jobs_status"), "refresh_jobs", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_refresh_jobs_status"), table_name="refresh_jobs")
+    op.drop_index(op.f("ix_refresh_jobs_team_id"), table_name="refresh_jobs")
+    op.drop_table("refresh_jobs")
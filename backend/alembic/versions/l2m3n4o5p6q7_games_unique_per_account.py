@@ -0,0 +1,47 @@
+"""Make games unique per (match_id, riot_account_id) and add last_match_at
+
+Revision ID: l2m3n4o5p6q7
+Revises: k1l2m3n4o5p6
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "l2m3n4o5p6q7"
+down_revision: Union[str, None] = "k1l2m3n4o5p6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_games_match_id", table_name="games")
+    op.create_index("ix_games_match_id", "games", ["match_id"], unique=False)
+    op.create_unique_constraint("uq_games_match_account", "games", ["match_id", "riot_account_id"])
+
+    op.add_column("riot_accounts", sa.Column("last_match_at", sa.DateTime(), nullable=True))
+    op.execute(
+        """
+        UPDATE riot_accounts SET last_match_at = (
+            SELECT MAX(games.game_date) FROM games WHERE games.riot_account_id = riot_accounts.id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("riot_accounts", "last_match_at")
+
+    # Keep the first row of each match before restoring global uniqueness
+    op.execute(
+        """
+        DELETE FROM games WHERE id NOT IN (SELECT MIN(id) FROM games GROUP BY match_id)
+        """
+    )
+    op.drop_constraint("uq_games_match_account", "games", type_="unique")
+    op.drop_index("ix_games_match_id", table_name="games")
+    op.create_index("ix_games_match_id", "games", ["match_id"], unique=True)
@@ -0,0 +1,49 @@
+"""Add typed game stat columns mirrored from games.stats
+
+Revision ID: m3n4o5p6q7r8
+Revises: l2m3n4o5p6q7
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "m3n4o5p6q7r8"
+down_revision: Union[str, None] = "l2m3n4o5p6q7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INTEGER_COLUMNS = ("kills", "deaths", "assists")
+FLOAT_COLUMNS = ("kda", "cs_per_min", "gold_per_min", "vision_per_min", "kp")
+
+
+def upgrade() -> None:
+    for name in INTEGER_COLUMNS:
+        op.add_column("games", sa.Column(name, sa.Integer(), nullable=True))
+    for name in FLOAT_COLUMNS:
+        op.add_column("games", sa.Column(name, sa.Float(), nullable=True))
+    op.add_column("games", sa.Column("win", sa.Boolean(), nullable=True))
+    op.add_column("games", sa.Column("queue_id", sa.Integer(), nullable=True))
+
+    # Backfill from the JSON blob; missing keys get the same defaults as stats.get()
+    assignments = [f"{name} = COALESCE((stats->>'{name}')::integer, 0)" for name in INTEGER_COLUMNS]
+    assignments += [f"{name} = COALESCE((stats->>'{name}')::double precision, 0)" for name in FLOAT_COLUMNS]
+    assignments += [
+        "win = COALESCE((stats->>'win')::boolean, false)",
+        "queue_id = (stats->>'queue_id')::integer",
+    ]
+    op.execute(f"UPDATE games SET {', '.join(assignments)}")
+
+    op.create_index(
+        "ix_games_account_champion_date", "games", ["riot_account_id", "champion_id", "game_date"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_games_account_champion_date", table_name="games")
+    for name in ("queue_id", "win", *FLOAT_COLUMNS, *INTEGER_COLUMNS):
+        op.drop_column("games", name)
@@ -0,0 +1,74 @@
+"""Add champion_rollups table
+
+Revision ID: n4o5p6q7r8s9
+Revises: m3n4o5p6q7r8
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "n4o5p6q7r8s9"
+down_revision: Union[str, None] = "m3n4o5p6q7r8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "champion_rollups",
+        sa.Column("riot_account_id", sa.Integer(), nullable=False),
+        sa.Column("champion_id", sa.Integer(), nullable=False),
+        sa.Column("game_type", sa.String(), nullable=False),
+        sa.Column("games", sa.Integer(), nullable=False),
+        sa.Column("wins", sa.Integer(), nullable=False),
+        sa.Column("kills", sa.Integer(), nullable=False),
+        sa.Column("deaths", sa.Integer(), nullable=False),
+        sa.Column("assists", sa.Integer(), nullable=False),
+        sa.Column("sum_kda", sa.Float(), nullable=False),
+        sa.Column("sum_cs_per_min", sa.Float(), nullable=False),
+        sa.Column("sum_gold_per_min", sa.Float(), nullable=False),
+        sa.Column("sum_vision_per_min", sa.Float(), nullable=False),
+        sa.Column("sum_kp", sa.Float(), nullable=False),
+        sa.Column("damage", sa.Float(), nullable=False),
+        sa.Column("duration", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["riot_account_id"], ["riot_accounts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("riot_account_id", "champion_id", "game_type"),
+    )
+
+    # Backfill from existing games
+    op.execute(
+        """
+        INSERT INTO champion_rollups (
+            riot_account_id, champion_id, game_type, games, wins, kills, deaths, assists,
+            sum_kda, sum_cs_per_min, sum_gold_per_min, sum_vision_per_min, sum_kp,
+            damage, duration, updated_at
+        )
+        SELECT
+            riot_account_id, champion_id, game_type,
+            COUNT(*),
+            SUM(CASE WHEN win THEN 1 ELSE 0 END),
+            COALESCE(SUM(kills), 0),
+            COALESCE(SUM(deaths), 0),
+            COALESCE(SUM(assists), 0),
+            COALESCE(SUM(kda), 0),
+            COALESCE(SUM(cs_per_min), 0),
+            COALESCE(SUM(gold_per_min), 0),
+            COALESCE(SUM(vision_per_min), 0),
+            COALESCE(SUM(kp), 0),
+            COALESCE(SUM((stats->>'damage_dealt')::double precision), 0),
+            COALESCE(SUM(game_duration), 0),
+            NOW()
+        FROM games
+        GROUP BY riot_account_id, champion_id, game_type
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("champion_rollups")
@@ -0,0 +1,41 @@
+"""Add indexes for team-scoped game, riot account and rank history reads
+
+Revision ID: o5p6q7r8s9t0
+Revises: n4o5p6q7r8s9
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "o5p6q7r8s9t0"
+down_revision: Union[str, None] = "n4o5p6q7r8s9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_games_account_date", "games", ["riot_account_id", sa.text("game_date DESC")]
+    )
+    op.create_index(
+        "ix_games_pentakills",
+        "games",
+        ["riot_account_id", "game_date"],
+        postgresql_where=sa.text("is_pentakill = true"),
+    )
+    op.create_index("ix_riot_accounts_player_id", "riot_accounts", ["player_id"])
+    op.create_index(
+        "ix_rank_history_account_recorded", "rank_history", ["riot_account_id", "recorded_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rank_history_account_recorded", table_name="rank_history")
+    op.drop_index("ix_riot_accounts_player_id", table_name="riot_accounts")
+    op.drop_index("ix_games_pentakills", table_name="games")
+    op.drop_index("ix_games_account_date", table_name="games")
@@ -0,0 +1,29 @@
+"""Add timezone to teams
+
+Revision ID: p6q7r8s9t0u1
+Revises: o5p6q7r8s9t0
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "p6q7r8s9t0u1"
+down_revision: Union[str, None] = "o5p6q7r8s9t0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "teams",
+        sa.Column("timezone", sa.String(), nullable=False, server_default="Europe/Paris"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("teams", "timezone")
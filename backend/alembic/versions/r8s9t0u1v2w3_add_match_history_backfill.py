@@ -0,0 +1,38 @@
+"""Add match history backfill cursor and job kind
+
+Revision ID: r8s9t0u1v2w3
+Revises: q7r8s9t0u1v2
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "r8s9t0u1v2w3"
+down_revision: Union[str, None] = "q7r8s9t0u1v2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("riot_accounts", sa.Column("backfill_until", sa.DateTime(), nullable=True))
+    op.add_column(
+        "riot_accounts",
+        sa.Column("backfill_offset", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("riot_accounts", sa.Column("backfill_completed_at", sa.DateTime(), nullable=True))
+    op.add_column(
+        "refresh_jobs",
+        sa.Column("kind", sa.String(), nullable=False, server_default="refresh"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("refresh_jobs", "kind")
+    op.drop_column("riot_accounts", "backfill_completed_at")
+    op.drop_column("riot_accounts", "backfill_offset")
+    op.drop_column("riot_accounts", "backfill_until")
@@ -0,0 +1,34 @@
+"""Add team allowed queues and backfill listing cursor
+
+Revision ID: s9t0u1v2w3x4
+Revises: r8s9t0u1v2w3
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "s9t0u1v2w3x4"
+down_revision: Union[str, None] = "r8s9t0u1v2w3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "teams",
+        sa.Column("allowed_queues", sa.JSON(), nullable=False, server_default="[420]"),
+    )
+    op.add_column(
+        "riot_accounts",
+        sa.Column("backfill_listing", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("riot_accounts", "backfill_listing")
+    op.drop_column("teams", "allowed_queues")
@@ -0,0 +1,34 @@
+"""Add rejected_matches table
+
+Revision ID: t0u1v2w3x4y5
+Revises: s9t0u1v2w3x4
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "t0u1v2w3x4y5"
+down_revision: Union[str, None] = "s9t0u1v2w3x4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rejected_matches",
+        sa.Column("riot_account_id", sa.Integer(), nullable=False),
+        sa.Column("match_id", sa.String(), nullable=False),
+        sa.Column("reason", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["riot_account_id"], ["riot_accounts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("riot_account_id", "match_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("rejected_matches")
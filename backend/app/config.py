@@ -13,7 +13,44 @@ class Settings(BaseSettings):
     database_url: str
     riot_api_key: str
     riot_api_region: str = "euw1"
-    riot_api_cache_ttl: int = 3600
+    riot_api_cache_ttl: int = 3600  # Summoner lookups
+    riot_api_cache_short_ttl: int = 120  # Account by-riot-id and league entries
+    riot_api_cache_max_entries: int = 256  # In-process LRU size
+    riot_api_cache_url: str = ""  # Optional shared cache DB (postgresql://... or sqlite:///riot_cache.db)
+    team_highlights_cache_ttl: int = 300  # Sponsor highlights; local ingestion invalidates sooner
+    champion_scores_cache_ttl: int = 3600  # Tier-list champion scores, per player
+    # Shared Riot HTTP connection pool
+    riot_http_max_connections: int = 20
+    riot_http_max_keepalive_connections: int = 10
+    riot_http_keepalive_expiry: float = 30.0  # seconds an idle connection is kept open
+    riot_http_timeout: float = 10.0
+    riot_http_connect_timeout: float = 5.0
+    riot_http2: bool = True  # Only used when the `h2` package is installed
+    # Application rate limit assumed until Riot's X-App-Rate-Limit header is seen (dev key)
+    riot_app_rate_limit: str = "20:1,100:120"
+    riot_fetch_concurrency: int = 10  # Parallel match-detail downloads per refresh
+    # Riot circuit breaker (app.riot.circuit_breaker)
+    riot_circuit_failure_threshold: int = 5  # Consecutive failures that open a host's circuit
+    riot_circuit_reset_seconds: float = 30.0  # Before probing again after 5xx/timeouts
+    riot_circuit_auth_reset_seconds: float = 300.0  # Before probing again after 401/403
+    # Team refresh fan-out
+    refresh_concurrency: int = 4  # Riot accounts refreshed at the same time
+    refresh_account_timeout: float = 120.0  # seconds per account
+    backfill_account_timeout: float = 3600.0  # seconds per account; progress is kept page by page
+    # Background refresh jobs
+    job_workers: int = 2  # Refresh jobs running at the same time
+    job_queue_persistent: bool = False  # Mirror jobs to the refresh_jobs table
+    job_retention_minutes: int = 60  # How long finished jobs stay queryable in memory
+    # Periodic background refresher (app.refresher)
+    refresher_enabled: bool = False  # Run inside the API process
+    refresher_poll_seconds: int = 300  # Pause between two passes
+    refresher_interval_minutes: int = 60  # Refresh active accounts at least this often
+    refresher_inactive_days: int = 14  # No stored game for this long = inactive
+    refresher_inactive_interval_minutes: int = 1440  # Re-check inactive accounts once a day
+    refresher_budget_fraction: float = 0.5  # Share of the Riot app rate limit the refresher may use
+    # Logging (app.logging_config)
+    log_level: str = "INFO"
+    log_format: str = "text"  # text (key=value) or json
     access_code: str  # Legacy, kept for compatibility
     admin_code: str = "ORACLE_ADMIN_2026"  # Default admin code
     jwt_secret: str
@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import settings
 
@@ -9,6 +10,9 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Rows per INSERT statement (keeps SQLite under its bound-parameter limit)
+INSERT_BATCH_SIZE = 500
+
 
 def get_db():
     db = SessionLocal()
@@ -16,3 +20,36 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def dialect_insert(dialect_name: str):
+    """The `insert()` construct supporting ON CONFLICT for this database"""
+    if dialect_name == "postgresql":
+        return postgresql.insert
+    if dialect_name == "sqlite":
+        return sqlite.insert
+    raise ValueError(f"ON CONFLICT inserts are not supported on {dialect_name}")
+
+
+def insert_ignore_conflicts(db: Session, model, rows: list[dict], conflict_columns: list[str]) -> list[tuple]:
+    """
+    Bulk `INSERT ... ON CONFLICT (conflict_columns) DO NOTHING` on the session's
+    transaction (no commit). Rows that already exist, including ones inserted
+    concurrently by another session, are skipped instead of raising.
+
+    Returns the `conflict_columns` values of the rows actually inserted.
+    """
+    if not rows:
+        return []
+    insert = dialect_insert(db.get_bind().dialect.name)
+    keys = [getattr(model, column) for column in conflict_columns]
+    inserted = []
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        stmt = (
+            insert(model)
+            .values(rows[start:start + INSERT_BATCH_SIZE])
+            .on_conflict_do_nothing(index_elements=conflict_columns)
+            .returning(*keys)
+        )
+        inserted.extend(tuple(row) for row in db.execute(stmt))
+    return inserted
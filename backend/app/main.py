@@ -1,6 +1,9 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import PlainTextResponse, RedirectResponse, JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from app.routers import (
@@ -11,6 +14,7 @@ from app.routers import (
     draft_series,
     drafts,
     games,
+    jobs,
     player_notes,
     players,
     riot_accounts,
@@ -18,6 +22,13 @@ from app.routers import (
     stats,
     tier_list,
 )
+from app.config import settings
+from app.logging_config import configure_logging
+from app.refresher import run_forever as run_refresher
+from app.riot.circuit_breaker import RiotUnavailableError
+from app.riot.http import close_http_client, get_http_client
+from app.riot.metrics import render_prometheus
+from app.services.job_service import job_queue
 
 
 class CORSMiddlewareCustom(BaseHTTPMiddleware):
@@ -46,19 +57,48 @@ class CORSMiddlewareCustom(BaseHTTPMiddleware):
         response.headers["Access-Control-Allow-Credentials"] = "true"
         response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
         response.headers["Access-Control-Allow-Headers"] = "*"
+        response.headers["Access-Control-Expose-Headers"] = "ETag"
 
         return response
 
 
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared Riot connection pool up front and close it on shutdown
+    get_http_client()
+    await job_queue.start()
+    # Keep riot accounts warm in the background (or run `python -m app.refresher` instead)
+    refresher_task = asyncio.create_task(run_refresher()) if settings.refresher_enabled else None
+    yield
+    if refresher_task:
+        refresher_task.cancel()
+    await job_queue.shutdown()
+    await close_http_client()
+
+
 app = FastAPI(
     title="Oracle API",
     description="League of Legends coaching app API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add custom CORS middleware FIRST (before other middleware)
 app.add_middleware(CORSMiddlewareCustom)
 
+
+@app.exception_handler(RiotUnavailableError)
+async def riot_unavailable_handler(request: Request, exc: RiotUnavailableError):
+    """Riot circuit open: fail fast instead of waiting on retries and timeouts"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
 # Include routers
 app.include_router(admin.router)
 app.include_router(auth.router)
@@ -70,6 +110,7 @@ app.include_router(drafts.router)
 app.include_router(draft_series.router)
 app.include_router(games.router)
 app.include_router(stats.router)
+app.include_router(jobs.router)
 app.include_router(calendar.router)
 app.include_router(tier_list.router)
 app.include_router(scrim_management.router)
@@ -84,3 +125,9 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Riot API client metrics in the Prometheus text format"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -1,10 +1,15 @@
+from app.models.activity_snapshot import ActivitySnapshot
 from app.models.calendar import CalendarEvent, PlayerAvailability
+from app.models.champion_rollup import ChampionRollup
 from app.models.coach import Coach
 from app.models.draft import Draft, DraftGame, DraftSeries
 from app.models.game import Game
+from app.models.match_payload import MatchPayload
 from app.models.player import Player
 from app.models.player_note import PlayerNote
 from app.models.rank_history import RankHistory
+from app.models.refresh_job import RefreshJob
+from app.models.rejected_match import RejectedMatch
 from app.models.riot_account import RiotAccount
 from app.models.scrim_management import OpponentTeam, ScoutedPlayer, ScrimReview
 from app.models.team import Team
@@ -27,4 +32,9 @@ __all__ = [
     "OpponentTeam",
     "ScrimReview",
     "ScoutedPlayer",
+    "RefreshJob",
+    "MatchPayload",
+    "ChampionRollup",
+    "ActivitySnapshot",
+    "RejectedMatch",
 ]
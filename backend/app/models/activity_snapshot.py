@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, Date, DateTime, ForeignKey, Integer
+
+from app.database import Base
+
+
+class ActivitySnapshot(Base):
+    """Serialized TeamActivityResponse of a closed week (see activity_snapshot_service)"""
+    __tablename__ = "activity_snapshots"
+
+    team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"), primary_key=True)
+    week_start = Column(Date, primary_key=True)  # Local Monday in the team's timezone
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String
+
+from app.database import Base
+
+
+class ChampionRollup(Base):
+    """
+    Running totals of an account's games per champion and game type, maintained
+    alongside `games` (see app.services.champion_rollup_service). Averages are
+    sum_* / games.
+    """
+    __tablename__ = "champion_rollups"
+
+    riot_account_id = Column(
+        Integer, ForeignKey("riot_accounts.id", ondelete="CASCADE"), primary_key=True
+    )
+    champion_id = Column(Integer, primary_key=True)
+    game_type = Column(String, primary_key=True)
+    games = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    kills = Column(Integer, nullable=False, default=0)
+    deaths = Column(Integer, nullable=False, default=0)
+    assists = Column(Integer, nullable=False, default=0)
+    sum_kda = Column(Float, nullable=False, default=0.0)
+    sum_cs_per_min = Column(Float, nullable=False, default=0.0)
+    sum_gold_per_min = Column(Float, nullable=False, default=0.0)
+    sum_vision_per_min = Column(Float, nullable=False, default=0.0)
+    sum_kp = Column(Float, nullable=False, default=0.0)
+    damage = Column(Float, nullable=False, default=0.0)  # Damage to champions
+    duration = Column(Integer, nullable=False, default=0)  # Seconds played
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,8 +1,19 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Integer, String
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import relationship, validates
 
 from app.database import Base
 
@@ -12,19 +23,75 @@ class GameType(str, Enum):
     COMPETITIVE = "competitive"
 
 
+# Game.stats keys that are also stored as typed columns (same name), with their defaults
+STAT_COLUMNS = {
+    "kills": 0,
+    "deaths": 0,
+    "assists": 0,
+    "kda": 0.0,
+    "cs_per_min": 0.0,
+    "gold_per_min": 0.0,
+    "vision_per_min": 0.0,
+    "kp": 0.0,
+    "win": False,
+    "queue_id": None,
+}
+
+
+def stat_columns(stats: dict) -> dict:
+    """Typed column values for a stats dict (for Core inserts, which bypass the ORM)"""
+    return {key: stats.get(key, default) for key, default in STAT_COLUMNS.items()}
+
+
 class Game(Base):
     __tablename__ = "games"
+    __table_args__ = (
+        # One row per account that played the match (duo partners share a match_id)
+        UniqueConstraint("match_id", "riot_account_id", name="uq_games_match_account"),
+        # e.g. wins by champion for an account since a date
+        Index("ix_games_account_champion_date", "riot_account_id", "champion_id", "game_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     riot_account_id = Column(Integer, ForeignKey("riot_accounts.id"), nullable=False)
-    match_id = Column(String, unique=True, index=True, nullable=False)
+    match_id = Column(String, index=True, nullable=False)
     game_type = Column(String, nullable=False, default="soloq")
     champion_id = Column(Integer, nullable=False)
     role = Column(String, nullable=False)
     stats = Column(JSON, nullable=False)  # kda, cs, vision, etc.
+    # Hot stats as typed columns, mirrored from `stats` (see STAT_COLUMNS)
+    kills = Column(Integer, nullable=True)
+    deaths = Column(Integer, nullable=True)
+    assists = Column(Integer, nullable=True)
+    kda = Column(Float, nullable=True)
+    cs_per_min = Column(Float, nullable=True)
+    gold_per_min = Column(Float, nullable=True)
+    vision_per_min = Column(Float, nullable=True)
+    kp = Column(Float, nullable=True)
+    win = Column(Boolean, nullable=True)
+    queue_id = Column(Integer, nullable=True)
     game_duration = Column(Integer, nullable=False)  # seconds
     game_date = Column(DateTime, nullable=False)
     is_pentakill = Column(Boolean, default=False, nullable=False)  # Pentakill tracker
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     riot_account = relationship("RiotAccount", back_populates="games")
+
+    @validates("stats")
+    def _mirror_stats(self, key, stats):
+        """Keep the typed columns in sync whenever `stats` is assigned"""
+        for column, value in stat_columns(stats or {}).items():
+            setattr(self, column, value)
+        return stats
+
+
+# Team-scoped read paths: an account's games, newest first (history, activity, highlights)
+Index("ix_games_account_date", Game.riot_account_id, Game.game_date.desc())
+# Pentakill tracker: only the few pentakill games are indexed
+Index(
+    "ix_games_pentakills",
+    Game.riot_account_id,
+    Game.game_date,
+    postgresql_where=Game.is_pentakill == True,  # noqa: E712
+    sqlite_where=Game.is_pentakill == True,  # noqa: E712
+)
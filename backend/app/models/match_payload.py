@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String
+
+from app.database import Base
+
+
+class MatchPayload(Base):
+    """Raw Riot match V5 payload, zlib-compressed JSON (immutable once a game has ended)"""
+    __tablename__ = "match_payloads"
+
+    match_id = Column(String, primary_key=True)
+    payload = Column(LargeBinary, nullable=False)
+    raw_size = Column(Integer, nullable=False)  # Uncompressed JSON size in bytes
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
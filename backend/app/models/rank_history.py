@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -8,6 +8,9 @@ from app.database import Base
 
 class RankHistory(Base):
     __tablename__ = "rank_history"
+    __table_args__ = (
+        Index("ix_rank_history_account_recorded", "riot_account_id", "recorded_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     riot_account_id = Column(Integer, ForeignKey("riot_accounts.id"), nullable=False)
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String
+
+from app.database import Base
+
+
+class RefreshJob(Base):
+    """Persistent copy of a background Riot refresh job (only used when job_queue_persistent is on)"""
+    __tablename__ = "refresh_jobs"
+
+    id = Column(String, primary_key=True)  # uuid4 hex
+    team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String, nullable=False, default="refresh")  # refresh/backfill
+    status = Column(String, nullable=False, default="queued", index=True)  # queued/running/succeeded/partial/failed
+    riot_account_ids = Column(JSON, nullable=False)
+    accounts_done = Column(Integer, nullable=False, default=0)
+    matches_fetched = Column(Integer, nullable=False, default=0)
+    results = Column(JSON, nullable=False, default=list)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+
+from app.database import Base
+
+
+class RejectedMatch(Base):
+    """Match listed for an account but not stored (see rejected_match_service)"""
+    __tablename__ = "rejected_matches"
+
+    riot_account_id = Column(Integer, ForeignKey("riot_accounts.id", ondelete="CASCADE"), primary_key=True)
+    match_id = Column(String, primary_key=True)
+    reason = Column(String, nullable=False)  # queue/season/no_participant
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
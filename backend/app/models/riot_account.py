@@ -10,7 +10,7 @@ class RiotAccount(Base):
     __tablename__ = "riot_accounts"
 
     id = Column(Integer, primary_key=True, index=True)
-    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=False, index=True)
     puuid = Column(String, unique=True, index=True, nullable=False)
     summoner_id = Column(String, nullable=True)  # Needed for rank API calls
     summoner_name = Column(String, nullable=False)
@@ -28,6 +28,12 @@ class RiotAccount(Base):
     peak_lp = Column(Integer, nullable=True)
     # Refresh tracking
     last_refreshed_at = Column(DateTime, nullable=True)  # When stats were last fetched from Riot API
+    last_match_at = Column(DateTime, nullable=True)  # Newest match seen by this account's own match listing
+    # Season history backfill cursor (see RiotAPIClient.backfill_matches)
+    backfill_until = Column(DateTime, nullable=True)  # End of the crawled window, fixed when the backfill starts
+    backfill_listing = Column(Integer, nullable=False, default=0)  # Index in match_listings(team queues)
+    backfill_offset = Column(Integer, nullable=False, default=0)  # Match ids of that listing already stored
+    backfill_completed_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -1,10 +1,13 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import JSON, Column, DateTime, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.database import Base
 
+# Ranked Solo/Duo only
+DEFAULT_ALLOWED_QUEUES = [420]
+
 
 class Team(Base):
     """Represents a team organization using the app (multi-tenancy)"""
@@ -13,6 +16,9 @@ class Team(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     access_code = Column(String, unique=True, index=True, nullable=False)
+    timezone = Column(String, nullable=False, default="Europe/Paris")  # IANA name, for activity/calendar display
+    # Riot queue ids whose games are stored (e.g. 440 flex, 0/3100 customs as scrims)
+    allowed_queues = Column(JSON, nullable=False, default=lambda: list(DEFAULT_ALLOWED_QUEUES))
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
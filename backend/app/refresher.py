@@ -0,0 +1,148 @@
+"""Periodic background refresher for every team's riot accounts.
+
+Walks all accounts from the stalest `last_refreshed_at` to the freshest and queues
+a refresh job for each one that is due, so read endpoints always find warm data
+without a coach having to click "refresh". Accounts whose last stored game is
+older than `refresher_inactive_days` are only re-checked every
+`refresher_inactive_interval_minutes`. Job enqueues are spaced out so the refresher
+only uses `refresher_budget_fraction` of the Riot application rate limit, leaving
+the rest for manual refreshes. Each pass also stores the activity snapshot of the
+week that just closed, so the first coach to open it doesn't pay for it.
+
+Runs inside the API process when `refresher_enabled` is set, or standalone:
+    python -m app.refresher          # loop forever
+    python -m app.refresher --once   # one pass, then exit
+"""
+import argparse
+import asyncio
+import logging
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.logging_config import configure_logging
+from app.models.game import Game
+from app.models.player import Player
+from app.models.riot_account import RiotAccount
+from app.models.team import Team
+from app.riot.http import close_http_client
+from app.riot.rate_limit import parse_rate_limit_header
+from app.services import stats_service
+from app.services.job_service import JobQueue, job_queue
+
+logger = logging.getLogger(__name__)
+
+# Rough Riot calls per account refresh: rank + match-id listing + a few new matches
+CALLS_PER_REFRESH = 5
+
+
+def select_accounts_to_refresh(db: Session, now: datetime | None = None) -> list[tuple[int, int]]:
+    """Return (team_id, riot_account_id) pairs that are due, stalest first"""
+    now = now or datetime.utcnow()
+    active_since = now - timedelta(days=settings.refresher_inactive_days)
+    active_due = now - timedelta(minutes=settings.refresher_interval_minutes)
+    inactive_due = now - timedelta(minutes=settings.refresher_inactive_interval_minutes)
+
+    last_games = (
+        db.query(Game.riot_account_id, func.max(Game.game_date).label("last_game_date"))
+        .group_by(Game.riot_account_id)
+        .subquery()
+    )
+    rows = (
+        db.query(
+            Player.team_id,
+            RiotAccount.id,
+            RiotAccount.last_refreshed_at,
+            last_games.c.last_game_date,
+        )
+        .join(Player, RiotAccount.player_id == Player.id)
+        .outerjoin(last_games, last_games.c.riot_account_id == RiotAccount.id)
+        .order_by(RiotAccount.last_refreshed_at.asc().nulls_first(), RiotAccount.id)
+        .all()
+    )
+
+    due = []
+    for team_id, account_id, last_refreshed_at, last_game_date in rows:
+        if last_refreshed_at is None:
+            due.append((team_id, account_id))
+            continue
+        is_active = last_game_date is not None and last_game_date >= active_since
+        if last_refreshed_at <= (active_due if is_active else inactive_due):
+            due.append((team_id, account_id))
+    return due
+
+
+def snapshot_last_week(db: Session) -> None:
+    """Store last week's activity snapshot for every team (no-op once it exists)"""
+    for (team_id,) in db.query(Team.id).all():
+        stats_service.get_team_activity(db, team_id, week_offset=-1)
+
+
+def refresh_spacing() -> float:
+    """Seconds to leave between two account refreshes to stay within our share of the quota"""
+    limits = parse_rate_limit_header(settings.riot_app_rate_limit)
+    if not limits:
+        return 0.0
+    # The slowest window (e.g. 100 per 120s) is the binding one for sustained load
+    requests_per_second = min(limit / window for limit, window in limits)
+    budget = requests_per_second * settings.refresher_budget_fraction
+    return CALLS_PER_REFRESH / budget if budget > 0 else 0.0
+
+
+async def run_once(
+    session_factory: Callable[[], Session] = SessionLocal,
+    queue: JobQueue = job_queue,
+    spacing: float | None = None,
+) -> int:
+    """Queue refresh jobs for every due account; returns how many were queued"""
+    session = session_factory()
+    try:
+        due = select_accounts_to_refresh(session)
+        snapshot_last_week(session)
+    finally:
+        session.close()
+
+    spacing = refresh_spacing() if spacing is None else spacing
+    for index, (team_id, account_id) in enumerate(due):
+        if index and spacing:
+            await asyncio.sleep(spacing)
+        queue.enqueue_refresh(team_id, [account_id])
+    return len(due)
+
+
+async def run_forever(
+    session_factory: Callable[[], Session] = SessionLocal,
+    queue: JobQueue = job_queue,
+) -> None:
+    while True:
+        try:
+            queued = await run_once(session_factory, queue)
+            logger.info("Refresher pass complete", extra={"queued": queued})
+        except Exception:
+            logger.exception("Refresher pass failed")
+        await asyncio.sleep(settings.refresher_poll_seconds)
+
+
+async def main(once: bool = False) -> None:
+    await job_queue.start()
+    try:
+        if once:
+            await run_once()
+            await job_queue.join()
+        else:
+            await run_forever()
+    finally:
+        await job_queue.shutdown()
+        await close_http_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh stale riot accounts in the background")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    args = parser.parse_args()
+    configure_logging()
+    asyncio.run(main(once=args.once))
@@ -0,0 +1,222 @@
+"""Two-tier response cache for Riot API reads.
+
+- L1: in-process LRU with per-entry TTL (`riot_api_cache_max_entries` entries)
+- L2: optional shared store behind `riot_api_cache_url` (a Postgres database or a
+  local SQLite file), so several workers/processes share what one has fetched
+
+TTLs are set per endpoint in `cache_policies()`: match payloads are immutable and
+kept forever, account and league lookups only briefly. Endpoints without a policy
+(e.g. the match-id listing, which must see new games) are never cached.
+Concurrent identical lookups are coalesced into a single Riot call; if the caller
+making it is cancelled, the callers waiting on it make the call themselves.
+
+Cached values are shared between callers and must be treated as read-only.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import Column, Float, MetaData, String, Table, Text, create_engine, delete, select
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+FOREVER = None  # TTL meaning "never expires"
+
+
+class _FetchCancelled(Exception):
+    """Set on an in-flight lookup whose owner was cancelled, so its waiters fetch again"""
+
+
+def cache_policies() -> dict[str, float | None]:
+    """TTL in seconds per Riot method name (see RiotAPIClient._request)"""
+    return {
+        "match-v5.match": FOREVER,
+        "account-v1.by-riot-id": settings.riot_api_cache_short_ttl,
+        "league-v4.entries-by-puuid": settings.riot_api_cache_short_ttl,
+        "league-v4.entries-by-summoner": settings.riot_api_cache_short_ttl,
+        "summoner-v4.by-puuid": settings.riot_api_cache_ttl,
+    }
+
+
+class LRUCache:
+    """In-process LRU cache with a TTL per entry"""
+
+    def __init__(self, max_entries: int, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._data: OrderedDict[str, tuple[float | None, object]] = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        """Return (found, value)"""
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= self._clock():
+            del self._data[key]
+            self.expirations += 1
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value, ttl: float | None) -> None:
+        expires_at = None if ttl is None else self._clock() + ttl
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLCacheBackend:
+    """Shared cache table in any SQLAlchemy database (Postgres or a local SQLite file)"""
+
+    def __init__(self, url: str):
+        connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+        self.engine = create_engine(url, connect_args=connect_args)
+        self.metadata = MetaData()
+        self.table = Table(
+            "riot_api_cache",
+            self.metadata,
+            Column("key", String, primary_key=True),
+            Column("value", Text, nullable=False),
+            Column("expires_at", Float, nullable=True),  # Unix time, NULL = never
+        )
+        self.metadata.create_all(self.engine)
+
+    def get(self, key: str):
+        """Return (found, value, remaining_ttl)"""
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(self.table.c.value, self.table.c.expires_at).where(self.table.c.key == key)
+            ).first()
+        if row is None:
+            return False, None, None
+        remaining = None if row.expires_at is None else row.expires_at - time.time()
+        if remaining is not None and remaining <= 0:
+            return False, None, None
+        return True, json.loads(row.value), remaining
+
+    def set(self, key: str, value, ttl: float | None) -> None:
+        expires_at = None if ttl is None else time.time() + ttl
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.key == key))
+            conn.execute(self.table.insert().values(key=key, value=json.dumps(value), expires_at=expires_at))
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        backend: SQLCacheBackend | None = None,
+        policies: dict[str, float | None] | None = None,
+    ):
+        self.l1 = LRUCache(max_entries or settings.riot_api_cache_max_entries)
+        self.l2 = backend
+        self._policies = policies
+        self._inflight: dict[str, asyncio.Future] = {}
+
+        # Counters
+        self.hits = 0
+        self.shared_hits = 0  # Served from L2
+        self.misses = 0
+        self.coalesced = 0  # Waited on an identical in-flight request instead of calling Riot
+
+    @property
+    def policies(self) -> dict[str, float | None]:
+        if self._policies is None:
+            self._policies = cache_policies()
+        return self._policies
+
+    def is_cached(self, method: str) -> bool:
+        return method in self.policies
+
+    async def get_or_fetch(self, method: str, key: str, fetch: Callable[[], Awaitable]):
+        """Return the cached response for `key`, calling `fetch` at most once on a miss"""
+        if not self.is_cached(method):
+            return await fetch()
+        ttl = self.policies[method]
+
+        found, value = self.l1.get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        if self.l2 is not None:
+            try:
+                found, value, remaining = self.l2.get(key)
+            except Exception as e:
+                logger.warning("Riot cache backend read failed", extra={"error": str(e)})
+                found = False
+            if found:
+                self.shared_hits += 1
+                self.l1.set(key, value, remaining)
+                return value
+
+        while (inflight := self._inflight.get(key)) is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except _FetchCancelled:
+                # Only the caller making the request was cancelled, not this one
+                self.coalesced -= 1
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.set_exception(_FetchCancelled())
+            future.exception()  # Mark retrieved: nobody may be waiting
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved: nobody may be waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+        self.l1.set(key, value, ttl)
+        if self.l2 is not None:
+            try:
+                self.l2.set(key, value, ttl)
+            except Exception as e:
+                logger.warning("Riot cache backend write failed", extra={"error": str(e)})
+        future.set_result(value)
+        return value
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.shared_hits + self.misses + self.coalesced
+        return {
+            "entries": len(self.l1),
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.l1.evictions,
+            "expirations": self.l1.expirations,
+            "hit_ratio": round((lookups - self.misses) / lookups, 3) if lookups else 0.0,
+            "shared_backend": self.l2 is not None,
+        }
+
+
+def create_response_cache() -> ResponseCache:
+    backend = SQLCacheBackend(settings.riot_api_cache_url) if settings.riot_api_cache_url else None
+    return ResponseCache(backend=backend)
+
+
+response_cache = create_response_cache()
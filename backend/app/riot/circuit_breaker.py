@@ -0,0 +1,135 @@
+"""Circuit breaker for Riot API calls, per host and failure class.
+
+Two failure classes open a circuit:
+- "auth": 401/403, i.e. the API key expired or lost its permissions
+- "server": 5xx responses, timeouts and connection errors (Riot is degraded)
+
+After `riot_circuit_failure_threshold` consecutive failures of one class on a
+host, the circuit opens: every call to that host fails fast with
+RiotUnavailableError (served as a 503) instead of spending retries, backoff and
+timeouts. Once the reset timeout has passed the circuit is half-open: a single
+probe request goes through (and re-arms the timer); its success closes the
+circuit, its failure keeps it open. Any other response (200, 404, ...) proves the
+host and key work and resets the counts; 429s are left to the rate limiter.
+"""
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from app.config import settings
+
+AUTH = "auth"
+SERVER = "server"
+
+
+class RiotUnavailableError(Exception):
+    """A Riot call was refused because the host's circuit is open"""
+
+    def __init__(self, host: str, failure_class: str, retry_after: float):
+        self.host = host
+        self.failure_class = failure_class
+        self.retry_after = retry_after
+        reason = "API key rejected" if failure_class == AUTH else "Riot API errors"
+        super().__init__(f"Riot API unavailable ({reason} on {host}), retrying in {retry_after:.0f}s")
+
+
+def failure_class(status_code: int | None) -> str | None:
+    """Failure class of a response status (None = no response at all)"""
+    if status_code is None or status_code >= 500:
+        return SERVER
+    if status_code in (401, 403):
+        return AUTH
+    return None
+
+
+@dataclass
+class Circuit:
+    failures: int = 0  # Consecutive
+    opened_at: float | None = None  # None = closed
+    probing: bool = False  # Half-open: a probe request is in flight
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int | None = None,
+        reset_timeout: float | None = None,
+        auth_reset_timeout: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold or settings.riot_circuit_failure_threshold
+        self.reset_timeouts = {
+            SERVER: reset_timeout or settings.riot_circuit_reset_seconds,
+            AUTH: auth_reset_timeout or settings.riot_circuit_auth_reset_seconds,
+        }
+        self._clock = clock
+        self._circuits: dict[tuple[str, str], Circuit] = {}
+
+        # Counters
+        self.opened = 0
+        self.rejected = 0  # Calls failed fast
+
+    def _circuit(self, host: str, failure_class: str) -> Circuit:
+        return self._circuits.setdefault((host, failure_class), Circuit())
+
+    def check(self, host: str) -> None:
+        """Raise RiotUnavailableError unless a call to `host` may go through"""
+        now = self._clock()
+        expired = []
+        # Check every circuit of the host before touching any: a refusal must not
+        # leave another circuit half-open with no probe in flight
+        for (circuit_host, failure_class), circuit in self._circuits.items():
+            if circuit_host != host or circuit.opened_at is None:
+                continue
+            remaining = circuit.opened_at + self.reset_timeouts[failure_class] - now
+            if remaining > 0:
+                self.rejected += 1
+                raise RiotUnavailableError(host, failure_class, remaining)
+            expired.append(circuit)
+        for circuit in expired:
+            # Half-open: let this call probe, and refuse others for another timeout
+            circuit.opened_at = now
+            circuit.probing = True
+
+    def record_success(self, host: str) -> None:
+        for (circuit_host, _), circuit in self._circuits.items():
+            if circuit_host == host:
+                circuit.failures = 0
+                circuit.opened_at = None
+                circuit.probing = False
+
+    def record_failure(self, host: str, failure_class: str) -> None:
+        circuit = self._circuit(host, failure_class)
+        circuit.failures += 1
+        if circuit.probing or (circuit.opened_at is None and circuit.failures >= self.failure_threshold):
+            if circuit.opened_at is None:
+                self.opened += 1
+            circuit.opened_at = self._clock()
+        circuit.probing = False
+
+    def reset(self) -> None:
+        self._circuits.clear()
+
+    def snapshot(self) -> dict:
+        now = self._clock()
+        circuits = {}
+        for (host, failure_class), circuit in sorted(self._circuits.items()):
+            if circuit.opened_at is None:
+                state = "closed"
+            elif circuit.probing:
+                state = "half_open"
+            else:
+                state = "open"
+            retry_in = None
+            if circuit.opened_at is not None:
+                retry_in = round(max(0.0, circuit.opened_at + self.reset_timeouts[failure_class] - now), 1)
+            circuits[f"{host} {failure_class}"] = {
+                "state": state,
+                "failures": circuit.failures,
+                "retry_in": retry_in,
+            }
+        return {"opened": self.opened, "rejected": self.rejected, "circuits": circuits}
+
+
+# Shared by every RiotAPIClient, like the rate limiter
+circuit_breaker = CircuitBreaker()
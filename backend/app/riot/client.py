@@ -1,84 +1,306 @@
 import asyncio
+import logging
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
 from datetime import datetime
 
 import httpx
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.models.game import Game
+from app.database import insert_ignore_conflicts
+from app.models.game import Game, stat_columns
+from app.models.player import Player
+from app.models.riot_account import RiotAccount
+from app.models.team import DEFAULT_ALLOWED_QUEUES, Team
+from app.riot.cache import ResponseCache, response_cache
+from app.riot.circuit_breaker import CircuitBreaker, circuit_breaker, failure_class
+from app.riot.http import get_http_client
+from app.riot.match_json import loads, parse_match
+from app.riot.metrics import RiotMetrics, riot_metrics, span
+from app.riot.rate_limit import RateLimiter, rate_limiter
+from app.services import game_cache
+from app.services.activity_snapshot_service import invalidate_for_games
+from app.services.champion_rollup_service import apply_games
+from app.services.match_payload_service import get_match_payloads, store_match_payloads
+from app.services.rejected_match_service import get_rejected_ids, record_rejections
+
+# Season 26 start date: 2026-01-09 00:00:00 UTC
+SEASON_26_START = datetime(2026, 1, 9, 0, 0, 0)
+# Riot's maximum `count` for the match-id listing
+MATCH_IDS_PAGE_SIZE = 100
+# Queues the match-id listing's `type=ranked` filter returns
+RANKED_QUEUES = frozenset({420, 440})
+# Custom games (plain and tournament-code) are scrims: stored as "competitive"
+CUSTOM_QUEUES = frozenset({0, 3100})
+logger = logging.getLogger(__name__)
+
+# Session.info key of the IngestionReport of the session's refresh
+REPORT_KEY = "ingestion_report"
+
+# Unprojected match bodies downloaded inside a `keep_raw_match_bodies()` block
+_raw_match_bodies: ContextVar[dict[str, bytes] | None] = ContextVar("raw_match_bodies", default=None)
+
+
+@contextmanager
+def keep_raw_match_bodies() -> Iterator[dict[str, bytes]]:
+    """
+    Collect the raw response body of every match downloaded inside the block, by
+    match id, for the payload store. Matches served by the response cache only
+    exist projected and are missing from it.
+    """
+    bodies = {}
+    token = _raw_match_bodies.set(bodies)
+    try:
+        yield bodies
+    finally:
+        _raw_match_bodies.reset(token)
+
+
+@dataclass
+class IngestionReport:
+    """What one refresh (or backfill) did with the match ids Riot listed"""
+
+    listed: int = 0
+    already_stored: int = 0  # This account already has the game
+    skipped_rejected: int = 0  # Rejected by an earlier refresh (negative cache)
+    from_payload_store: int = 0  # Downloaded earlier, e.g. by a teammate's refresh
+    downloaded: int = 0
+    rejected: int = 0  # Newly rejected (queue, season, participant)
+    new_games: int = 0
+
+    @property
+    def riot_calls_saved(self) -> int:
+        """Match downloads avoided by the negative cache and the payload store"""
+        return self.skipped_rejected + self.from_payload_store
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "riot_calls_saved": self.riot_calls_saved}
+
+
+def ingestion_report(db: Session) -> IngestionReport:
+    """The session's report, accumulated over every _store_matches call"""
+    return db.info.setdefault(REPORT_KEY, IngestionReport())
+
+
+def match_listings(allowed_queues) -> list[dict]:
+    """
+    Match-id listing filters that together return exactly the allowed queues.
+
+    One queue is one `queue=` listing, solo/duo + flex is a single `type=ranked`
+    listing, anything else is one listing per queue: listing calls are cheap next
+    to downloading matches we would throw away.
+    """
+    allowed = set(allowed_queues)
+    if len(allowed) > 1 and allowed <= RANKED_QUEUES:
+        return [{"match_type": "ranked"}]
+    return [{"queue": queue} for queue in sorted(allowed)]
+
+
+def game_type_for_queue(queue_id: int) -> str:
+    return "competitive" if queue_id in CUSTOM_QUEUES else "soloq"
 
 
 class RiotAPIClient:
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient | None = None,
+        limiter: RateLimiter | None = None,
+        cache: ResponseCache | None = None,
+        metrics: RiotMetrics | None = None,
+        breaker: CircuitBreaker | None = None,
+    ):
         self.api_key = settings.riot_api_key
         self.region = settings.riot_api_region
         self.base_url_europe = "https://europe.api.riotgames.com"
         self.base_url_region = f"https://{self.region}.api.riotgames.com"
         self.headers = {"X-Riot-Token": self.api_key}
+        # None = use the app-wide pooled client (see app.riot.http)
+        self._http_client = http_client
+        # Shared across instances so concurrent refreshes draw from one quota
+        self.rate_limiter = limiter or rate_limiter
+        self.cache = cache or response_cache
+        self.metrics = metrics or riot_metrics
+        self.circuit_breaker = breaker or circuit_breaker
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        return self._http_client or get_http_client()
+
+    async def _request(
+        self,
+        url: str,
+        method: str = "default",
+        retries: int = 3,
+        parse: Callable[[bytes], dict] = loads,
+    ) -> dict:
+        """
+        GET a Riot endpoint, through the response cache.
 
-    async def _request(self, url: str, retries: int = 3) -> dict:
-        async with httpx.AsyncClient() as client:
-            for attempt in range(retries):
+        `method` names the endpoint for per-method rate limits (Riot counts
+        e.g. every match-v5 match lookup against one shared method quota) and
+        selects its cache policy. `parse` turns the response body into what is
+        returned and cached.
+        """
+        return await self.cache.get_or_fetch(method, url, lambda: self._fetch(url, method, retries, parse))
+
+    async def _fetch(self, url: str, method: str, retries: int, parse: Callable[[bytes], dict]) -> dict:
+        with span("riot.request", **{"riot.method": method, "http.url": url}):
+            return await self._fetch_with_retries(url, method, retries, parse)
+
+    async def _fetch_with_retries(
+        self, url: str, method: str, retries: int, parse: Callable[[bytes], dict]
+    ) -> dict:
+        client = self.http_client
+        host = httpx.URL(url).host
+        for attempt in range(retries):
+            # Fail fast (RiotUnavailableError) while the host's circuit is open,
+            # including between retries once this call's failures opened it
+            self.circuit_breaker.check(host)
+            try:
+                waited = await self.rate_limiter.acquire(host, method)
+                if waited:
+                    self.metrics.observe_rate_limit_sleep(method, waited)
+                start = time.perf_counter()
                 try:
-                    response = await client.get(url, headers=self.headers, timeout=10.0)
-                    if response.status_code == 429:
-                        retry_after = int(response.headers.get("Retry-After", 5))
-                        await asyncio.sleep(retry_after)
-                        continue
-                    response.raise_for_status()
-                    return response.json()
-                except httpx.HTTPStatusError as e:
-                    print(f"Riot API HTTP Error: {e.response.status_code} - {e.response.text}")
-                    if e.response.status_code == 404:
-                        raise ValueError("Resource not found")
-                    if e.response.status_code == 401:
-                        raise ValueError(f"401 Unauthorized - API key is invalid or expired")
-                    if e.response.status_code == 403:
-                        raise ValueError(f"403 Forbidden - API key doesn't have required permissions")
-                    if attempt == retries - 1:
-                        raise ValueError(f"HTTP {e.response.status_code}: {e.response.text}")
-                    await asyncio.sleep(2**attempt)
-                except Exception as e:
-                    print(f"Riot API Request Error: {str(e)}")
-                    if attempt == retries - 1:
-                        raise
-                    await asyncio.sleep(2**attempt)
-            raise Exception("Max retries exceeded")
+                    response = await client.get(url, headers=self.headers)
+                except Exception:
+                    self.metrics.observe_response(method, "error", time.perf_counter() - start)
+                    self.circuit_breaker.record_failure(host, failure_class(None))
+                    raise
+                self.metrics.observe_response(
+                    method, response.status_code, time.perf_counter() - start, len(response.content)
+                )
+                failure = failure_class(response.status_code)
+                if failure:
+                    self.circuit_breaker.record_failure(host, failure)
+                elif response.status_code != 429:
+                    self.circuit_breaker.record_success(host)
+                self.rate_limiter.update(host, method, response.headers)
+                if response.status_code == 429:
+                    # The limiter makes the next attempt (and every other caller) wait
+                    retry_after = int(response.headers.get("Retry-After", 5))
+                    self.rate_limiter.penalize(host, retry_after)
+                    logger.warning(
+                        "Riot API rate limited",
+                        extra={"method": method, "retry_after": retry_after, "attempt": attempt + 1},
+                    )
+                    self.metrics.observe_retry(method, "429")
+                    continue
+                response.raise_for_status()
+                return parse(response.content)
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                logger.warning(
+                    "Riot API HTTP error",
+                    extra={"method": method, "status": status, "attempt": attempt + 1, "body": e.response.text[:200]},
+                )
+                if status == 404:
+                    raise ValueError("Resource not found")
+                if status == 401:
+                    raise ValueError(f"401 Unauthorized - API key is invalid or expired")
+                if status == 403:
+                    raise ValueError(f"403 Forbidden - API key doesn't have required permissions")
+                if attempt == retries - 1:
+                    raise ValueError(f"HTTP {status}: {e.response.text}")
+                self.metrics.observe_retry(method, f"{status // 100}xx")
+                await asyncio.sleep(2**attempt)
+            except Exception as e:
+                logger.warning(
+                    "Riot API request error",
+                    extra={"method": method, "error": repr(e), "attempt": attempt + 1},
+                )
+                if attempt == retries - 1:
+                    raise
+                self.metrics.observe_retry(method, "error")
+                await asyncio.sleep(2**attempt)
+        raise Exception("Max retries exceeded")
 
     async def get_puuid_by_riot_id(self, game_name: str, tag_line: str) -> str:
         url = f"{self.base_url_europe}/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
-        data = await self._request(url)
+        data = await self._request(url, method="account-v1.by-riot-id")
         return data["puuid"]
 
     async def get_summoner_by_puuid(self, puuid: str) -> dict:
         url = f"{self.base_url_region}/lol/summoner/v4/summoners/by-puuid/{puuid}"
-        return await self._request(url)
+        return await self._request(url, method="summoner-v4.by-puuid")
 
     async def get_match_ids_by_puuid(
-        self, puuid: str, start: int = 0, count: int = 100, start_time: int | None = None
+        self,
+        puuid: str,
+        start: int = 0,
+        count: int = 100,
+        start_time: int | None = None,
+        end_time: int | None = None,
+        queue: int | None = None,
+        match_type: str | None = None,
     ) -> list[str]:
         """
-        Get match IDs for a PUUID.
+        Get match IDs for a PUUID, newest first.
 
         Args:
             puuid: Player's PUUID
             start: Index to start from
             count: Number of matches to return (max 100)
             start_time: Epoch seconds - only return matches after this time
+            end_time: Epoch seconds - only return matches before this time
+            queue: Only return matches of this queue id
+            match_type: Only return matches of this type (e.g. "ranked")
         """
         url = f"{self.base_url_europe}/lol/match/v5/matches/by-puuid/{puuid}/ids?start={start}&count={count}"
         if start_time:
             url += f"&startTime={start_time}"
-        return await self._request(url)
+        if end_time:
+            url += f"&endTime={end_time}"
+        if queue is not None:
+            url += f"&queue={queue}"
+        if match_type:
+            url += f"&type={match_type}"
+        return await self._request(url, method="match-v5.ids-by-puuid")
 
     async def get_match_details(self, match_id: str) -> dict:
         url = f"{self.base_url_europe}/lol/match/v5/matches/{match_id}"
-        return await self._request(url)
+
+        def parse(body: bytes) -> dict:
+            raw_bodies = _raw_match_bodies.get()
+            if raw_bodies is not None:
+                raw_bodies[match_id] = body
+            # Only the fields we read are kept (and cached)
+            return parse_match(body)
+
+        return await self._request(url, method="match-v5.match", parse=parse)
+
+    async def fetch_match_details(
+        self, match_ids: list[str], concurrency: int | None = None
+    ) -> list[dict]:
+        """
+        Download several matches concurrently, at most `concurrency` in flight.
+
+        The rate limiter still paces the actual requests; results are returned in
+        the same order as `match_ids`. If one download fails, the others are
+        cancelled and the error is raised.
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.riot_fetch_concurrency)
+
+        async def fetch(match_id: str) -> dict:
+            async with semaphore:
+                return await self.get_match_details(match_id)
+
+        tasks = [asyncio.ensure_future(fetch(match_id)) for match_id in match_ids]
+        try:
+            return await asyncio.gather(*tasks)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            raise
 
     async def get_rank_info(self, summoner_id: str) -> dict:
         """Get ranked info for a summoner by summoner_id (legacy method)"""
         url = f"{self.base_url_region}/lol/league/v4/entries/by-summoner/{summoner_id}"
-        data = await self._request(url)
+        data = await self._request(url, method="league-v4.entries-by-summoner")
         # Find Solo/Duo queue rank
         for entry in data:
             if entry["queueType"] == "RANKED_SOLO_5x5":
@@ -97,7 +319,7 @@ class RiotAPIClient:
     async def get_rank_info_by_puuid(self, puuid: str) -> dict:
         """Get ranked info directly by PUUID (preferred method with new API keys)"""
         url = f"{self.base_url_region}/lol/league/v4/entries/by-puuid/{puuid}"
-        data = await self._request(url)
+        data = await self._request(url, method="league-v4.entries-by-puuid")
         # Find Solo/Duo queue rank
         for entry in data:
             if entry["queueType"] == "RANKED_SOLO_5x5":
@@ -117,7 +339,8 @@ class RiotAPIClient:
         """Fetch and update rank information for a riot account"""
         from app.models.rank_history import RankHistory
 
-        print(f"Starting rank update for {riot_account.summoner_name}#{riot_account.tag_line}")
+        account = f"{riot_account.summoner_name}#{riot_account.tag_line}"
+        logger.info("Starting rank update", extra={"account": account})
         
         # Store old values for history comparison
         old_tier = riot_account.rank_tier
@@ -131,15 +354,15 @@ class RiotAPIClient:
             
             # If PUUID doesn't look valid or API returns error, try to fetch real PUUID
             try:
-                print(f"Fetching rank info directly by PUUID: {puuid}")
+                logger.debug("Fetching rank info by PUUID", extra={"account": account, "puuid": puuid})
                 rank_info = await self.get_rank_info_by_puuid(puuid)
             except ValueError as e:
                 if "400" in str(e) or "decrypting" in str(e).lower():
                     # PUUID is invalid - fetch the real one
-                    print(f"PUUID appears invalid, fetching real PUUID for {riot_account.summoner_name}#{riot_account.tag_line}")
+                    logger.warning("PUUID appears invalid, fetching the real one", extra={"account": account})
                     try:
                         real_puuid = await self.get_puuid_by_riot_id(riot_account.summoner_name, riot_account.tag_line)
-                        print(f"Got real PUUID: {real_puuid}")
+                        logger.info("Got real PUUID", extra={"account": account, "puuid": real_puuid})
                         riot_account.puuid = real_puuid
                         db.commit()
                         puuid = real_puuid
@@ -149,7 +372,7 @@ class RiotAPIClient:
                 else:
                     raise
             
-            print(f"Rank info result: {rank_info}")
+            logger.debug("Rank info result", extra={"account": account, "rank_info": rank_info})
 
             if rank_info:
                 # Update current rank
@@ -159,7 +382,6 @@ class RiotAPIClient:
                 riot_account.wins = rank_info["wins"]
                 riot_account.losses = rank_info["losses"]
 
-                print(f"Updated rank: {riot_account.rank_tier} {riot_account.rank_division} {riot_account.lp} LP")
 
                 # Update peak rank if this is higher
                 def rank_value(tier, division, lp):
@@ -207,131 +429,319 @@ class RiotAPIClient:
                     db.add(history_entry)
 
                 db.commit()
-                print(f"Updated rank for {riot_account.summoner_name}: {rank_info['tier']} {rank_info['rank']} {rank_info['lp']} LP")
+                logger.info(
+                    "Updated rank",
+                    extra={"account": account, "tier": rank_info["tier"], "division": rank_info["rank"],
+                           "lp": rank_info["lp"]},
+                )
             else:
-                print(f"No ranked data found for {riot_account.summoner_name}")
+                logger.info("No ranked data found", extra={"account": account})
 
         except Exception as e:
-            print(f"Failed to update rank: {str(e)}")
+            logger.warning("Failed to update rank", extra={"account": account, "error": str(e)})
             db.rollback()
             raise  # Re-raise the exception so frontend can handle it
 
-    async def fetch_and_store_matches(self, db: Session, riot_account, max_matches: int = 20):
-        """Fetch recent matches and store in database (optimized: only fetches new games)"""
-        from datetime import datetime
-        from sqlalchemy import func
+    @staticmethod
+    def _game_row(match_id: str, match_data: dict, participant: dict, riot_account_id: int) -> dict:
+        """Per-account `games` row for one participant of a match"""
+        # Extract stats
+        queue_id = match_data["info"]["queueId"]
+        duration_seconds = match_data["info"]["gameDuration"]
+        duration_minutes = duration_seconds / 60
+        kills = participant["kills"]
+        deaths = participant["deaths"]
+        assists = participant["assists"]
+        kda = ((kills + assists) / deaths) if deaths > 0 else (kills + assists)
+
+        cs = participant["totalMinionsKilled"] + participant.get("neutralMinionsKilled", 0)
+        cs_per_min = cs / duration_minutes if duration_minutes > 0 else 0
+
+        gold = participant["goldEarned"]
+        gold_per_min = gold / duration_minutes if duration_minutes > 0 else 0
+
+        vision = participant["visionScore"]
+        vision_per_min = vision / duration_minutes if duration_minutes > 0 else 0
+
+        team_kills = sum(p["kills"] for p in match_data["info"]["participants"] if p["teamId"] == participant["teamId"])
+        kp = ((kills + assists) / team_kills * 100) if team_kills > 0 else 0
+
+        # Check for pentakill
+        is_pentakill = participant.get("pentaKills", 0) > 0
+
+        stats = {
+            "kills": kills,
+            "deaths": deaths,
+            "assists": assists,
+            "kda": round(kda, 2),
+            "cs": cs,
+            "cs_per_min": round(cs_per_min, 2),
+            "gold": gold,
+            "gold_per_min": round(gold_per_min, 2),
+            "vision": vision,
+            "vision_per_min": round(vision_per_min, 2),
+            "kp": round(kp, 2),
+            "damage_dealt": participant.get("totalDamageDealtToChampions", 0),
+            "win": participant["win"],
+            "queue_id": queue_id,
+        }
+
+        return {
+            "riot_account_id": riot_account_id,
+            "match_id": match_id,
+            "game_type": game_type_for_queue(queue_id),
+            "champion_id": participant["championId"],
+            "role": participant["teamPosition"].lower(),
+            "stats": stats,
+            **stat_columns(stats),
+            "game_duration": duration_seconds,
+            "game_date": datetime.fromtimestamp(match_data["info"]["gameCreation"] / 1000),
+            "is_pentakill": is_pentakill,
+        }
+
+    @staticmethod
+    def _team_queues(db: Session, riot_account) -> set[int]:
+        """Queue ids the account's team keeps"""
+        allowed = (
+            db.query(Team.allowed_queues)
+            .join(Player, Player.team_id == Team.id)
+            .filter(Player.id == riot_account.player_id)
+            .scalar()
+        )
+        return set(allowed or DEFAULT_ALLOWED_QUEUES)
+
+    @staticmethod
+    def _team_puuids(db: Session, riot_account) -> dict[str, int]:
+        """puuid -> riot_account_id for every account on the same team as `riot_account`"""
+        team_id = db.query(Player.team_id).filter(Player.id == riot_account.player_id).scalar()
+        accounts = {riot_account.puuid: riot_account.id}
+        if team_id is not None:
+            rows = (
+                db.query(RiotAccount.puuid, RiotAccount.id)
+                .join(Player, RiotAccount.player_id == Player.id)
+                .filter(Player.team_id == team_id)
+                .all()
+            )
+            accounts.update({puuid: account_id for puuid, account_id in rows})
+        return accounts
 
-        # Season 26 start date: 2026-01-09 00:00:00 UTC
-        SEASON_26_START = datetime(2026, 1, 9, 0, 0, 0)
+    async def fetch_and_store_matches(self, db: Session, riot_account, max_matches: int = 20) -> int:
+        """
+        Fetch recent matches and store in database (optimized: only fetches new games).
 
+        Only matches of the team's allowed queues played this season are listed
+        (see match_listings), so every downloaded match is kept.
+        Each match is downloaded once and stored for every account of the team that
+        played in it (duo partners, flex stacks), not just `riot_account`.
+        Returns the number of new game rows stored, teammates' rows included.
+        """
         try:
-            # Optimization: Find the most recent game we have stored for this account
-            # This allows us to only fetch games AFTER this date from Riot API
-            most_recent_game = (
-                db.query(func.max(Game.game_date))
-                .filter(Game.riot_account_id == riot_account.id)
-                .scalar()
-            )
-
-            start_time = None
-            if most_recent_game:
-                # Add 1 second to avoid re-fetching the same game
-                start_time = int(most_recent_game.timestamp()) + 1
-                print(f"Incremental fetch for {riot_account.summoner_name}: "
-                      f"only games after {most_recent_game.isoformat()}")
+            allowed_queues = self._team_queues(db, riot_account)
+            # Optimization: only fetch games after the newest match this account's own
+            # listing has seen. Rows added by a teammate's refresh don't count: they
+            # would make us skip this account's solo games in between.
+            last_match_at = riot_account.last_match_at
+            match_ids = []
+            if last_match_at:
+                # Add 1 second to avoid re-fetching the same game. Page through
+                # everything played since, however many games that is.
+                start_time = max(int(last_match_at.timestamp()) + 1, int(SEASON_26_START.timestamp()))
+                logger.info(
+                    "Incremental match fetch",
+                    extra={"account": riot_account.summoner_name, "after": last_match_at.isoformat()},
+                )
+                for listing in match_listings(allowed_queues):
+                    start = 0
+                    while True:
+                        page = await self.get_match_ids_by_puuid(
+                            riot_account.puuid,
+                            start=start,
+                            count=MATCH_IDS_PAGE_SIZE,
+                            start_time=start_time,
+                            **listing,
+                        )
+                        match_ids.extend(page)
+                        start += len(page)
+                        if len(page) < MATCH_IDS_PAGE_SIZE:
+                            break
             else:
-                print(f"Full fetch for {riot_account.summoner_name}: no existing games found")
-
-            match_ids = await self.get_match_ids_by_puuid(
-                riot_account.puuid, start=0, count=max_matches, start_time=start_time
+                # Only the latest games; older history comes from backfill_matches
+                logger.info("Full match fetch: no existing games", extra={"account": riot_account.summoner_name})
+                for listing in match_listings(allowed_queues):
+                    match_ids.extend(await self.get_match_ids_by_puuid(
+                        riot_account.puuid,
+                        start=0,
+                        count=max_matches,
+                        start_time=int(SEASON_26_START.timestamp()),
+                        **listing,
+                    ))
+            match_ids = list(dict.fromkeys(match_ids))
+
+            new_games_count = await self._store_matches(db, riot_account, match_ids, allowed_queues)
+            db.commit()
+            report = ingestion_report(db)
+            logger.info(
+                "Refresh complete",
+                extra={"account": riot_account.summoner_name, "match_ids": len(match_ids), **report.as_dict()},
             )
+            return new_games_count
+        except Exception as e:
+            db.rollback()
+            raise e
 
-            new_games_count = 0
-            for match_id in match_ids:
-                # Check if match already exists
-                existing = db.query(Game).filter(Game.match_id == match_id).first()
-                if existing:
-                    continue
-
-                # Fetch match details
-                match_data = await self.get_match_details(match_id)
-
-                # Filter: Only Ranked Solo/Duo (queueId 420)
-                queue_id = match_data["info"]["queueId"]
-                if queue_id != 420:
-                    print(f"Skipping match {match_id} - queueId {queue_id} is not Ranked Solo/Duo (420)")
-                    continue
-
-                # Filter: Only Season 26 games (from 2026-01-09)
-                game_timestamp = match_data["info"]["gameCreation"] / 1000  # Convert ms to seconds
-                game_date = datetime.fromtimestamp(game_timestamp)
-                if game_date < SEASON_26_START:
-                    print(f"Skipping match {match_id} - game date {game_date} is before Season 26 (2026-01-09)")
-                    continue
-
-                participant = next(
-                    (p for p in match_data["info"]["participants"] if p["puuid"] == riot_account.puuid), None
-                )
-
-                if not participant:
-                    continue
-
-                # Extract stats
-                duration_seconds = match_data["info"]["gameDuration"]
-                duration_minutes = duration_seconds / 60
-                kills = participant["kills"]
-                deaths = participant["deaths"]
-                assists = participant["assists"]
-                kda = ((kills + assists) / deaths) if deaths > 0 else (kills + assists)
-
-                cs = participant["totalMinionsKilled"] + participant.get("neutralMinionsKilled", 0)
-                cs_per_min = cs / duration_minutes if duration_minutes > 0 else 0
-
-                gold = participant["goldEarned"]
-                gold_per_min = gold / duration_minutes if duration_minutes > 0 else 0
-
-                vision = participant["visionScore"]
-                vision_per_min = vision / duration_minutes if duration_minutes > 0 else 0
-
-                team_kills = sum(p["kills"] for p in match_data["info"]["participants"] if p["teamId"] == participant["teamId"])
-                kp = ((kills + assists) / team_kills * 100) if team_kills > 0 else 0
-
-                # Check for pentakill
-                is_pentakill = participant.get("pentaKills", 0) > 0
-
-                stats = {
-                    "kills": kills,
-                    "deaths": deaths,
-                    "assists": assists,
-                    "kda": round(kda, 2),
-                    "cs": cs,
-                    "cs_per_min": round(cs_per_min, 2),
-                    "gold": gold,
-                    "gold_per_min": round(gold_per_min, 2),
-                    "vision": vision,
-                    "vision_per_min": round(vision_per_min, 2),
-                    "kp": round(kp, 2),
-                    "win": participant["win"],
-                    "queue_id": queue_id,
-                }
-
-                game = Game(
-                    riot_account_id=riot_account.id,
-                    match_id=match_id,
-                    game_type="soloq",
-                    champion_id=participant["championId"],
-                    role=participant["teamPosition"].lower(),
-                    stats=stats,
-                    game_duration=duration_seconds,
-                    game_date=datetime.fromtimestamp(match_data["info"]["gameCreation"] / 1000),
-                    is_pentakill=is_pentakill,
+    async def backfill_matches(self, db: Session, riot_account, max_pages: int | None = None) -> int:
+        """
+        Store the account's whole season history, one page of match ids at a time.
+
+        The crawl lists ids of the team's allowed queues between SEASON_26_START and
+        a fixed end time (set when the backfill starts) in pages of
+        MATCH_IDS_PAGE_SIZE, one listing after the other, and commits each page's
+        games together with the cursor (`backfill_until`, `backfill_listing`,
+        `backfill_offset`), so an interrupted backfill resumes where it stopped.
+        Games played after the end time are left to the regular refresh. A season
+        of N games costs about ceil(N / 100) + 1 listing calls per listing plus one
+        download per match not already stored for a teammate, all paced by the rate
+        limiter.
+        Returns the number of new game rows stored.
+        """
+        if riot_account.backfill_completed_at is not None:
+            return 0
+        if riot_account.backfill_until is None:
+            riot_account.backfill_until = datetime.utcnow()
+            riot_account.backfill_listing = 0
+            riot_account.backfill_offset = 0
+        allowed_queues = self._team_queues(db, riot_account)
+        listings = match_listings(allowed_queues)
+        start_time = int(SEASON_26_START.timestamp())
+        end_time = int(riot_account.backfill_until.timestamp())
+
+        new_games_count = 0
+        pages = 0
+        finished = False
+        try:
+            while not finished:
+                page = await self.get_match_ids_by_puuid(
+                    riot_account.puuid,
+                    start=riot_account.backfill_offset,
+                    count=MATCH_IDS_PAGE_SIZE,
+                    start_time=start_time,
+                    end_time=end_time,
+                    **listings[riot_account.backfill_listing],
                 )
-                db.add(game)
-                new_games_count += 1
-
-            db.commit()
-            print(f"Refresh complete for {riot_account.summoner_name}: "
-                  f"{new_games_count} new games added (fetched {len(match_ids)} match IDs)")
+                new_games_count += await self._store_matches(db, riot_account, page, allowed_queues)
+                riot_account.backfill_offset += len(page)
+                if len(page) < MATCH_IDS_PAGE_SIZE:
+                    # This listing is exhausted: move on to the next one
+                    riot_account.backfill_listing += 1
+                    riot_account.backfill_offset = 0
+                    if riot_account.backfill_listing >= len(listings):
+                        riot_account.backfill_completed_at = datetime.utcnow()
+                        finished = True
+                db.commit()
+                pages += 1
+                if max_pages is not None and pages >= max_pages:
+                    break
         except Exception as e:
             db.rollback()
             raise e
+        logger.info(
+            "Backfill complete" if finished else "Backfill paused",
+            extra={"account": riot_account.summoner_name, "new_games": new_games_count},
+        )
+        return new_games_count
+
+    async def _store_matches(
+        self, db: Session, riot_account, match_ids: list[str], allowed_queues: set[int]
+    ) -> int:
+        """
+        Store the listed matches this account doesn't have yet (no commit).
+
+        Matches it rejects are remembered for the account (rejected_match_service)
+        and never looked at again. Counts are added to the session's
+        IngestionReport. Returns the number of new game rows stored.
+        """
+        report = ingestion_report(db)
+        report.listed += len(match_ids)
+
+        # Skip matches this account already has or rejected before (one IN query each)
+        known_ids = set()
+        if match_ids:
+            known_ids = {
+                row.match_id
+                for row in db.query(Game.match_id).filter(
+                    Game.riot_account_id == riot_account.id,
+                    Game.match_id.in_(match_ids),
+                )
+            }
+        rejected_ids = get_rejected_ids(db, riot_account.id, [m for m in match_ids if m not in known_ids])
+        missing_ids = [
+            match_id for match_id in match_ids if match_id not in known_ids and match_id not in rejected_ids
+        ]
+        report.already_stored += len(known_ids)
+        report.skipped_rejected += len(rejected_ids)
+
+        # Matches a teammate already downloaded come from the payload store;
+        # only the rest are downloaded, in parallel
+        stored = get_match_payloads(db, missing_ids, parse=parse_match)
+        to_download = [match_id for match_id in missing_ids if match_id not in stored]
+        with keep_raw_match_bodies() as raw_bodies:
+            downloaded = dict(zip(to_download, await self.fetch_match_details(to_download)))
+        matches = {**stored, **downloaded}
+        report.from_payload_store += len(stored)
+        report.downloaded += len(to_download)
+
+        team_puuids = self._team_puuids(db, riot_account)
+        game_rows = []
+        rejections = {}
+        for match_id in missing_ids:
+            match_data = matches[match_id]
+            game_date = datetime.fromtimestamp(match_data["info"]["gameCreation"] / 1000)
+            if riot_account.last_match_at is None or game_date > riot_account.last_match_at:
+                riot_account.last_match_at = game_date
+
+            # Filter: only the team's queues (the listing already asked Riot for them)
+            queue_id = match_data["info"]["queueId"]
+            if queue_id not in allowed_queues:
+                logger.debug("Skipping match: queue not allowed", extra={"match_id": match_id, "queue_id": queue_id})
+                rejections[match_id] = "queue"
+                continue
+
+            # Filter: Only Season 26 games (from 2026-01-09)
+            if game_date < SEASON_26_START:
+                logger.debug("Skipping match: before Season 26", extra={"match_id": match_id, "game_date": game_date})
+                rejections[match_id] = "season"
+                continue
+
+            participants = match_data["info"]["participants"]
+            if not any(participant["puuid"] == riot_account.puuid for participant in participants):
+                logger.debug(
+                    "Skipping match: account is not a participant",
+                    extra={"match_id": match_id, "account": riot_account.summoner_name},
+                )
+                rejections[match_id] = "no_participant"
+                continue
+
+            # One row per team member in the match
+            for participant in participants:
+                account_id = team_puuids.get(participant["puuid"])
+                if account_id is not None:
+                    game_rows.append(self._game_row(match_id, match_data, participant, account_id))
+
+        # One INSERT for all new rows; a row stored meanwhile by a concurrent
+        # refresh (e.g. of a duo partner) is skipped instead of failing the batch
+        inserted = set(insert_ignore_conflicts(db, Game, game_rows, ["match_id", "riot_account_id"]))
+        new_rows = [row for row in game_rows if (row["match_id"], row["riot_account_id"]) in inserted]
+        apply_games(db, new_rows)
+        # Late games reopen closed weeks of the activity grid
+        invalidate_for_games(db, [(row["riot_account_id"], row["game_date"]) for row in new_rows])
+        # Keep the full payload of kept matches so match details never need Riot again
+        # (as downloaded; only a match the response cache served is stored projected)
+        store_match_payloads(
+            db, {m: raw_bodies.get(m, data) for m, data in downloaded.items() if m not in rejections}
+        )
+        record_rejections(db, riot_account.id, rejections)
+        # Cached results are dropped once the caller commits
+        game_cache.mark_changed(db, [row["riot_account_id"] for row in new_rows])
+        report.rejected += len(rejections)
+        report.new_games += len(inserted)
+        return len(inserted)
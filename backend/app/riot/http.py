@@ -0,0 +1,96 @@
+"""Shared, long-lived HTTP connection pool for Riot API calls.
+
+Every `RiotAPIClient` instance goes through the same `httpx.AsyncClient`, so
+consecutive calls to `europe.api.riotgames.com` / `euw1.api.riotgames.com`
+reuse keep-alive connections instead of paying a new TCP+TLS handshake each time.
+The pool is opened lazily and closed from the FastAPI lifespan.
+"""
+import asyncio
+import logging
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_closing: set[asyncio.Future] = set()  # Replaced pools being closed
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (installed with `httpx[http2]`)"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build a pooled client from the riot_http_* settings"""
+    limits = httpx.Limits(
+        max_connections=settings.riot_http_max_connections,
+        max_keepalive_connections=settings.riot_http_max_keepalive_connections,
+        keepalive_expiry=settings.riot_http_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(
+        settings.riot_http_timeout,
+        connect=settings.riot_http_connect_timeout,
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=timeout,
+        http2=settings.riot_http2 and http2_available(),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared client, creating it on first use.
+
+    Connections are bound to the event loop that opened them, so a new pool is
+    created if the running loop changed (e.g. a CLI run after the app loop), and
+    the previous one is closed.
+    """
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        if _client is not None and not _client.is_closed:
+            _close_replaced_client(_client, _client_loop)
+        _client = create_http_client()
+        _client_loop = loop
+    return _client
+
+
+def _close_replaced_client(client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop | None) -> None:
+    """
+    Close a pool opened on another event loop: on that loop if it is still running
+    (in another thread), otherwise on the current one.
+    """
+    if loop is not None and loop.is_running():
+        future = asyncio.run_coroutine_threadsafe(_aclose_quietly(client), loop)
+    else:
+        future = asyncio.ensure_future(_aclose_quietly(client))
+    _closing.add(future)
+    future.add_done_callback(_closing.discard)
+
+
+async def _aclose_quietly(client: httpx.AsyncClient) -> None:
+    try:
+        await client.aclose()
+    except Exception as e:
+        # Connections of a closed loop can't shut down cleanly; they are gone anyway
+        logger.debug("Closing a replaced HTTP pool failed", extra={"error": repr(e)})
+
+
+async def close_http_client() -> None:
+    """Close the shared pool (called on application shutdown)"""
+    global _client, _client_loop
+
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
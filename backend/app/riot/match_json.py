@@ -0,0 +1,136 @@
+"""Fast parsing and field projection of Riot match payloads.
+
+A Match V5 response is 30-100 KB: 10 participants with 100+ fields each, plus
+challenges, perks and missions, of which ingestion (`RiotAPIClient._game_row`)
+and the match detail page (`build_match_detail_response`) read about 30 per
+participant. `parse_match` parses the raw response body with orjson when it is
+installed (stdlib json otherwise) and keeps only the fields listed below, so the
+response cache and ingestion hold a fraction of the original tree. The payload
+store keeps the raw body (see match_payload_service).
+
+Add a field here before reading it from a match payload in ingestion or from the
+response cache; stored payloads already have every field.
+"""
+import json
+from collections.abc import Callable
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Optional speedup
+    orjson = None
+
+KEEP = True  # Keep the whole value
+
+V5_PARTICIPANT_FIELDS = {
+    name: KEEP
+    for name in (
+        # Identity
+        "puuid", "riotIdGameName", "riotIdTagline", "summonerName",
+        "championId", "championName", "teamId", "teamPosition", "win",
+        # Stats
+        "kills", "deaths", "assists", "pentaKills",
+        "totalMinionsKilled", "neutralMinionsKilled", "goldEarned", "visionScore",
+        "totalDamageDealtToChampions", "totalDamageTaken",
+        # Build
+        "summoner1Id", "summoner2Id",
+        "item0", "item1", "item2", "item3", "item4", "item5", "item6",
+    )
+}
+
+TEAM_FIELDS = {"teamId": KEEP, "win": KEEP, "bans": KEEP}
+
+# Match V5 (Riot API)
+V5_FIELDS = {
+    "metadata": {"matchId": KEEP, "participants": KEEP},
+    "info": {
+        "gameCreation": KEEP,
+        "gameDuration": KEEP,
+        "queueId": KEEP,
+        "participants": [V5_PARTICIPANT_FIELDS],
+        "teams": [TEAM_FIELDS],
+    },
+}
+
+# Custom game export (what `match_import_service._normalize_to_v5` reads)
+CUSTOM_GAME_FIELDS = {
+    "gameId": KEEP,
+    "gameCreation": KEEP,
+    "gameDuration": KEEP,
+    "queueId": KEEP,
+    "participantIdentities": [{
+        "participantId": KEEP,
+        "player": {"puuid": KEEP, "gameName": KEEP, "tagLine": KEEP, "summonerName": KEEP},
+    }],
+    "participants": [{
+        "participantId": KEEP,
+        "championId": KEEP,
+        "teamId": KEEP,
+        "spell1Id": KEEP,
+        "spell2Id": KEEP,
+        "timeline": {"lane": KEEP, "role": KEEP},
+        "stats": {
+            name: KEEP
+            for name in (
+                "win", "kills", "deaths", "assists", "pentaKills",
+                "totalMinionsKilled", "neutralMinionsKilled", "goldEarned", "visionScore",
+                "totalDamageDealtToChampions", "totalDamageTaken",
+                "item0", "item1", "item2", "item3", "item4", "item5", "item6",
+            )
+        },
+    }],
+    "teams": [TEAM_FIELDS],
+}
+
+
+def loads(body: bytes | str) -> Any:
+    """Parse JSON with orjson when available"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON bytes, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def projector(fields) -> Callable[[Any], Any]:
+    """
+    Function copying a value restricted to `fields`: KEEP, a {key: fields} dict
+    for an object, or a one-element [fields] list applied to every item of an
+    array. Missing keys stay missing. Built once per field spec, so projecting
+    only costs a dict lookup per kept key.
+    """
+    if fields is KEEP:
+        return lambda value: value
+    if isinstance(fields, list):
+        item = projector(fields[0])
+        return lambda value: [item(v) for v in value] if isinstance(value, list) else value
+    if all(sub_fields is KEEP for sub_fields in fields.values()):
+        keys = tuple(fields)
+        return lambda value: {k: value[k] for k in keys if k in value} if isinstance(value, dict) else value
+    children = tuple((key, projector(sub_fields)) for key, sub_fields in fields.items())
+    return lambda value: (
+        {k: child(value[k]) for k, child in children if k in value} if isinstance(value, dict) else value
+    )
+
+
+_project_v5 = projector(V5_FIELDS)
+_project_custom_game = projector(CUSTOM_GAME_FIELDS)
+
+
+def project_match(match_data: dict) -> dict:
+    """Keep only the fields we read from a Match V5 or custom game payload"""
+    if "info" in match_data:
+        return _project_v5(match_data)
+    if "participantIdentities" in match_data:
+        return _project_custom_game(match_data)
+    # Unknown shape: leave it to the reader to reject
+    return match_data
+
+
+def parse_match(body: bytes | str) -> dict:
+    return project_match(loads(body))
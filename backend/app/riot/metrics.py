@@ -0,0 +1,162 @@
+"""Riot API client metrics and tracing hooks.
+
+`RiotAPIClient` records every HTTP attempt here: per-endpoint (Riot method name)
+latency and payload size histograms, and counters of requests per status code,
+retries, and rate-limiter sleeps. `render_prometheus()` serves them, together
+with the response cache, rate limiter and circuit breaker counters, in the
+Prometheus text format on GET /metrics.
+
+`span()` wraps a Riot call in an OpenTelemetry span when the optional
+`opentelemetry-api` package is installed (a no-op otherwise, or when no tracer
+provider is configured).
+"""
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import nullcontext
+
+from app.riot.cache import response_cache
+from app.riot.circuit_breaker import circuit_breaker
+from app.riot.rate_limit import rate_limiter
+
+try:
+    from opentelemetry import trace
+except ImportError:  # Optional tracing
+    trace = None
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)  # bytes
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label value (Prometheus semantics)"""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self._counts: dict[str, list[int]] = defaultdict(lambda: [0] * (len(buckets) + 1))
+        self._sums: dict[str, float] = defaultdict(float)
+
+    def observe(self, label: str, value: float) -> None:
+        self._counts[label][bisect_left(self.buckets, value)] += 1
+        self._sums[label] += value
+
+    def count(self, label: str) -> int:
+        return sum(self._counts.get(label, ()))
+
+    def samples(self, name: str, label_name: str) -> list[str]:
+        lines = []
+        for label in sorted(self._counts):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), self._counts[label]):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label_name}="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{label_name}="{label}"}} {self._sums[label]:g}')
+            lines.append(f'{name}_count{{{label_name}="{label}"}} {cumulative}')
+        return lines
+
+
+class RiotMetrics:
+    """Counters and histograms of Riot API calls, labelled by Riot method name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.requests: dict[tuple[str, str], int] = defaultdict(int)  # (method, status) -> count
+        self.retries: dict[tuple[str, str], int] = defaultdict(int)  # (method, reason) -> count
+        self.rate_limit_sleeps: dict[str, int] = defaultdict(int)
+        self.rate_limit_sleep_seconds: dict[str, float] = defaultdict(float)
+
+    def observe_response(self, method: str, status: int | str, seconds: float, size: int | None = None) -> None:
+        """One HTTP attempt; `status` is the HTTP status code or "error" (no response)"""
+        with self._lock:
+            self.requests[(method, str(status))] += 1
+            self.latency.observe(method, seconds)
+            if size is not None:
+                self.response_bytes.observe(method, size)
+
+    def observe_retry(self, method: str, reason: str) -> None:
+        with self._lock:
+            self.retries[(method, reason)] += 1
+
+    def observe_rate_limit_sleep(self, method: str, seconds: float) -> None:
+        with self._lock:
+            self.rate_limit_sleeps[method] += 1
+            self.rate_limit_sleep_seconds[method] += seconds
+
+    def render(self) -> list[str]:
+        with self._lock:
+            lines = [
+                "# HELP riot_requests_total Riot API HTTP attempts by method and status code",
+                "# TYPE riot_requests_total counter",
+                *(
+                    f'riot_requests_total{{method="{method}",status="{status}"}} {count}'
+                    for (method, status), count in sorted(self.requests.items())
+                ),
+                "# HELP riot_retries_total Riot API attempts retried, by method and reason",
+                "# TYPE riot_retries_total counter",
+                *(
+                    f'riot_retries_total{{method="{method}",reason="{reason}"}} {count}'
+                    for (method, reason), count in sorted(self.retries.items())
+                ),
+                "# HELP riot_rate_limit_sleeps_total Requests that waited for the rate limiter",
+                "# TYPE riot_rate_limit_sleeps_total counter",
+                *(
+                    f'riot_rate_limit_sleeps_total{{method="{method}"}} {count}'
+                    for method, count in sorted(self.rate_limit_sleeps.items())
+                ),
+                "# HELP riot_rate_limit_sleep_seconds_total Time spent waiting for the rate limiter",
+                "# TYPE riot_rate_limit_sleep_seconds_total counter",
+                *(
+                    f'riot_rate_limit_sleep_seconds_total{{method="{method}"}} {seconds:g}'
+                    for method, seconds in sorted(self.rate_limit_sleep_seconds.items())
+                ),
+                "# HELP riot_request_duration_seconds Riot API HTTP attempt latency",
+                "# TYPE riot_request_duration_seconds histogram",
+                *self.latency.samples("riot_request_duration_seconds", "method"),
+                "# HELP riot_response_bytes Riot API response body size",
+                "# TYPE riot_response_bytes histogram",
+                *self.response_bytes.samples("riot_response_bytes", "method"),
+            ]
+        return lines
+
+
+riot_metrics = RiotMetrics()
+
+
+def span(name: str, **attributes):
+    """OpenTelemetry span around a Riot call, or a no-op without opentelemetry-api"""
+    if trace is None:
+        return nullcontext()
+    return trace.get_tracer("app.riot").start_as_current_span(name, attributes=attributes)
+
+
+def _counter(name: str, help_text: str, value: float) -> list[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {value:g}"]
+
+
+def render_prometheus() -> str:
+    """Riot client, cache, rate limiter and circuit breaker metrics in the Prometheus text format"""
+    cache = response_cache.snapshot()
+    circuits = circuit_breaker.snapshot()
+    lines = [
+        *riot_metrics.render(),
+        *_counter("riot_cache_hits_total", "Riot responses served from the in-process cache", cache["hits"]),
+        *_counter("riot_cache_shared_hits_total", "Riot responses served from the shared cache", cache["shared_hits"]),
+        *_counter("riot_cache_misses_total", "Riot cache lookups that called Riot", cache["misses"]),
+        *_counter("riot_cache_coalesced_total", "Riot lookups that waited on an identical call", cache["coalesced"]),
+        *_counter("riot_rate_limited_total", "429 responses received from Riot", rate_limiter.rate_limited),
+        "# HELP riot_cache_entries Entries in the in-process Riot response cache",
+        "# TYPE riot_cache_entries gauge",
+        f"riot_cache_entries {cache['entries']}",
+        *_counter("riot_circuit_opened_total", "Riot circuits opened", circuits["opened"]),
+        *_counter("riot_circuit_rejected_total", "Riot calls failed fast by an open circuit", circuits["rejected"]),
+        "# HELP riot_circuit_open Whether a Riot host's circuit is open (1) or half-open/closed (0)",
+        "# TYPE riot_circuit_open gauge",
+        *(
+            f'riot_circuit_open{{host="{key.split()[0]}",failure_class="{key.split()[1]}"}} '
+            f'{int(circuit["state"] == "open")}'
+            for key, circuit in circuits["circuits"].items()
+        ),
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,193 @@
+"""Proactive Riot API rate limiting.
+
+Riot enforces two layers of limits, both advertised on every response:
+- application limits per routing host (`X-App-Rate-Limit`, e.g. "20:1,100:120"),
+  so `europe.api.riotgames.com` and `euw1.api.riotgames.com` have separate quotas
+- method limits per host and endpoint (`X-Method-Rate-Limit`, e.g. "2000:10")
+
+The matching `*-Count` headers report how much of each window is already used.
+`RateLimiter` keeps one token bucket per window, syncs them from those headers and
+makes callers wait *before* a request would exceed the quota, instead of reacting
+to a 429 after the fact. All `RiotAPIClient` instances share `rate_limiter`.
+"""
+import asyncio
+import time
+from collections import deque
+from collections.abc import Callable
+
+from app.config import settings
+
+
+def parse_rate_limit_header(value: str | None) -> list[tuple[int, int]]:
+    """Parse "20:1,100:120" into [(20, 1), (100, 120)] (count/limit, window seconds)"""
+    if not value:
+        return []
+    pairs = []
+    for part in value.split(","):
+        try:
+            count, window = part.strip().split(":")
+            pairs.append((int(count), int(window)))
+        except ValueError:
+            continue
+    return pairs
+
+
+class TokenBucket:
+    """
+    `limit` requests per `window` seconds.
+
+    A spent token comes back exactly `window` seconds after it was used (sliding
+    window), which is never more permissive than Riot's own fixed windows.
+    """
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self._spent: deque[float] = deque()
+
+    def _expire(self, now: float) -> None:
+        while self._spent and self._spent[0] + self.window <= now:
+            self._spent.popleft()
+
+    def tokens_left(self, now: float) -> int:
+        self._expire(now)
+        return max(0, self.limit - len(self._spent))
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        self._expire(now)
+        if len(self._spent) < self.limit:
+            return 0.0
+        return self._spent[len(self._spent) - self.limit] + self.window - now
+
+    def consume(self, now: float) -> None:
+        self._spent.append(now)
+
+    def sync(self, server_count: int, now: float) -> None:
+        """Account for requests Riot has seen but we haven't (other processes, restarts)"""
+        self._expire(now)
+        missing = server_count - len(self._spent)
+        for _ in range(max(0, missing)):
+            self._spent.append(now)
+
+
+class RateLimiter:
+    """Per-host application buckets plus per-(host, method) method buckets"""
+
+    def __init__(
+        self,
+        default_app_limits: str | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], object] | None = None,
+    ):
+        self._default_app_limits = parse_rate_limit_header(
+            default_app_limits if default_app_limits is not None else settings.riot_app_rate_limit
+        )
+        self._clock = clock
+        self._sleep = sleep
+        self._app: dict[str, list[TokenBucket]] = {}
+        self._method: dict[tuple[str, str], list[TokenBucket]] = {}
+        self._blocked_until: dict[str, float] = {}  # host -> Retry-After deadline
+
+        # Counters
+        self.requests = 0
+        self.waits = 0  # Requests that had to wait = 429s avoided
+        self.wait_seconds = 0.0
+        self.rate_limited = 0  # 429s actually received
+
+    def _app_buckets(self, host: str) -> list[TokenBucket]:
+        if host not in self._app:
+            self._app[host] = [TokenBucket(limit, window) for limit, window in self._default_app_limits]
+        return self._app[host]
+
+    def _buckets(self, host: str, method: str) -> list[TokenBucket]:
+        return self._app_buckets(host) + self._method.get((host, method), [])
+
+    def wait_time(self, host: str, method: str) -> float:
+        now = self._clock()
+        wait = max((b.wait_time(now) for b in self._buckets(host, method)), default=0.0)
+        return max(wait, self._blocked_until.get(host, 0.0) - now)
+
+    async def acquire(self, host: str, method: str) -> float:
+        """
+        Wait until every bucket for this host/method has a token, then spend one
+        each. Returns the seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            wait = self.wait_time(host, method)
+            if wait <= 0:
+                break
+            if not waited:
+                self.waits += 1
+            waited += wait
+            self.wait_seconds += wait
+            sleep = self._sleep or asyncio.sleep
+            await sleep(wait)
+
+        now = self._clock()
+        for bucket in self._buckets(host, method):
+            bucket.consume(now)
+        self.requests += 1
+        return waited
+
+    @staticmethod
+    def _rebuild(
+        current: list[TokenBucket], limits: list[tuple[int, int]]
+    ) -> list[TokenBucket]:
+        """Keep existing buckets whose definition didn't change"""
+        existing = {(b.limit, b.window): b for b in current}
+        return [existing.get((limit, window)) or TokenBucket(limit, window) for limit, window in limits]
+
+    def update(self, host: str, method: str, headers) -> None:
+        """Sync buckets from the X-*-Rate-Limit(-Count) headers of a Riot response"""
+        now = self._clock()
+
+        app_limits = parse_rate_limit_header(headers.get("X-App-Rate-Limit"))
+        if app_limits:
+            self._app[host] = self._rebuild(self._app_buckets(host), app_limits)
+        method_limits = parse_rate_limit_header(headers.get("X-Method-Rate-Limit"))
+        if method_limits:
+            self._method[(host, method)] = self._rebuild(
+                self._method.get((host, method), []), method_limits
+            )
+
+        for header, buckets in (
+            ("X-App-Rate-Limit-Count", self._app.get(host, [])),
+            ("X-Method-Rate-Limit-Count", self._method.get((host, method), [])),
+        ):
+            counts = {window: count for count, window in parse_rate_limit_header(headers.get(header))}
+            for bucket in buckets:
+                if bucket.window in counts:
+                    bucket.sync(counts[bucket.window], now)
+
+    def penalize(self, host: str, retry_after: float) -> None:
+        """A 429 slipped through: block the whole host until Retry-After elapses"""
+        self.rate_limited += 1
+        deadline = self._clock() + retry_after
+        self._blocked_until[host] = max(self._blocked_until.get(host, 0.0), deadline)
+
+    def snapshot(self) -> dict:
+        """Counters and remaining tokens, for monitoring"""
+        now = self._clock()
+
+        def describe(buckets: list[TokenBucket]) -> list[dict]:
+            return [
+                {"limit": b.limit, "window": b.window, "tokens_left": b.tokens_left(now)}
+                for b in buckets
+            ]
+
+        return {
+            "requests": self.requests,
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "rate_limited": self.rate_limited,
+            "app": {host: describe(buckets) for host, buckets in self._app.items()},
+            "methods": {
+                f"{host} {method}": describe(buckets)
+                for (host, method), buckets in self._method.items()
+            },
+        }
+
+
+rate_limiter = RateLimiter()
@@ -6,6 +6,9 @@ from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.database import get_db
+from app.riot.cache import response_cache
+from app.riot.circuit_breaker import circuit_breaker
+from app.riot.rate_limit import rate_limiter
 from app.schemas.admin import (
     AdminDashboard,
     AdminLoginRequest,
@@ -82,6 +85,10 @@ async def create_team(
     """Create a new team"""
     if not admin_service.check_access_code_available(db, team_data.access_code):
         raise HTTPException(status_code=400, detail="Access code already in use")
+    if not admin_service.is_valid_timezone(team_data.timezone):
+        raise HTTPException(status_code=400, detail="Unknown timezone")
+    if not admin_service.is_valid_queue_set(team_data.allowed_queues):
+        raise HTTPException(status_code=400, detail="Unknown or empty queue list")
 
     team = admin_service.create_team(db, team_data)
     return TeamStats(
@@ -103,10 +110,14 @@ async def update_team(
     db: Session = Depends(get_db),
     _: dict = Depends(get_admin_token),
 ):
-    """Update a team's name or access code"""
+    """Update a team's name, access code, timezone or allowed queues"""
     if team_data.access_code:
         if not admin_service.check_access_code_available(db, team_data.access_code, team_id):
             raise HTTPException(status_code=400, detail="Access code already in use")
+    if team_data.timezone is not None and not admin_service.is_valid_timezone(team_data.timezone):
+        raise HTTPException(status_code=400, detail="Unknown timezone")
+    if team_data.allowed_queues is not None and not admin_service.is_valid_queue_set(team_data.allowed_queues):
+        raise HTTPException(status_code=400, detail="Unknown or empty queue list")
 
     team = admin_service.update_team(db, team_id, team_data)
     if not team:
@@ -149,3 +160,21 @@ async def delete_coach(
     if not admin_service.delete_coach(db, coach_id):
         raise HTTPException(status_code=404, detail="Coach not found")
     return {"message": "Coach deleted successfully"}
+
+
+@router.get("/riot/rate-limits")
+async def get_riot_rate_limits(_: dict = Depends(get_admin_token)):
+    """Riot API rate limiter counters and remaining tokens per bucket"""
+    return rate_limiter.snapshot()
+
+
+@router.get("/riot/cache")
+async def get_riot_cache_stats(_: dict = Depends(get_admin_token)):
+    """Riot API response cache hit/miss/eviction counters"""
+    return response_cache.snapshot()
+
+
+@router.get("/riot/circuits")
+async def get_riot_circuits(_: dict = Depends(get_admin_token)):
+    """Riot API circuit breaker state per host and failure class"""
+    return circuit_breaker.snapshot()
@@ -6,9 +6,11 @@ from app.deps import TeamContext, get_current_team
 from app.models.game import Game
 from app.models.player import Player
 from app.models.riot_account import RiotAccount
-from app.riot.client import RiotAPIClient
+from app.riot.circuit_breaker import RiotUnavailableError
+from app.riot.client import RiotAPIClient, keep_raw_match_bodies
 from app.schemas.game import GameTagUpdate, GameResponse, MatchDetailResponse
 from app.services.match_import_service import build_match_detail_response
+from app.services.match_payload_service import get_match_payload, store_match_payload
 
 router = APIRouter(prefix="/api/v1/games", tags=["games"])
 riot_client = RiotAPIClient()
@@ -71,7 +73,7 @@ async def get_game_details(
     db: Session = Depends(get_db),
     team_ctx: TeamContext = Depends(get_current_team),
 ):
-    """Get full match details from Riot API"""
+    """Get full match details (stored payload, Riot API as a fallback)"""
     # Verify game belongs to team
     game = (
         db.query(Game)
@@ -105,12 +107,20 @@ async def get_game_details(
         for acc in team_accounts
     }
 
-    # Fetch full match details from Riot API
-    try:
-        match_data = await riot_client.get_match_details(game.match_id)
-    except Exception as e:
-        raise HTTPException(
-            status_code=502, detail=f"Failed to fetch match from Riot API: {str(e)}"
-        )
+    # Serve the payload stored at ingestion; only games ingested before the
+    # payload store existed fall back to Riot (once - the payload is then kept)
+    match_data = get_match_payload(db, game.match_id)
+    if match_data is None:
+        try:
+            with keep_raw_match_bodies() as raw_bodies:
+                match_data = await riot_client.get_match_details(game.match_id)
+        except RiotUnavailableError:
+            raise  # 503 (see app.main)
+        except Exception as e:
+            raise HTTPException(
+                status_code=502, detail=f"Failed to fetch match from Riot API: {str(e)}"
+            )
+        store_match_payload(db, game.match_id, raw_bodies.get(game.match_id, match_data))
+        db.commit()
 
     return build_match_detail_response(match_data, game.match_id, team_puuids, puuid_to_rank)
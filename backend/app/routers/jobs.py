@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.deps import TeamContext, get_current_team
+from app.schemas.job import RefreshJobResponse
+from app.services.job_service import job_queue
+
+router = APIRouter(prefix="/api/v1/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=RefreshJobResponse)
+async def get_job(
+    job_id: str,
+    team_ctx: TeamContext = Depends(get_current_team),
+):
+    """Get progress of a background refresh job"""
+    job = job_queue.get(job_id)
+    if not job or job.team_id != team_ctx.team_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -4,12 +4,13 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.deps import TeamContext, get_current_team
+from app.models.champion_rollup import ChampionRollup
 from app.models.game import Game
 from app.models.player import Player
 from app.models.rank_history import RankHistory
 from app.models.riot_account import RiotAccount
 from app.schemas.riot_account import RiotAccountCreate, RiotAccountResponse
-from app.services import riot_account_service
+from app.services import game_cache, riot_account_service
 
 router = APIRouter(prefix="/api/v1", tags=["riot_accounts"])
 
@@ -52,8 +53,11 @@ async def delete_riot_account(
     if not account:
         raise HTTPException(status_code=404, detail="Riot account not found")
 
-    # Delete associated games
+    # Delete associated games (a bulk delete: the Game listeners don't see it)
     db.query(Game).filter(Game.riot_account_id == account_id).delete()
+    game_cache.mark_changed(db, [account_id])
+    # ... nor the rollup listeners: drop the rollups of those games too
+    db.query(ChampionRollup).filter(ChampionRollup.riot_account_id == account_id).delete()
 
     # Delete associated rank history
     db.query(RankHistory).filter(RankHistory.riot_account_id == account_id).delete()
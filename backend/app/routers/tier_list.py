@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
 from app.database import get_db
@@ -27,17 +27,34 @@ def verify_player_team(db: Session, player_id: int, team_id: int) -> Player:
     return player
 
 
-@router.get("/player/{player_id}", response_model=PlayerTierList)
+@router.get(
+    "/player/{player_id}",
+    response_model=PlayerTierList,
+    responses={304: {"description": "Tier list unchanged since the ETag sent in If-None-Match"}},
+)
 async def get_player_tier_list(
     player_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     team_ctx: TeamContext = Depends(get_current_team),
 ):
-    """Get complete tier list for a player with stats and scores"""
+    """
+    Get complete tier list for a player with stats and scores.
+    Send the last ETag back in If-None-Match to get 304 Not Modified while
+    neither the player's games nor tiers changed.
+    """
     verify_player_team(db, player_id, team_ctx.team_id)
+    etag = tier_list_service.tier_list_etag(db, player_id)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    sent = [tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")]
+    if etag in sent:
+        return Response(status_code=304, headers=headers)
+
     tier_list = tier_list_service.get_player_tier_list(db, player_id)
     if not tier_list:
         raise HTTPException(status_code=404, detail="Player not found")
+    response.headers.update(headers)
     return tier_list
 
 
@@ -52,6 +69,15 @@ async def get_player_champion_stats(
     return tier_list_service.get_player_champion_stats(db, player_id)
 
 
+@router.get("/team/champions", response_model=dict[int, list[ChampionStatsWithScore]])
+async def get_team_champion_stats(
+    db: Session = Depends(get_db),
+    team_ctx: TeamContext = Depends(get_current_team),
+):
+    """Get champion stats with scores for every player of the team, keyed by player id"""
+    return tier_list_service.get_team_champion_stats(db, team_ctx.team_id)
+
+
 @router.post("/player/{player_id}/champion/{champion_id}", response_model=ChampionTierResponse)
 async def set_champion_tier(
     player_id: int,
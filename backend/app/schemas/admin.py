@@ -15,11 +15,15 @@ class AdminLoginResponse(BaseModel):
 class TeamCreate(BaseModel):
     name: str
     access_code: str
+    timezone: str = "Europe/Paris"
+    allowed_queues: list[int] = [420]
 
 
 class TeamUpdate(BaseModel):
     name: str | None = None
     access_code: str | None = None
+    timezone: str | None = None
+    allowed_queues: list[int] | None = None
 
 
 class TeamStats(BaseModel):
@@ -59,6 +63,8 @@ class TeamDetails(BaseModel):
     id: int
     name: str
     access_code: str
+    timezone: str = "Europe/Paris"
+    allowed_queues: list[int] = [420]
     created_at: datetime
     players: list[PlayerSummary]
     coaches: list[CoachSummary]
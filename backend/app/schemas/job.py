@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class RefreshJobError(BaseModel):
+    account: str
+    error: str
+
+
+class RefreshJobResult(BaseModel):
+    account: str
+    status: str  # success/failed
+    new_games: int | None = None
+    matches_downloaded: int | None = None
+    riot_calls_saved: int | None = None  # Match downloads skipped (rejected before or already stored)
+    error: str | None = None
+
+
+class RefreshJobResponse(BaseModel):
+    """Progress of a background Riot refresh (or backfill) job"""
+
+    id: str
+    kind: str = "refresh"  # refresh/backfill
+    status: str  # queued/running/succeeded/partial/failed
+    accounts_total: int
+    accounts_done: int
+    matches_fetched: int
+    refreshed: int
+    failed: int
+    errors: list[RefreshJobError]
+    results: list[RefreshJobResult]
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class RefreshJobQueued(BaseModel):
+    """Returned by the refresh endpoints: the job to poll"""
+
+    message: str
+    job_id: str
+    status: str
@@ -0,0 +1,149 @@
+"""Stored activity grids of closed weeks (`activity_snapshots`).
+
+A week that has ended in the team's timezone only changes when a game inside it is
+stored late, retagged or deleted, so its TeamActivityResponse is serialized once
+(lazily on first access, or by the refresher when the week closes) and served from
+here afterwards. Snapshots are dropped when a game in their window changes:
+- bulk ingestion (Core inserts) calls `invalidate_for_games` explicitly
+- ORM inserts, updates (e.g. PATCH /games/{id}/tag) and deletes of a Game go
+  through the mapper event listeners below
+and all of a team's snapshots are dropped when its week bounds or roster change:
+- `admin_service.update_team` calls `invalidate_team` on a timezone change
+- players and riot accounts added, removed, renamed or made main go through the
+  mapper event listeners below
+"""
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, event, inspect, or_, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.database import dialect_insert
+from app.models.activity_snapshot import ActivitySnapshot
+from app.models.game import Game
+from app.models.player import Player
+from app.models.riot_account import RiotAccount
+
+# Game attributes shown in the activity grid
+GRID_ATTRIBUTES = ("riot_account_id", "game_type", "game_date", "game_duration", "champion_id", "stats")
+# Roster attributes the grid is built from
+PLAYER_ATTRIBUTES = ("team_id", "summoner_name", "role")
+ACCOUNT_ATTRIBUTES = ("player_id", "is_main")
+
+
+def get_snapshot(db: Session, team_id: int, week_start: date) -> dict | None:
+    row = db.get(ActivitySnapshot, (team_id, week_start))
+    return row.payload if row else None
+
+
+def save_snapshot(db: Session, team_id: int, week_start: date, payload: dict) -> None:
+    """Store a week's payload and commit; a snapshot written concurrently wins"""
+    insert = dialect_insert(db.get_bind().dialect.name)
+    db.execute(
+        insert(ActivitySnapshot)
+        .values(team_id=team_id, week_start=week_start, payload=payload, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=["team_id", "week_start"])
+    )
+    db.commit()
+
+
+def invalidate_team(db: Session | Connection, team_id: int) -> None:
+    """Drop every snapshot of a team (no commit)"""
+    db.execute(delete(ActivitySnapshot).where(ActivitySnapshot.team_id == team_id))
+
+
+def _invalidate_players_teams(connection: Connection, player_ids: Iterable[int]) -> None:
+    team_ids = select(Player.team_id).where(Player.id.in_(set(player_ids)))
+    connection.execute(delete(ActivitySnapshot).where(ActivitySnapshot.team_id.in_(team_ids)))
+
+
+def invalidate_for_games(db: Session | Connection, games: Iterable[tuple[int, datetime]]) -> None:
+    """
+    Drop snapshots of every week that may contain one of the (riot_account_id,
+    game_date) pairs, for the teams owning those accounts (no commit).
+
+    Week bounds depend on each team's timezone, so any week starting within a day
+    of the game's UTC week is dropped (at most two weeks per game).
+    """
+    games = list(games)
+    if not games:
+        return
+    account_ids = {account_id for account_id, _ in games}
+    days = {game_date.date() for _, game_date in games}
+    team_ids = (
+        select(Player.team_id)
+        .join(RiotAccount, RiotAccount.player_id == Player.id)
+        .where(RiotAccount.id.in_(account_ids))
+    )
+    db.execute(
+        delete(ActivitySnapshot).where(
+            ActivitySnapshot.team_id.in_(team_ids),
+            or_(*[
+                ActivitySnapshot.week_start.between(day - timedelta(days=7), day + timedelta(days=1))
+                for day in days
+            ]),
+        )
+    )
+
+
+def _load_old_value(game, value, oldvalue, initiator):
+    return value
+
+
+# Keep the replaced date in the attribute history even if it was expired, so a
+# rescheduled game also invalidates the week it left
+event.listen(Game.game_date, "set", _load_old_value, active_history=True, retval=True)
+
+
+@event.listens_for(Game, "after_insert")
+@event.listens_for(Game, "after_delete")
+def _on_game_insert_or_delete(mapper, connection, game):
+    invalidate_for_games(connection, [(game.riot_account_id, game.game_date)])
+
+
+@event.listens_for(Game, "after_update")
+def _on_game_update(mapper, connection, game):
+    state = inspect(game)
+    if not any(state.attrs[name].history.has_changes() for name in GRID_ATTRIBUTES):
+        return
+    affected = [(game.riot_account_id, game.game_date)]
+    # A game moved to another account or date also leaves its old week
+    old_account = state.attrs.riot_account_id.history.deleted
+    old_date = state.attrs.game_date.history.deleted
+    if old_account or old_date:
+        affected.append((
+            old_account[0] if old_account else game.riot_account_id,
+            old_date[0] if old_date else game.game_date,
+        ))
+    invalidate_for_games(connection, affected)
+
+
+@event.listens_for(Player, "after_insert")
+@event.listens_for(Player, "after_delete")
+def _on_player_insert_or_delete(mapper, connection, player):
+    invalidate_team(connection, player.team_id)
+
+
+@event.listens_for(Player, "after_update")
+def _on_player_update(mapper, connection, player):
+    state = inspect(player)
+    if not any(state.attrs[name].history.has_changes() for name in PLAYER_ATTRIBUTES):
+        return
+    # A player moved to another team also leaves its old team's grid
+    for team_id in {player.team_id, *state.attrs.team_id.history.deleted}:
+        invalidate_team(connection, team_id)
+
+
+@event.listens_for(RiotAccount, "after_insert")
+@event.listens_for(RiotAccount, "after_delete")
+def _on_account_insert_or_delete(mapper, connection, account):
+    _invalidate_players_teams(connection, [account.player_id])
+
+
+@event.listens_for(RiotAccount, "after_update")
+def _on_account_update(mapper, connection, account):
+    state = inspect(account)
+    if not any(state.attrs[name].history.has_changes() for name in ACCOUNT_ATTRIBUTES):
+        return
+    _invalidate_players_teams(connection, [account.player_id, *state.attrs.player_id.history.deleted])
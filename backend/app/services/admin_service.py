@@ -1,3 +1,5 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
@@ -5,6 +7,7 @@ from app.models.coach import Coach
 from app.models.draft import DraftSeries
 from app.models.calendar import CalendarEvent
 from app.models.player import Player
+from app.models.riot_account import RiotAccount
 from app.models.team import Team
 from app.schemas.admin import (
     AdminDashboard,
@@ -15,6 +18,9 @@ from app.schemas.admin import (
     TeamStats,
     TeamUpdate,
 )
+from app.services import activity_snapshot_service
+from app.services.match_import_service import QUEUE_NAMES
+from app.services.rejected_match_service import clear_queue_rejections
 
 
 def get_dashboard(db: Session) -> AdminDashboard:
@@ -86,6 +92,8 @@ def get_team_details(db: Session, team_id: int) -> TeamDetails | None:
         id=team.id,
         name=team.name,
         access_code=team.access_code,
+        timezone=team.timezone,
+        allowed_queues=team.allowed_queues,
         created_at=team.created_at,
         players=player_summaries,
         coaches=coach_summaries,
@@ -97,6 +105,8 @@ def create_team(db: Session, team_data: TeamCreate) -> Team:
     team = Team(
         name=team_data.name,
         access_code=team_data.access_code,
+        timezone=team_data.timezone,
+        allowed_queues=sorted(set(team_data.allowed_queues)),
     )
     db.add(team)
     db.commit()
@@ -105,7 +115,7 @@ def create_team(db: Session, team_data: TeamCreate) -> Team:
 
 
 def update_team(db: Session, team_id: int, team_data: TeamUpdate) -> Team | None:
-    """Update a team's name or access code"""
+    """Update a team's name, access code, timezone or allowed queues"""
     team = db.query(Team).filter(Team.id == team_id).first()
     if not team:
         return None
@@ -114,6 +124,30 @@ def update_team(db: Session, team_id: int, team_data: TeamUpdate) -> Team | None
         team.name = team_data.name
     if team_data.access_code is not None:
         team.access_code = team_data.access_code
+    if team_data.timezone is not None and team_data.timezone != team.timezone:
+        team.timezone = team_data.timezone
+        # Stored weeks were cut at the old timezone's midnights
+        activity_snapshot_service.invalidate_team(db, team_id)
+    if team_data.allowed_queues is not None:
+        allowed_queues = sorted(set(team_data.allowed_queues))
+        if allowed_queues != sorted(team.allowed_queues):
+            team.allowed_queues = allowed_queues
+            # Games of newly allowed queues were never listed: crawl the season again
+            account_ids = (
+                db.query(RiotAccount.id)
+                .join(Player, RiotAccount.player_id == Player.id)
+                .filter(Player.team_id == team_id)
+            )
+            db.query(RiotAccount).filter(RiotAccount.id.in_(account_ids)).update(
+                {
+                    RiotAccount.backfill_until: None,
+                    RiotAccount.backfill_listing: 0,
+                    RiotAccount.backfill_offset: 0,
+                    RiotAccount.backfill_completed_at: None,
+                },
+                synchronize_session=False,
+            )
+            clear_queue_rejections(db, team_id)
 
     db.commit()
     db.refresh(team)
@@ -159,3 +193,17 @@ def check_access_code_available(db: Session, access_code: str, exclude_team_id:
     if exclude_team_id:
         query = query.filter(Team.id != exclude_team_id)
     return query.first() is None
+
+
+def is_valid_queue_set(queues: list[int]) -> bool:
+    """Check that allowed queues are non-empty and all known (see match_import_service.QUEUE_NAMES)"""
+    return bool(queues) and all(queue in QUEUE_NAMES for queue in queues)
+
+
+def is_valid_timezone(name: str) -> bool:
+    """Check that a team timezone is a known IANA zone name"""
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
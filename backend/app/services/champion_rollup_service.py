@@ -0,0 +1,206 @@
+"""Per-account, per-champion rollups of games (`champion_rollups`).
+
+Champion tables and player averages read these running sums instead of every
+game, so reads are O(champions) rather than O(games). They are kept up to date
+in the same transaction as the games they summarize:
+- bulk ingestion (Core inserts) calls `apply_games` explicitly
+- ORM inserts, deletes and updates of a Game (e.g. PATCH /games/{id}/tag moving a
+  game from soloq to competitive) go through the mapper event listeners below
+- deleting a riot account (a bulk delete of its games) deletes its rollups too
+
+Rebuild from `games` after a backfill or to repair drift:
+    python -m app.services.champion_rollup_service              # every account
+    python -m app.services.champion_rollup_service --account 12
+"""
+import argparse
+from collections.abc import Iterable
+
+from sqlalchemy import and_, case, delete, event, func, inspect, or_, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, dialect_insert
+from app.models.champion_rollup import ChampionRollup
+from app.models.game import Game
+
+KEY_COLUMNS = ("riot_account_id", "champion_id", "game_type")
+SUM_COLUMNS = (
+    "games", "wins", "kills", "deaths", "assists",
+    "sum_kda", "sum_cs_per_min", "sum_gold_per_min", "sum_vision_per_min", "sum_kp",
+    "damage", "duration",
+)
+# Game attributes a rollup depends on (changing one moves the game's contribution)
+GAME_ATTRIBUTES = (
+    *KEY_COLUMNS, "kills", "deaths", "assists", "kda", "cs_per_min", "gold_per_min",
+    "vision_per_min", "kp", "win", "stats", "game_duration",
+)
+
+
+def _contribution(game: dict) -> dict:
+    """What one game adds to its rollup row"""
+    return {
+        "games": 1,
+        "wins": 1 if game.get("win") else 0,
+        "kills": game.get("kills") or 0,
+        "deaths": game.get("deaths") or 0,
+        "assists": game.get("assists") or 0,
+        "sum_kda": game.get("kda") or 0.0,
+        "sum_cs_per_min": game.get("cs_per_min") or 0.0,
+        "sum_gold_per_min": game.get("gold_per_min") or 0.0,
+        "sum_vision_per_min": game.get("vision_per_min") or 0.0,
+        "sum_kp": game.get("kp") or 0.0,
+        "damage": (game.get("stats") or {}).get("damage_dealt", 0) or 0.0,
+        "duration": game.get("game_duration") or 0,
+    }
+
+
+def apply_games(db: Session | Connection, games: Iterable[dict], sign: int = 1) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) games from their rollups, without committing.
+
+    `games` are column dicts as passed to a `games` insert. Rows left with no games
+    are deleted.
+    """
+    deltas: dict[tuple, dict] = {}
+    for game in games:
+        key = tuple(game[column] for column in KEY_COLUMNS)
+        totals = deltas.setdefault(key, dict.fromkeys(SUM_COLUMNS, 0))
+        for column, value in _contribution(game).items():
+            totals[column] += sign * value
+    if not deltas:
+        return
+
+    bind = db.get_bind() if isinstance(db, Session) else db
+    insert = dialect_insert(bind.dialect.name)
+    rows = [dict(zip(KEY_COLUMNS, key), **totals) for key, totals in deltas.items()]
+    stmt = insert(ChampionRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={
+            **{column: getattr(ChampionRollup, column) + getattr(stmt.excluded, column) for column in SUM_COLUMNS},
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+    if sign < 0:
+        db.execute(
+            delete(ChampionRollup).where(
+                ChampionRollup.games <= 0,
+                or_(*[
+                    and_(*[getattr(ChampionRollup, column) == value for column, value in zip(KEY_COLUMNS, key)])
+                    for key in deltas
+                ]),
+            )
+        )
+
+
+def _game_values(game: Game, old: bool = False) -> dict:
+    """Column dict of an ORM game; with old=True, its values before pending changes"""
+    values = {}
+    state = inspect(game)
+    for name in GAME_ATTRIBUTES:
+        value = getattr(game, name)
+        if old:
+            history = state.attrs[name].history
+            if history.deleted:
+                value = history.deleted[0]
+        values[name] = value
+    return values
+
+
+def _load_old_value(game, value, oldvalue, initiator):
+    return value
+
+
+# Make attribute history keep the replaced value even when the attribute was
+# expired (e.g. after a commit), so updates can subtract the old contribution
+for _name in GAME_ATTRIBUTES:
+    event.listen(getattr(Game, _name), "set", _load_old_value, active_history=True, retval=True)
+
+
+@event.listens_for(Game, "after_insert")
+def _on_game_insert(mapper, connection, game):
+    apply_games(connection, [_game_values(game)])
+
+
+@event.listens_for(Game, "after_delete")
+def _on_game_delete(mapper, connection, game):
+    apply_games(connection, [_game_values(game, old=True)], sign=-1)
+
+
+@event.listens_for(Game, "after_update")
+def _on_game_update(mapper, connection, game):
+    state = inspect(game)
+    if not any(state.attrs[name].history.has_changes() for name in GAME_ATTRIBUTES):
+        return
+    apply_games(connection, [_game_values(game, old=True)], sign=-1)
+    apply_games(connection, [_game_values(game)])
+
+
+def champion_totals(db: Session, riot_account_ids: list[int]) -> list:
+    """Rollups summed per champion over the given accounts and every game type"""
+    if not riot_account_ids:
+        return []
+    return (
+        db.query(
+            ChampionRollup.champion_id,
+            *[func.sum(getattr(ChampionRollup, column)).label(column) for column in SUM_COLUMNS],
+        )
+        .filter(ChampionRollup.riot_account_id.in_(riot_account_ids))
+        .group_by(ChampionRollup.champion_id)
+        .all()
+    )
+
+
+def rebuild_rollups(db: Session, riot_account_ids: list[int] | None = None) -> int:
+    """Recompute rollups from `games` (all accounts, or the given ones); returns rows written"""
+    clear = delete(ChampionRollup)
+    games_filter = []
+    if riot_account_ids is not None:
+        clear = clear.where(ChampionRollup.riot_account_id.in_(riot_account_ids))
+        games_filter.append(Game.riot_account_id.in_(riot_account_ids))
+    db.execute(clear)
+
+    aggregate = (
+        select(
+            Game.riot_account_id,
+            Game.champion_id,
+            Game.game_type,
+            func.count(Game.id),
+            func.sum(case((Game.win, 1), else_=0)),
+            func.coalesce(func.sum(Game.kills), 0),
+            func.coalesce(func.sum(Game.deaths), 0),
+            func.coalesce(func.sum(Game.assists), 0),
+            func.coalesce(func.sum(Game.kda), 0.0),
+            func.coalesce(func.sum(Game.cs_per_min), 0.0),
+            func.coalesce(func.sum(Game.gold_per_min), 0.0),
+            func.coalesce(func.sum(Game.vision_per_min), 0.0),
+            func.coalesce(func.sum(Game.kp), 0.0),
+            func.coalesce(func.sum(Game.stats["damage_dealt"].as_float()), 0.0),
+            func.coalesce(func.sum(Game.game_duration), 0),
+        )
+        .where(*games_filter)
+        .group_by(Game.riot_account_id, Game.champion_id, Game.game_type)
+    )
+    result = db.execute(
+        ChampionRollup.__table__.insert().from_select([*KEY_COLUMNS, *SUM_COLUMNS], aggregate)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def main(riot_account_ids: list[int] | None = None) -> None:
+    session = SessionLocal()
+    try:
+        written = rebuild_rollups(session, riot_account_ids)
+        print(f"Rebuilt {written} champion rollup row(s)")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild champion rollups from stored games")
+    parser.add_argument("--account", type=int, action="append", help="Only this riot account id (repeatable)")
+    args = parser.parse_args()
+    main(args.account)
@@ -0,0 +1,132 @@
+"""In-process caches of results derived from a set of riot accounts' games.
+
+Team highlights (GET /stats/team/highlights) and champion performance scores
+(tier lists) only change when one of the games they summarize is stored,
+retagged or deleted. Each entry remembers the riot accounts it covers and is
+kept for its cache's TTL, or dropped as soon as a game of one of those accounts
+changes:
+- bulk writes (ingestion's Core inserts, the bulk delete of a removed riot
+  account's games) report the accounts they wrote with `mark_changed`
+- ORM inserts, updates and deletes of a Game are reported by the mapper event
+  listeners below
+Either way the entries are dropped once the session commits, not before: a read
+in between would otherwise cache the old games again.
+
+The TTL bounds staleness for changes made by another process.
+"""
+import time
+from collections.abc import Callable, Hashable, Iterable
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.config import settings
+from app.models.game import Game
+
+# Game attributes the cached results depend on
+CACHED_ATTRIBUTES = (
+    "riot_account_id", "game_type", "game_date", "champion_id", "win", "stats", "is_pentakill",
+    "kills", "deaths", "assists", "kda", "cs_per_min", "gold_per_min", "vision_per_min", "kp",
+    "game_duration",
+)
+# Session.info key holding the accounts whose games changed in the current transaction
+_PENDING_KEY = "game_cache_changed_accounts"
+
+_caches: list["GameDerivedCache"] = []
+
+
+class GameDerivedCache:
+    """Key -> value cache whose entries are dropped when their accounts' games change"""
+
+    def __init__(self, ttl: Callable[[], float], clock: Callable[[], float] = time.monotonic):
+        self._ttl = ttl
+        self._clock = clock
+        # key -> (expires_at, riot account ids covered, value)
+        self._entries: dict[Hashable, tuple[float, frozenset[int], object]] = {}
+        _caches.append(self)
+
+    def get(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, riot_account_ids: Iterable[int], value) -> None:
+        ttl = self._ttl()
+        if ttl <= 0:
+            return
+        self._entries[key] = (self._clock() + ttl, frozenset(riot_account_ids), value)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def invalidate_accounts(self, riot_account_ids: Iterable[int]) -> None:
+        """Drop every entry covering one of these accounts"""
+        changed = set(riot_account_ids)
+        if not changed:
+            return
+        for key in [k for k, (_, accounts, _) in self._entries.items() if accounts & changed]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Per team id
+highlights_cache = GameDerivedCache(lambda: settings.team_highlights_cache_ttl)
+# Per (player id, role): scored champion stats without tier assignments
+champion_scores_cache = GameDerivedCache(lambda: settings.champion_scores_cache_ttl)
+
+
+def invalidate_accounts(riot_account_ids: Iterable[int]) -> None:
+    """Drop everything derived from these accounts' games, in every cache"""
+    riot_account_ids = set(riot_account_ids)
+    for cache in _caches:
+        cache.invalidate_accounts(riot_account_ids)
+
+
+def clear_all() -> None:
+    for cache in _caches:
+        cache.clear()
+
+
+def mark_changed(session: Session, riot_account_ids: Iterable[int | None]) -> None:
+    """Invalidate these accounts' cached results when `session` commits"""
+    session.info.setdefault(_PENDING_KEY, set()).update(i for i in riot_account_ids if i is not None)
+
+
+def _mark_changed(game: Game, *riot_account_ids: int | None) -> None:
+    session = object_session(game)
+    if session is not None:
+        mark_changed(session, riot_account_ids)
+
+
+@event.listens_for(Game, "after_insert")
+@event.listens_for(Game, "after_delete")
+def _on_game_insert_or_delete(mapper, connection, game):
+    _mark_changed(game, game.riot_account_id)
+
+
+@event.listens_for(Game, "after_update")
+def _on_game_update(mapper, connection, game):
+    state = inspect(game)
+    if not any(state.attrs[name].history.has_changes() for name in CACHED_ATTRIBUTES):
+        return
+    # A game moved to another account also leaves its old account's results
+    _mark_changed(game, game.riot_account_id, *state.attrs.riot_account_id.history.deleted)
+
+
+@event.listens_for(Session, "after_commit")
+def _on_commit(session):
+    changed = session.info.pop(_PENDING_KEY, None)
+    if changed:
+        invalidate_accounts(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _on_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
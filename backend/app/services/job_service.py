@@ -0,0 +1,289 @@
+"""Background job queue for Riot refreshes.
+
+Refresh and backfill endpoints enqueue a job and return its id immediately; an
+in-process pool of `job_workers` asyncio workers runs the jobs through
+`stats_service.refresh_accounts`. Progress is readable at GET /api/v1/jobs/{id}.
+A job for an account that already has a queued or running job of the same kind
+is coalesced into the in-flight job instead of starting a second one.
+
+With `job_queue_persistent` enabled, job state is mirrored to the `refresh_jobs`
+table so it survives restarts: jobs left queued/running are re-enqueued on startup.
+"""
+import asyncio
+import logging
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.refresh_job import RefreshJob
+from app.models.riot_account import RiotAccount
+from app.services import stats_service
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("succeeded", "partial", "failed")
+
+
+@dataclass
+class Job:
+    id: str
+    team_id: int
+    riot_account_ids: list[int]
+    kind: str = "refresh"  # refresh/backfill
+    status: str = "queued"
+    accounts_done: int = 0
+    matches_fetched: int = 0
+    results: list[dict] = field(default_factory=list)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    @property
+    def accounts_total(self) -> int:
+        return len(self.riot_account_ids)
+
+    @property
+    def refreshed(self) -> int:
+        return sum(1 for r in self.results if r["status"] == "success")
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for r in self.results if r["status"] == "failed")
+
+    @property
+    def errors(self) -> list[dict]:
+        return [{"account": r["account"], "error": r["error"]} for r in self.results if r["status"] == "failed"]
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+
+class JobQueue:
+    def __init__(
+        self,
+        workers: int | None = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        persistent: bool | None = None,
+    ):
+        self.workers = workers or settings.job_workers
+        self.persistent = settings.job_queue_persistent if persistent is None else persistent
+        self._session_factory = session_factory
+        self._jobs: dict[str, Job] = {}
+        self._inflight: dict[tuple[str, int], str] = {}  # (kind, riot_account_id) -> job id
+        self._queue: asyncio.Queue | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._worker_tasks: list[asyncio.Task] = []
+
+    # --- Lifecycle ---
+
+    def _ensure_workers(self) -> None:
+        """Start the worker pool on the running loop (restarted if the loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        # Jobs queued on a previous loop never ran: queue them again
+        for job in self._jobs.values():
+            if not job.is_finished:
+                job.status = "queued"
+                self._queue.put_nowait(job)
+
+    async def start(self) -> None:
+        """Start workers and, if persistent, resume jobs interrupted by a restart"""
+        self._ensure_workers()
+        if not self.persistent:
+            return
+        session = self._session_factory()
+        try:
+            rows = session.query(RefreshJob).filter(RefreshJob.status.in_(["queued", "running"])).all()
+            for row in rows:
+                job = Job(
+                    id=row.id,
+                    team_id=row.team_id,
+                    riot_account_ids=list(row.riot_account_ids),
+                    kind=row.kind,
+                    created_at=row.created_at,
+                )
+                self._track(job)
+                self._queue.put_nowait(job)
+        finally:
+            session.close()
+
+    async def shutdown(self) -> None:
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._loop = None
+
+    async def join(self) -> None:
+        """Wait until every queued job has finished"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    # --- Enqueueing ---
+
+    def _track(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        for account_id in job.riot_account_ids:
+            self._inflight[(job.kind, account_id)] = job.id
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than job_retention_minutes"""
+        cutoff = datetime.utcnow() - timedelta(minutes=settings.job_retention_minutes)
+        for job_id in [j.id for j in self._jobs.values() if j.is_finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def enqueue_refresh(self, team_id: int, riot_account_ids: list[int]) -> Job:
+        """
+        Queue a refresh of the given accounts.
+
+        Accounts already covered by a queued/running refresh are left to that job. If
+        every requested account is already in flight, the in-flight job is returned.
+        """
+        return self._enqueue("refresh", team_id, riot_account_ids)
+
+    def enqueue_backfill(self, team_id: int, riot_account_ids: list[int]) -> Job:
+        """Queue a season history backfill of the given accounts (coalesced like refreshes)"""
+        return self._enqueue("backfill", team_id, riot_account_ids)
+
+    def _enqueue(self, kind: str, team_id: int, riot_account_ids: list[int]) -> Job:
+        self._ensure_workers()
+        self._prune()
+
+        pending = [account_id for account_id in riot_account_ids if (kind, account_id) not in self._inflight]
+        if not pending and riot_account_ids:
+            return self._jobs[self._inflight[(kind, riot_account_ids[0])]]
+
+        job = Job(id=uuid.uuid4().hex, team_id=team_id, riot_account_ids=pending, kind=kind)
+        self._track(job)
+        self._save(job)
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        job = self._jobs.get(job_id)
+        if job or not self.persistent:
+            return job
+        session = self._session_factory()
+        try:
+            row = session.query(RefreshJob).filter(RefreshJob.id == job_id).first()
+            if not row:
+                return None
+            return Job(
+                id=row.id,
+                team_id=row.team_id,
+                riot_account_ids=list(row.riot_account_ids),
+                kind=row.kind,
+                status=row.status,
+                accounts_done=row.accounts_done,
+                matches_fetched=row.matches_fetched,
+                results=list(row.results or []),
+                created_at=row.created_at,
+                started_at=row.started_at,
+                finished_at=row.finished_at,
+            )
+        finally:
+            session.close()
+
+    # --- Execution ---
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise  # Worker shut down: the job resumes on the next start()
+                # Leaked by a cancelled call inside the job: only this job failed
+                self._fail(job, "Refresh was cancelled")
+            except Exception as e:
+                self._fail(job, str(e))
+            finally:
+                self._queue.task_done()
+
+    def _fail(self, job: Job, error: str) -> None:
+        """Mark a job failed; never raises, so the worker keeps processing the queue"""
+        job.results.append({"account": "*", "status": "failed", "error": error})
+        try:
+            self._finish(job, "failed")
+        except Exception:
+            logger.exception("Could not save failed job", extra={"job_id": job.id})
+
+    async def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        self._save(job)
+
+        session = self._session_factory()
+        try:
+            riot_accounts = (
+                session.query(RiotAccount)
+                .filter(RiotAccount.id.in_(job.riot_account_ids))
+                .all()
+            )
+            riot_accounts.sort(key=lambda acc: job.riot_account_ids.index(acc.id))
+        finally:
+            session.close()
+
+        def on_result(result: dict) -> None:
+            job.results.append(result)
+            job.accounts_done += 1
+            job.matches_fetched += result.get("new_games", 0)
+            self._save(job)
+
+        await stats_service.refresh_accounts(
+            riot_accounts,
+            session_factory=self._session_factory,
+            on_result=on_result,
+            backfill=job.kind == "backfill",
+        )
+
+        if job.failed == 0:
+            self._finish(job, "succeeded")
+        elif job.refreshed == 0:
+            self._finish(job, "failed")
+        else:
+            self._finish(job, "partial")
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = datetime.utcnow()
+        for account_id in job.riot_account_ids:
+            if self._inflight.get((job.kind, account_id)) == job.id:
+                del self._inflight[(job.kind, account_id)]
+        self._save(job)
+
+    def _save(self, job: Job) -> None:
+        if not self.persistent:
+            return
+        session = self._session_factory()
+        try:
+            session.merge(RefreshJob(
+                id=job.id,
+                team_id=job.team_id,
+                kind=job.kind,
+                status=job.status,
+                riot_account_ids=job.riot_account_ids,
+                accounts_done=job.accounts_done,
+                matches_fetched=job.matches_fetched,
+                results=job.results,
+                created_at=job.created_at,
+                started_at=job.started_at,
+                finished_at=job.finished_at,
+            ))
+            session.commit()
+        finally:
+            session.close()
+
+
+job_queue = JobQueue()
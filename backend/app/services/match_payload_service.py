@@ -0,0 +1,62 @@
+"""Persistent store of raw Riot match payloads, keyed by match_id.
+
+Match V5 payloads never change once a game is over, so ingestion keeps the full
+payload it already downloaded and match detail pages are served from here instead
+of calling Riot again. Payloads are stored as Riot sent them (not projected, see
+app.riot.match_json), so fields nobody reads yet are still there later.
+"""
+import zlib
+from collections.abc import Callable
+
+from sqlalchemy.orm import Session
+
+from app.database import insert_ignore_conflicts
+from app.models.match_payload import MatchPayload
+from app.riot.match_json import dumps, loads
+
+
+def compress_payload(match_data: dict | bytes) -> tuple[bytes, int]:
+    """Compress a raw response body as is, or a parsed payload as compact JSON"""
+    raw = match_data if isinstance(match_data, bytes) else dumps(match_data)
+    return zlib.compress(raw, 6), len(raw)
+
+
+def decompress_payload(payload: bytes, parse: Callable[[bytes], dict] = loads) -> dict:
+    return parse(zlib.decompress(payload))
+
+
+def store_match_payload(db: Session, match_id: str, match_data: dict | bytes) -> None:
+    """
+    Insert the payload (no commit); no-op if it is already stored, including by a
+    concurrent request for the same match
+    """
+    store_match_payloads(db, {match_id: match_data})
+
+
+def store_match_payloads(db: Session, payloads: dict[str, dict | bytes]) -> None:
+    """Bulk variant of store_match_payload for ingestion: one INSERT, existing ids skipped"""
+    rows = []
+    for match_id, match_data in payloads.items():
+        payload, raw_size = compress_payload(match_data)
+        rows.append({"match_id": match_id, "payload": payload, "raw_size": raw_size})
+    insert_ignore_conflicts(db, MatchPayload, rows, ["match_id"])
+
+
+def get_match_payload(db: Session, match_id: str) -> dict | None:
+    row = db.get(MatchPayload, match_id)
+    if row is None:
+        return None
+    return decompress_payload(row.payload)
+
+
+def get_match_payloads(
+    db: Session, match_ids: list[str], parse: Callable[[bytes], dict] = loads
+) -> dict[str, dict]:
+    """
+    Stored payloads for the given ids (one query); missing ids are left out.
+    `parse` turns each payload into what is returned (e.g. match_json.parse_match).
+    """
+    if not match_ids:
+        return {}
+    rows = db.query(MatchPayload).filter(MatchPayload.match_id.in_(match_ids)).all()
+    return {row.match_id: decompress_payload(row.payload, parse) for row in rows}
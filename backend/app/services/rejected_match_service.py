@@ -0,0 +1,60 @@
+"""Per-account negative cache of listed matches that ingestion rejected.
+
+A match that is listed for an account but not stored (queue the team doesn't
+keep, played before the season start, account not among its participants) would
+be looked at again by every refresh or backfill whose window covers it. Ingestion
+records it here and skips it afterwards, without reading a stored payload or
+calling Riot. Rejections don't expire (matches are immutable), except queue
+rejections, which are cleared when the team changes its allowed queues.
+"""
+from datetime import datetime
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.database import insert_ignore_conflicts
+from app.models.player import Player
+from app.models.rejected_match import RejectedMatch
+from app.models.riot_account import RiotAccount
+
+
+def get_rejected_ids(db: Session, riot_account_id: int, match_ids: list[str]) -> set[str]:
+    """Which of these ids were already rejected for the account (one query)"""
+    if not match_ids:
+        return set()
+    return {
+        match_id
+        for (match_id,) in db.query(RejectedMatch.match_id).filter(
+            RejectedMatch.riot_account_id == riot_account_id,
+            RejectedMatch.match_id.in_(match_ids),
+        )
+    }
+
+
+def record_rejections(db: Session, riot_account_id: int, rejections: dict[str, str]) -> None:
+    """Store match_id -> reason rejections for the account (no commit)"""
+    now = datetime.utcnow()
+    insert_ignore_conflicts(
+        db,
+        RejectedMatch,
+        [
+            {"riot_account_id": riot_account_id, "match_id": match_id, "reason": reason, "created_at": now}
+            for match_id, reason in rejections.items()
+        ],
+        ["riot_account_id", "match_id"],
+    )
+
+
+def clear_queue_rejections(db: Session, team_id: int) -> None:
+    """Forget queue rejections of the team's accounts, e.g. after its allowed queues changed (no commit)"""
+    account_ids = (
+        select(RiotAccount.id)
+        .join(Player, RiotAccount.player_id == Player.id)
+        .where(Player.team_id == team_id)
+    )
+    db.execute(
+        delete(RejectedMatch).where(
+            RejectedMatch.reason == "queue",
+            RejectedMatch.riot_account_id.in_(account_ids),
+        )
+    )
@@ -0,0 +1,121 @@
+"""Champion performance scores (0-100) for tier lists.
+
+Scores are computed on a column-oriented batch of per-champion rollup totals
+(one entry per player and champion), so every champion of every player of a team
+is scored in a single pass over a few lists instead of champion by champion.
+
+Each stat is normalized against a benchmark (the value worth 100 points, capped
+at 100) and the normalized stats are averaged with WEIGHTS. Benchmarks depend on
+the player's role: a support's 1.5 CS/min or a top laner's 55% kill
+participation are good games, not bad ones.
+"""
+from dataclasses import dataclass, fields
+
+# Share of the final score per stat
+WEIGHTS = {
+    "winrate": 0.20,
+    "kda": 0.20,
+    "cs_per_min": 0.15,
+    "gold_per_min": 0.15,
+    "vision_per_min": 0.10,
+    "damage_per_min": 0.10,
+    "kp": 0.10,
+}
+
+
+@dataclass(frozen=True)
+class Benchmarks:
+    """Value of each stat worth 100 points"""
+
+    winrate: float = 60.0
+    kda: float = 4.0
+    cs_per_min: float = 8.0
+    gold_per_min: float = 450.0
+    vision_per_min: float = 1.5
+    damage_per_min: float = 600.0
+    kp: float = 70.0
+
+
+# Used for players without a (known) role
+DEFAULT_BENCHMARKS = Benchmarks()
+
+ROLE_BENCHMARKS = {
+    "top": Benchmarks(kda=3.5, cs_per_min=7.5, gold_per_min=430.0, vision_per_min=1.0, damage_per_min=650.0, kp=55.0),
+    "jungle": Benchmarks(cs_per_min=6.0, gold_per_min=420.0, vision_per_min=1.3, damage_per_min=550.0, kp=70.0),
+    "mid": Benchmarks(cs_per_min=8.0, gold_per_min=450.0, vision_per_min=1.2, damage_per_min=700.0, kp=65.0),
+    "adc": Benchmarks(cs_per_min=8.5, gold_per_min=480.0, vision_per_min=1.0, damage_per_min=750.0, kp=70.0),
+    "support": Benchmarks(kda=3.5, cs_per_min=1.5, gold_per_min=300.0, vision_per_min=3.0, damage_per_min=350.0, kp=75.0),
+}
+
+
+def benchmarks_for(role: str | None) -> Benchmarks:
+    return ROLE_BENCHMARKS.get(role, DEFAULT_BENCHMARKS)
+
+
+@dataclass
+class ChampionBatch:
+    """Per-champion rollup totals as columns (row i = one player's champion)"""
+
+    player_ids: list[int]
+    champion_ids: list[int]
+    games: list[int]
+    wins: list[int]
+    sum_kda: list[float]
+    sum_cs_per_min: list[float]
+    sum_gold_per_min: list[float]
+    sum_vision_per_min: list[float]
+    sum_kp: list[float]
+    damage: list[float]
+    duration: list[float]  # seconds
+
+    @classmethod
+    def from_rows(cls, rows) -> "ChampionBatch":
+        """Transpose rows having an attribute per column (e.g. a grouped rollup query)"""
+        names = [f.name for f in fields(cls)]
+        attributes = ["player_id", "champion_id", *names[2:]]
+        columns = [[getattr(row, attribute) or 0 for row in rows] for attribute in attributes]
+        return cls(*columns)
+
+    def __len__(self) -> int:
+        return len(self.player_ids)
+
+
+@dataclass
+class ScoredBatch:
+    """Per-champion averages and scores, aligned with the ChampionBatch rows"""
+
+    winrate: list[float]
+    kda: list[float]
+    cs_per_min: list[float]
+    gold_per_min: list[float]
+    vision_per_min: list[float]
+    damage_per_min: list[float]
+    kp: list[float]
+    score: list[int]
+
+
+def _averages(totals: list[float], games: list[int]) -> list[float]:
+    return [total / count if count > 0 else 0.0 for total, count in zip(totals, games)]
+
+
+def score_batch(batch: ChampionBatch, benchmarks: list[Benchmarks]) -> ScoredBatch:
+    """Score every row of `batch`; `benchmarks[i]` applies to row i"""
+    minutes = [seconds / 60 for seconds in batch.duration]
+    stats = {
+        "winrate": [w / g * 100 if g > 0 else 0.0 for w, g in zip(batch.wins, batch.games)],
+        "kda": _averages(batch.sum_kda, batch.games),
+        "cs_per_min": _averages(batch.sum_cs_per_min, batch.games),
+        "gold_per_min": _averages(batch.sum_gold_per_min, batch.games),
+        "vision_per_min": _averages(batch.sum_vision_per_min, batch.games),
+        "damage_per_min": [d / m if m > 0 else 0.0 for d, m in zip(batch.damage, minutes)],
+        "kp": _averages(batch.sum_kp, batch.games),
+    }
+
+    totals = [0.0] * len(batch)
+    for name, weight in WEIGHTS.items():
+        targets = [getattr(b, name) for b in benchmarks]
+        totals = [
+            total + min(100.0, value / target * 100) * weight
+            for total, value, target in zip(totals, stats[name], targets)
+        ]
+    return ScoredBatch(**stats, score=[int(round(total)) for total in totals])
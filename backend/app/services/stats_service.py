@@ -1,28 +1,103 @@
-from sqlalchemy.orm import Session
+import asyncio
+import logging
+from collections.abc import Callable
+from datetime import UTC, date, datetime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
 
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.champion_rollup import ChampionRollup
 from app.models.game import Game
 from app.models.player import Player
 from app.models.riot_account import RiotAccount
-from app.riot.client import RiotAPIClient
-from app.schemas.stats import GameStats, LaneStats, PlayerStats, TeamHighlights
+from app.models.team import Team
+from app.riot.circuit_breaker import RiotUnavailableError
+from app.riot.client import RiotAPIClient, ingestion_report
+from app.schemas.stats import (
+    ActivityGame,
+    ChampionMatchup,
+    GameStats,
+    LaneStats,
+    PlayerActivitySummary,
+    PlayerStats,
+    TeamActivityResponse,
+    TeamHighlights,
+)
+from app.services import activity_snapshot_service
+from app.services.game_cache import highlights_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEZONE = "Europe/Paris"
+# Role order for sorting
+ROLE_ORDER = {"top": 0, "jungle": 1, "mid": 2, "adc": 3, "support": 4}
+
+# Main account fields that change without a game being played, never stored in a snapshot
+LIVE_ACCOUNT_FIELDS = ("rank_tier", "rank_division", "lp", "last_refreshed_at")
 
 
 def get_player_stats(db: Session, player_id: int) -> PlayerStats | None:
-    player = db.query(Player).filter(Player.id == player_id).first()
-    if not player:
-        return None
+    return get_players_stats(db, [player_id]).get(player_id)
+
 
+def get_players_stats(db: Session, player_ids: list[int]) -> dict[int, PlayerStats]:
+    """
+    Stats of several players at once, keyed by player id in the order given.
+
+    Players and their riot accounts are loaded in two queries, and the champion
+    rollups of all their accounts are summed per player in one grouped query, so
+    the cost doesn't grow with the number of players. Unknown ids are left out.
+    """
+    if not player_ids:
+        return {}
+    players = {
+        player.id: player
+        for player in db.query(Player)
+        .options(selectinload(Player.riot_accounts))
+        .filter(Player.id.in_(player_ids))
+        .all()
+    }
+
+    # Sum the champion rollups of every riot account per player (O(champions), not O(games))
+    games = func.sum(ChampionRollup.games)
+    rows = {
+        row.player_id: row
+        for row in db.query(
+            RiotAccount.player_id,
+            games.label("total_games"),
+            func.sum(ChampionRollup.wins).label("wins"),
+            (func.sum(ChampionRollup.sum_kda) / games).label("avg_kda"),
+            (func.sum(ChampionRollup.sum_cs_per_min) / games).label("avg_cs_per_min"),
+            (func.sum(ChampionRollup.sum_gold_per_min) / games).label("avg_gold_per_min"),
+            (func.sum(ChampionRollup.sum_vision_per_min) / games).label("avg_vision_score_per_min"),
+            (func.sum(ChampionRollup.sum_kp) / games).label("avg_kill_participation"),
+        )
+        .join(RiotAccount, ChampionRollup.riot_account_id == RiotAccount.id)
+        .filter(RiotAccount.player_id.in_(list(players)))
+        .group_by(RiotAccount.player_id)
+        .all()
+    }
+
+    return {
+        player_id: _player_stats(players[player_id], rows.get(player_id))
+        for player_id in dict.fromkeys(player_ids)
+        if player_id in players
+    }
+
+
+def _player_stats(player: Player, row) -> PlayerStats:
+    """PlayerStats from a player and its summed rollup row (None when it has no games)"""
     # Compute ranked season totals from all riot accounts
     ranked_wins = sum(acc.wins or 0 for acc in player.riot_accounts)
     ranked_losses = sum(acc.losses or 0 for acc in player.riot_accounts)
     ranked_total = ranked_wins + ranked_losses
     ranked_winrate = round((ranked_wins / ranked_total * 100), 2) if ranked_total > 0 else 0.0
 
-    # Get all games for all riot accounts of this player
-    riot_account_ids = [acc.id for acc in player.riot_accounts]
-    games = db.query(Game).filter(Game.riot_account_id.in_(riot_account_ids)).all()
-
-    if not games:
+    if row is None or not row.total_games:
         return PlayerStats(
             player_id=player.id,
             summoner_name=player.summoner_name,
@@ -39,28 +114,19 @@ def get_player_stats(db: Session, player_id: int) -> PlayerStats | None:
             ranked_winrate=ranked_winrate,
         )
 
-    # Compute stats from stored games
-    total_games = len(games)
-    wins = sum(1 for g in games if g.stats.get("win", False))
-    winrate = (wins / total_games * 100) if total_games > 0 else 0.0
-
-    # Average stats
-    avg_kda = sum(g.stats.get("kda", 0) for g in games) / total_games
-    avg_cs_per_min = sum(g.stats.get("cs_per_min", 0) for g in games) / total_games
-    avg_gold_per_min = sum(g.stats.get("gold_per_min", 0) for g in games) / total_games
-    avg_vision_score_per_min = sum(g.stats.get("vision_per_min", 0) for g in games) / total_games
-    avg_kill_participation = sum(g.stats.get("kp", 0) for g in games) / total_games
+    total_games = row.total_games
+    winrate = (row.wins / total_games * 100) if total_games > 0 else 0.0
 
     return PlayerStats(
         player_id=player.id,
         summoner_name=player.summoner_name,
         role=player.role,
         total_games=total_games,
-        avg_kda=round(avg_kda, 2),
-        avg_cs_per_min=round(avg_cs_per_min, 2),
-        avg_gold_per_min=round(avg_gold_per_min, 2),
-        avg_vision_score_per_min=round(avg_vision_score_per_min, 2),
-        avg_kill_participation=round(avg_kill_participation, 2),
+        avg_kda=round(row.avg_kda, 2),
+        avg_cs_per_min=round(row.avg_cs_per_min, 2),
+        avg_gold_per_min=round(row.avg_gold_per_min, 2),
+        avg_vision_score_per_min=round(row.avg_vision_score_per_min, 2),
+        avg_kill_participation=round(row.avg_kill_participation, 2),
         winrate=round(winrate, 2),
         ranked_wins=ranked_wins,
         ranked_losses=ranked_losses,
@@ -75,15 +141,17 @@ def get_lane_stats(db: Session, team_id: int, lane: str) -> LaneStats | None:
     else:
         roles = [lane]
 
-    players = db.query(Player).filter(
-        Player.team_id == team_id,
-        Player.role.in_(roles),
-    ).all()
-    if not players:
+    player_ids = [
+        player_id
+        for (player_id,) in db.query(Player.id).filter(
+            Player.team_id == team_id,
+            Player.role.in_(roles),
+        ).all()
+    ]
+    if not player_ids:
         return None
 
-    player_stats = [get_player_stats(db, p.id) for p in players]
-    player_stats = [ps for ps in player_stats if ps is not None]
+    player_stats = list(get_players_stats(db, player_ids).values())
 
     total_games = sum(ps.total_games for ps in player_stats)
     if total_games == 0:
@@ -97,7 +165,8 @@ def get_lane_stats(db: Session, team_id: int, lane: str) -> LaneStats | None:
     )
 
 
-async def refresh_player_stats(db: Session, riot_account_id: int):
+async def refresh_player_stats(db: Session, riot_account_id: int) -> int:
+    """Refresh rank and recent matches for one account; returns the number of new games"""
     from datetime import datetime
 
     from fastapi import HTTPException
@@ -106,24 +175,25 @@ async def refresh_player_stats(db: Session, riot_account_id: int):
     if not riot_account:
         raise HTTPException(status_code=404, detail="Riot account not found")
 
-    print(f"Starting stats refresh for account {riot_account.summoner_name}#{riot_account.tag_line}")
+    account = f"{riot_account.summoner_name}#{riot_account.tag_line}"
+    logger.info("Starting stats refresh", extra={"account": account})
     riot_client = RiotAPIClient()
     try:
         # Update rank first
-        print("Fetching and updating rank...")
         await riot_client.fetch_and_update_rank(db, riot_account)
-        print("Rank updated successfully")
         # Then fetch matches
-        print("Fetching and storing matches...")
-        await riot_client.fetch_and_store_matches(db, riot_account, max_matches=20)
-        print("Matches fetched and stored successfully")
+        new_games = await riot_client.fetch_and_store_matches(db, riot_account, max_matches=20)
+        logger.info("Stats refreshed", extra={"account": account, "new_games": new_games})
 
         # Update last_refreshed_at timestamp
         riot_account.last_refreshed_at = datetime.utcnow()
         db.commit()
+        return new_games
+    except RiotUnavailableError:
+        raise  # 503 (see app.main)
     except ValueError as e:
         error_msg = str(e)
-        print(f"ValueError during stats refresh: {error_msg}")
+        logger.warning("Invalid Riot data during stats refresh", extra={"account": account, "error": error_msg})
         if "Invalid summoner data received from Riot API" in error_msg:
             raise HTTPException(
                 status_code=503,
@@ -138,7 +208,7 @@ async def refresh_player_stats(db: Session, riot_account_id: int):
             raise HTTPException(status_code=500, detail=f"Data validation error: {error_msg}")
     except Exception as e:
         error_msg = str(e)
-        print(f"Error during stats refresh: {error_msg}")
+        logger.warning("Stats refresh failed", extra={"account": account, "error": error_msg})
         if "401" in error_msg or "Unauthorized" in error_msg:
             raise HTTPException(
                 status_code=503,
@@ -158,47 +228,358 @@ async def refresh_player_stats(db: Session, riot_account_id: int):
             raise HTTPException(status_code=500, detail=f"Failed to fetch stats from Riot API: {error_msg}")
 
 
+async def backfill_player_matches(db: Session, riot_account_id: int) -> int:
+    """Store the season history of one account (resumable); returns the number of new games"""
+    from fastapi import HTTPException
+
+    riot_account = db.query(RiotAccount).filter(RiotAccount.id == riot_account_id).first()
+    if not riot_account:
+        raise HTTPException(status_code=404, detail="Riot account not found")
+    return await RiotAPIClient().backfill_matches(db, riot_account)
+
+
+async def refresh_accounts(
+    riot_accounts: list[RiotAccount],
+    session_factory: Callable[[], Session] = SessionLocal,
+    concurrency: int | None = None,
+    timeout: float | None = None,
+    on_result: Callable[[dict], None] | None = None,
+    backfill: bool = False,
+) -> dict:
+    """
+    Refresh several riot accounts concurrently (or, with backfill=True, store
+    their whole season history).
+
+    Each account runs in its own session (its own unit of work) with its own
+    timeout, so one slow or failing account neither blocks nor rolls back the
+    others. At most `concurrency` accounts are refreshed at once; the Riot rate
+    limiter paces the underlying API calls. `on_result` is called with each
+    account's result as soon as it finishes (used for job progress).
+    """
+    semaphore = asyncio.Semaphore(concurrency or settings.refresh_concurrency)
+    if backfill:
+        run, timeout = backfill_player_matches, timeout or settings.backfill_account_timeout
+    else:
+        run, timeout = refresh_player_stats, timeout or settings.refresh_account_timeout
+
+    async def refresh_one(account_id: int, label: str) -> dict:
+        async with semaphore:
+            session = session_factory()
+            try:
+                new_games = await asyncio.wait_for(run(session, account_id), timeout)
+                report = ingestion_report(session)
+                result = {
+                    "account": label,
+                    "status": "success",
+                    "new_games": new_games or 0,
+                    "matches_downloaded": report.downloaded,
+                    "riot_calls_saved": report.riot_calls_saved,
+                }
+            except TimeoutError:
+                session.rollback()
+                result = {"account": label, "status": "failed", "error": f"Timed out after {timeout:g}s"}
+            except asyncio.CancelledError:
+                session.rollback()
+                if asyncio.current_task().cancelling():
+                    raise  # The whole refresh was cancelled
+                # Leaked by a cancelled call this account was waiting on
+                result = {"account": label, "status": "failed", "error": "Refresh was cancelled"}
+            except Exception as e:
+                session.rollback()
+                result = {"account": label, "status": "failed", "error": str(e)}
+            finally:
+                session.close()
+        if on_result:
+            on_result(result)
+        return result
+
+    # Read everything we need from the caller's session before fanning out
+    accounts = [(acc.id, f"{acc.summoner_name}#{acc.tag_line}") for acc in riot_accounts]
+    results = await asyncio.gather(*(refresh_one(account_id, label) for account_id, label in accounts))
+
+    refreshed = sum(1 for r in results if r["status"] == "success")
+    failed = len(results) - refreshed
+    return {
+        "message": f"Refresh complete: {refreshed} success, {failed} failed",
+        "refreshed": refreshed,
+        "failed": failed,
+        "results": list(results),
+    }
+
+
 def get_team_highlights(db: Session, team_id: int) -> TeamHighlights:
-    """Get team highlights for sponsors page"""
-    # Get all games for this team's players
-    all_games = (
-        db.query(Game)
-        .join(RiotAccount)
-        .join(Player)
+    """Get team highlights for sponsors page (cached per team, see game_cache)"""
+    cached = highlights_cache.get(team_id)
+    if cached is not None:
+        return cached
+
+    riot_account_ids = [
+        account_id
+        for (account_id,) in db.query(RiotAccount.id)
+        .join(Player, RiotAccount.player_id == Player.id)
         .filter(Player.team_id == team_id)
         .all()
-    )
-    total_games = len(all_games)
-    total_wins = sum(1 for g in all_games if g.stats.get("win", False))
-    winrate = (total_wins / total_games * 100) if total_games > 0 else 0.0
-
-    # Get competitive games
-    comp_games = [g for g in all_games if g.game_type == "competitive"]
-    competitive_games = len(comp_games)
-    competitive_wins = sum(1 for g in comp_games if g.stats.get("win", False))
-    competitive_winrate = (competitive_wins / competitive_games * 100) if competitive_games > 0 else 0.0
+    ]
 
-    # Get pentakills
-    total_pentakills = sum(1 for g in all_games if g.is_pentakill)
+    # Every count in one pass over the team's games, without loading them
+    is_competitive = Game.game_type == "competitive"
+    totals = (
+        db.query(
+            func.count(Game.id).label("total_games"),
+            func.count(Game.id).filter(Game.win.is_(True)).label("total_wins"),
+            func.count(Game.id).filter(is_competitive).label("competitive_games"),
+            func.count(Game.id).filter(is_competitive, Game.win.is_(True)).label("competitive_wins"),
+            func.count(Game.id).filter(Game.is_pentakill.is_(True)).label("total_pentakills"),
+        )
+        .filter(Game.riot_account_id.in_(riot_account_ids))
+        .one()
+    )
+    total_games = totals.total_games
+    winrate = (totals.total_wins / total_games * 100) if total_games > 0 else 0.0
+    competitive_games = totals.competitive_games
+    competitive_winrate = (
+        (totals.competitive_wins / competitive_games * 100) if competitive_games > 0 else 0.0
+    )
 
-    # Get recent matches (last 10)
+    # Last 10 matches: served by ix_games_account_date (riot_account_id, game_date DESC)
     recent_matches = (
         db.query(Game)
-        .join(RiotAccount)
-        .join(Player)
-        .filter(Player.team_id == team_id)
+        .filter(Game.riot_account_id.in_(riot_account_ids))
         .order_by(Game.game_date.desc())
         .limit(10)
         .all()
     )
 
-    return TeamHighlights(
+    highlights = TeamHighlights(
         total_games=total_games,
-        total_wins=total_wins,
+        total_wins=totals.total_wins,
         winrate=round(winrate, 2),
         competitive_games=competitive_games,
-        competitive_wins=competitive_wins,
+        competitive_wins=totals.competitive_wins,
         competitive_winrate=round(competitive_winrate, 2),
-        total_pentakills=total_pentakills,
+        total_pentakills=totals.total_pentakills,
         recent_matches=[GameStats.model_validate(g) for g in recent_matches],
     )
+    highlights_cache.set(team_id, riot_account_ids, highlights)
+    return highlights
+
+
+@lru_cache(maxsize=64)
+def get_zone(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
+
+
+def get_team_zone(db: Session, team_id: int) -> ZoneInfo:
+    """The team's display timezone (games are stored in UTC)"""
+    name = db.query(Team.timezone).filter(Team.id == team_id).scalar()
+    return get_zone(name or DEFAULT_TIMEZONE)
+
+
+class LocalTimeConverter:
+    """
+    UTC -> local time with the zone offset cached per UTC hour, so a week of games
+    needs ~340 zone lookups at most instead of several per game. Offsets only change
+    on DST transitions; an hour containing one (not always on the hour, e.g. at :30
+    UTC in America/St_Johns) has no single offset and is converted game by game.
+    """
+
+    def __init__(self, zone: ZoneInfo):
+        self.zone = zone
+        self._offsets: dict[datetime, timedelta | None] = {}  # None = transition inside the hour
+
+    def _offset(self, utc: datetime) -> timedelta:
+        return self.zone.utcoffset(utc.replace(tzinfo=UTC).astimezone(self.zone))
+
+    def __call__(self, utc: datetime) -> datetime:
+        hour = utc.replace(minute=0, second=0, microsecond=0)
+        if hour not in self._offsets:
+            offset = self._offset(hour)
+            last = hour + timedelta(hours=1) - timedelta(microseconds=1)
+            self._offsets[hour] = offset if self._offset(last) == offset else None
+        offset = self._offsets[hour]
+        if offset is None:
+            offset = self._offset(utc)
+        return utc + offset
+
+
+def get_team_activity(db: Session, team_id: int, week_offset: int = 0) -> TeamActivityResponse:
+    """
+    SoloQ/scrim activity of every player for one week (Monday to Sunday in the
+    team's timezone), grouped by player and local day.
+
+    Weeks that have ended are served from their stored snapshot, built on first access.
+    A snapshot only holds the game-derived grid: the main accounts' rank and refresh
+    time are read live.
+    """
+    zone = get_team_zone(db, team_id)
+    monday = week_monday(zone, week_offset)
+    if local_week_to_utc(monday, zone)[1] > datetime.utcnow():
+        # Current (or future) week: still changing
+        return compute_team_activity(db, team_id, monday, zone)
+
+    payload = activity_snapshot_service.get_snapshot(db, team_id, monday)
+    if payload is None:
+        activity = compute_team_activity(db, team_id, monday, zone)
+        grid = activity.model_dump(mode="json", exclude={"players": {"__all__": set(LIVE_ACCOUNT_FIELDS)}})
+        activity_snapshot_service.save_snapshot(db, team_id, monday, grid)
+        return activity
+
+    activity = TeamActivityResponse.model_validate(payload)
+    account_ids = [player.riot_account_id for player in activity.players if player.riot_account_id is not None]
+    accounts = {}
+    if account_ids:
+        accounts = {acc.id: acc for acc in db.query(RiotAccount).filter(RiotAccount.id.in_(account_ids))}
+    for player in activity.players:
+        account = accounts.get(player.riot_account_id)
+        for field in LIVE_ACCOUNT_FIELDS:
+            setattr(player, field, getattr(account, field) if account else None)
+    return activity
+
+
+def compute_team_activity(db: Session, team_id: int, monday: date, zone: ZoneInfo) -> TeamActivityResponse:
+    """Build the activity grid of the week starting on local `monday` from `games`"""
+    sunday = monday + timedelta(days=6)
+    week_start, week_end = local_week_to_utc(monday, zone)
+
+    players = (
+        db.query(Player)
+        .options(selectinload(Player.riot_accounts))
+        .filter(Player.team_id == team_id)
+        .order_by(Player.role)
+        .all()
+    )
+    players = sorted(players, key=lambda p: ROLE_ORDER.get(p.role.lower(), 99))
+
+    # One query for the whole team's week
+    account_to_player = {acc.id: player.id for player in players for acc in player.riot_accounts}
+    rows = []
+    if account_to_player:
+        rows = (
+            db.query(
+                Game.id,
+                Game.riot_account_id,
+                Game.match_id,
+                Game.game_type,
+                Game.champion_id,
+                Game.kills,
+                Game.deaths,
+                Game.assists,
+                Game.win,
+                Game.game_date,
+                Game.game_duration,
+            )
+            .filter(
+                Game.riot_account_id.in_(list(account_to_player)),
+                Game.game_date >= week_start,
+                Game.game_date < week_end,
+            )
+            .order_by(Game.game_date.asc())
+            .all()
+        )
+
+    to_local = LocalTimeConverter(zone)
+    games_by_player: dict[int, list] = {player.id: [] for player in players}
+    for row in rows:
+        games_by_player[account_to_player[row.riot_account_id]].append(row)
+
+    total_soloq = 0
+    total_scrims = 0
+    total_wins = 0
+    player_summaries = []
+
+    for player in players:
+        # Get main riot account (or first one if none marked as main)
+        main_account = next(
+            (acc for acc in player.riot_accounts if acc.is_main),
+            player.riot_accounts[0] if player.riot_accounts else None,
+        )
+
+        games_by_day: dict[str, list[ActivityGame]] = {}
+        player_wins = 0
+        player_scrims = 0
+        games = games_by_player[player.id]
+
+        for game in games:
+            local_start = to_local(game.game_date)
+            local_end = to_local(game.game_date + timedelta(seconds=game.game_duration))
+
+            games_by_day.setdefault(local_start.strftime("%Y-%m-%d"), []).append(ActivityGame(
+                id=game.id,
+                match_id=game.match_id,
+                game_type=game.game_type,
+                champion_id=game.champion_id,
+                kills=game.kills or 0,
+                deaths=game.deaths or 0,
+                assists=game.assists or 0,
+                win=bool(game.win),
+                game_date=game.game_date,
+                game_duration=game.game_duration,
+                start_time=local_start.strftime("%H:%M"),
+                end_time=local_end.strftime("%H:%M"),
+                is_smurf=main_account is None or game.riot_account_id != main_account.id,
+            ))
+
+            if game.win:
+                player_wins += 1
+            if game.game_type == "competitive":
+                player_scrims += 1
+
+        total_games = len(games)
+        total_wins += player_wins
+        total_scrims += player_scrims
+        total_soloq += total_games - player_scrims
+        winrate = (player_wins / total_games * 100) if total_games > 0 else 0.0
+
+        # Calculate champion matchups (opponents faced)
+        # For now, we track the champions the player played against (simplified)
+        matchups: list[ChampionMatchup] = []
+
+        player_summaries.append(
+            PlayerActivitySummary(
+                player_id=player.id,
+                summoner_name=player.summoner_name,
+                role=player.role,
+                riot_account_id=main_account.id if main_account else None,
+                rank_tier=main_account.rank_tier if main_account else None,
+                rank_division=main_account.rank_division if main_account else None,
+                lp=main_account.lp if main_account else None,
+                total_games=total_games,
+                wins=player_wins,
+                losses=total_games - player_wins,
+                winrate=round(winrate, 1),
+                scrims=player_scrims,
+                duos=0,  # Placeholder - would need to detect duo games
+                games_by_day=games_by_day,
+                matchups=matchups,
+                last_refreshed_at=main_account.last_refreshed_at if main_account else None,
+            )
+        )
+
+    overall_games = total_soloq + total_scrims
+    overall_winrate = (total_wins / overall_games * 100) if overall_games > 0 else 0.0
+
+    return TeamActivityResponse(
+        week_start=monday.isoformat(),
+        week_end=sunday.isoformat(),
+        total_soloq=total_soloq,
+        total_scrims=total_scrims,
+        total_duos=0,
+        overall_winrate=round(overall_winrate, 1),
+        players=player_summaries,
+        last_updated=datetime.utcnow(),
+    )
+
+
+def week_monday(zone: ZoneInfo, week_offset: int = 0) -> date:
+    """Local Monday of the current week (week_offset=0), or of a week before/after it"""
+    today = datetime.now(tz=zone).date()
+    return today - timedelta(days=today.weekday()) + timedelta(weeks=week_offset)
+
+
+def local_week_to_utc(monday: date, zone: ZoneInfo) -> tuple[datetime, datetime]:
+    """[Monday 00:00, next Monday 00:00) local time as naive UTC datetimes"""
+    def to_utc(day: date) -> datetime:
+        local_midnight = datetime.combine(day, datetime.min.time(), tzinfo=zone)
+        return local_midnight.astimezone(UTC).replace(tzinfo=None)
+
+    return to_utc(monday), to_utc(monday + timedelta(days=7))
@@ -1,9 +1,11 @@
+import hashlib
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import func
 
+from app.models.champion_rollup import ChampionRollup
 from app.models.game import Game
 from app.models.player import Player
 from app.models.riot_account import RiotAccount
@@ -14,6 +16,16 @@ from app.schemas.tier_list import (
     PlayerTierList,
     Tier,
 )
+from app.services.champion_rollup_service import SUM_COLUMNS
+from app.services.game_cache import champion_scores_cache
+from app.services.scoring_service import (
+    DEFAULT_BENCHMARKS,
+    WEIGHTS,
+    Benchmarks,
+    ChampionBatch,
+    benchmarks_for,
+    score_batch,
+)
 
 
 # Champion name lookup (simplified - in production would use Data Dragon)
@@ -41,70 +53,112 @@ def calculate_performance_score(
     avg_vision_per_min: float,
     avg_damage_per_min: float,
     avg_kp: float,
+    benchmarks: Benchmarks = DEFAULT_BENCHMARKS,
 ) -> int:
     """
-    Calculate performance score from 0-100.
-
-    Weights:
-    - Winrate: 20%
-    - KDA: 20%
-    - CS/min: 15%
-    - Gold/min: 15%
-    - Vision/min: 10%
-    - Damage/min: 10%
-    - Kill Participation: 10%
-
-    Benchmarks (100 points each):
-    - Winrate: 60% = 100
-    - KDA: 4.0 = 100
-    - CS/min: 8.0 = 100
-    - Gold/min: 450 = 100
-    - Vision/min: 1.5 = 100
-    - Damage/min: 600 = 100
-    - KP: 70% = 100
-    """
-    # Normalize each stat to 0-100 (capped at 100)
-    winrate_score = min(100, (winrate / 60) * 100)
-    kda_score = min(100, (avg_kda / 4.0) * 100)
-    cs_score = min(100, (avg_cs_per_min / 8.0) * 100)
-    gold_score = min(100, (avg_gold_per_min / 450) * 100)
-    vision_score = min(100, (avg_vision_per_min / 1.5) * 100)
-    damage_score = min(100, (avg_damage_per_min / 600) * 100)
-    kp_score = min(100, (avg_kp / 70) * 100)
-
-    # Weighted average
-    score = (
-        winrate_score * 0.20 +
-        kda_score * 0.20 +
-        cs_score * 0.15 +
-        gold_score * 0.15 +
-        vision_score * 0.10 +
-        damage_score * 0.10 +
-        kp_score * 0.10
-    )
+    Calculate performance score from 0-100 for one set of averages.
 
+    See scoring_service for weights and benchmarks; tier lists score whole
+    batches with score_players_champions instead.
+    """
+    score = 0.0
+    for name, value in (
+        ("winrate", winrate),
+        ("kda", avg_kda),
+        ("cs_per_min", avg_cs_per_min),
+        ("gold_per_min", avg_gold_per_min),
+        ("vision_per_min", avg_vision_per_min),
+        ("damage_per_min", avg_damage_per_min),
+        ("kp", avg_kp),
+    ):
+        score += min(100, (value / getattr(benchmarks, name)) * 100) * WEIGHTS[name]
     return int(round(score))
 
 
+def score_players_champions(db: Session, players: list[Player]) -> dict[int, list[ChampionStatsWithScore]]:
+    """
+    Scored champion stats of several players (without tier assignments), best first.
+
+    Players not in champion_scores_cache are scored together: one grouped rollup
+    query for all of them, then one score_batch pass with each player's role
+    benchmarks. Results are cached per (player, role) until one of their games
+    changes. Returned lists are shared with the cache: copy before modifying.
+    """
+    results: dict[int, list[ChampionStatsWithScore]] = {}
+    missing = []
+    for player in players:
+        cached = champion_scores_cache.get((player.id, player.role))
+        if cached is not None:
+            results[player.id] = cached
+        else:
+            missing.append(player)
+            results[player.id] = []
+
+    if missing:
+        # Per player and champion totals from the rollups (O(champions), not O(games))
+        rows = (
+            db.query(
+                RiotAccount.player_id,
+                ChampionRollup.champion_id,
+                *[func.sum(getattr(ChampionRollup, column)).label(column) for column in SUM_COLUMNS],
+            )
+            .join(RiotAccount, ChampionRollup.riot_account_id == RiotAccount.id)
+            .filter(RiotAccount.player_id.in_([player.id for player in missing]))
+            .group_by(RiotAccount.player_id, ChampionRollup.champion_id)
+            .all()
+        )
+        roles = {player.id: player.role for player in missing}
+        batch = ChampionBatch.from_rows(rows)
+        scored = score_batch(batch, [benchmarks_for(roles[player_id]) for player_id in batch.player_ids])
+
+        for i, player_id in enumerate(batch.player_ids):
+            games_played = batch.games[i]
+            results[player_id].append(ChampionStatsWithScore(
+                champion_id=batch.champion_ids[i],
+                champion_name=get_champion_name(batch.champion_ids[i]),
+                games_played=games_played,
+                wins=batch.wins[i],
+                losses=games_played - batch.wins[i],
+                winrate=round(scored.winrate[i], 1),
+                avg_kda=round(scored.kda[i], 2),
+                avg_cs_per_min=round(scored.cs_per_min[i], 2),
+                avg_gold_per_min=round(scored.gold_per_min[i], 2),
+                avg_vision_per_min=round(scored.vision_per_min[i], 2),
+                avg_damage_per_min=round(scored.damage_per_min[i], 2),
+                avg_kill_participation=round(scored.kp[i], 1),
+                performance_score=scored.score[i],
+            ))
+
+        for player in missing:
+            # Sort by performance score descending
+            results[player.id].sort(key=lambda x: x.performance_score, reverse=True)
+            champion_scores_cache.set(
+                (player.id, player.role), [acc.id for acc in player.riot_accounts], results[player.id]
+            )
+    return results
+
+
+def _with_tiers(
+    champions: list[ChampionStatsWithScore], tier_assignments: dict[int, str]
+) -> list[ChampionStatsWithScore]:
+    """Copies of cached champion stats carrying the player's tier assignments"""
+    tiers = {champion_id: Tier(tier) for champion_id, tier in tier_assignments.items()}
+    return [c.model_copy(update={"tier": tiers.get(c.champion_id)}) for c in champions]
+
+
 def get_player_champion_stats(db: Session, player_id: int) -> list[ChampionStatsWithScore]:
     """Get champion stats with scores for a player"""
-    player = db.query(Player).filter(Player.id == player_id).first()
+    player = (
+        db.query(Player)
+        .options(selectinload(Player.riot_accounts))
+        .filter(Player.id == player_id)
+        .first()
+    )
     if not player:
         return []
 
-    # Get all riot account IDs for this player
-    riot_account_ids = [acc.id for acc in player.riot_accounts]
-    if not riot_account_ids:
-        return []
-
-    # Get all games grouped by champion
-    games = (
-        db.query(Game)
-        .filter(Game.riot_account_id.in_(riot_account_ids))
-        .all()
-    )
-
-    if not games:
+    champions = score_players_champions(db, [player])[player.id]
+    if not champions:
         return []
 
     # Get existing tier assignments
@@ -112,100 +166,80 @@ def get_player_champion_stats(db: Session, player_id: int) -> list[ChampionStats
         ct.champion_id: ct.tier
         for ct in db.query(ChampionTier).filter(ChampionTier.player_id == player_id).all()
     }
+    return _with_tiers(champions, tier_assignments)
 
-    # Group games by champion
-    champion_games: dict[int, list[Game]] = {}
-    for game in games:
-        if game.champion_id not in champion_games:
-            champion_games[game.champion_id] = []
-        champion_games[game.champion_id].append(game)
-
-    # Calculate stats for each champion
-    results = []
-    for champion_id, champ_games in champion_games.items():
-        games_played = len(champ_games)
-        wins = sum(1 for g in champ_games if g.stats.get("win", False))
-        losses = games_played - wins
-        winrate = (wins / games_played * 100) if games_played > 0 else 0.0
-
-        # Calculate averages
-        avg_kda = sum(g.stats.get("kda", 0) for g in champ_games) / games_played
-        avg_cs_per_min = sum(g.stats.get("cs_per_min", 0) for g in champ_games) / games_played
-        avg_gold_per_min = sum(g.stats.get("gold_per_min", 0) for g in champ_games) / games_played
-        avg_vision_per_min = sum(g.stats.get("vision_per_min", 0) for g in champ_games) / games_played
-        avg_kp = sum(g.stats.get("kp", 0) for g in champ_games) / games_played
-
-        # Calculate damage per min
-        total_damage = 0
-        total_duration = 0
-        for g in champ_games:
-            damage = g.stats.get("damage_dealt", 0)
-            duration = g.game_duration / 60  # Convert to minutes
-            total_damage += damage
-            total_duration += duration
-        avg_damage_per_min = (total_damage / total_duration) if total_duration > 0 else 0
-
-        # Calculate performance score
-        score = calculate_performance_score(
-            winrate=winrate,
-            avg_kda=avg_kda,
-            avg_cs_per_min=avg_cs_per_min,
-            avg_gold_per_min=avg_gold_per_min,
-            avg_vision_per_min=avg_vision_per_min,
-            avg_damage_per_min=avg_damage_per_min,
-            avg_kp=avg_kp,
-        )
 
-        # Get tier if assigned
-        tier = tier_assignments.get(champion_id)
-
-        results.append(ChampionStatsWithScore(
-            champion_id=champion_id,
-            champion_name=get_champion_name(champion_id),
-            games_played=games_played,
-            wins=wins,
-            losses=losses,
-            winrate=round(winrate, 1),
-            avg_kda=round(avg_kda, 2),
-            avg_cs_per_min=round(avg_cs_per_min, 2),
-            avg_gold_per_min=round(avg_gold_per_min, 2),
-            avg_vision_per_min=round(avg_vision_per_min, 2),
-            avg_damage_per_min=round(avg_damage_per_min, 2),
-            avg_kill_participation=round(avg_kp, 1),
-            performance_score=score,
-            tier=tier,
-        ))
-
-    # Sort by performance score descending
-    results.sort(key=lambda x: x.performance_score, reverse=True)
-    return results
+def get_team_champion_stats(db: Session, team_id: int) -> dict[int, list[ChampionStatsWithScore]]:
+    """Champion stats with scores for every player of a team, keyed by player id"""
+    players = (
+        db.query(Player)
+        .options(selectinload(Player.riot_accounts))
+        .filter(Player.team_id == team_id)
+        .all()
+    )
+    if not players:
+        return {}
 
+    tier_assignments: dict[int, dict[int, str]] = {}
+    for ct in db.query(ChampionTier).filter(ChampionTier.player_id.in_([p.id for p in players])).all():
+        tier_assignments.setdefault(ct.player_id, {})[ct.champion_id] = ct.tier
 
-def get_player_tier_list(db: Session, player_id: int) -> PlayerTierList | None:
-    """Get complete tier list for a player"""
-    player = db.query(Player).filter(Player.id == player_id).first()
-    if not player:
-        return None
+    scored = score_players_champions(db, players)
+    return {
+        player_id: _with_tiers(champions, tier_assignments.get(player_id, {}))
+        for player_id, champions in scored.items()
+    }
 
-    # Get champions with stats (played champions)
-    champions_with_stats = get_player_champion_stats(db, player_id)
-    champions_with_stats_ids = {c.champion_id for c in champions_with_stats}
 
-    # Get all tier assignments for this player (including unplayed champions)
-    tier_assignments = (
-        db.query(ChampionTier)
+def tier_list_etag(db: Session, player_id: int) -> str:
+    """
+    Version of a player's tier list, cheap enough to check on every poll.
+
+    Derived from the newest game id and game count of the player's accounts
+    (served by the riot_account_id indexes), the newest tier update and tier
+    count, and the player's role (which selects the score benchmarks).
+    """
+    games = (
+        db.query(func.max(Game.id), func.count(Game.id))
+        .join(RiotAccount, Game.riot_account_id == RiotAccount.id)
+        .filter(RiotAccount.player_id == player_id)
+        .one()
+    )
+    tiers = (
+        db.query(
+            func.max(func.coalesce(ChampionTier.updated_at, ChampionTier.created_at)),
+            func.count(ChampionTier.id),
+        )
         .filter(ChampionTier.player_id == player_id)
-        .all()
+        .one()
     )
+    role = db.query(Player.role).filter(Player.id == player_id).scalar()
+    last_tier_update = tiers[0].isoformat() if tiers[0] else ""
+    version = f"{player_id}:{role}:{games[0] or 0}:{games[1]}:{last_tier_update}:{tiers[1]}"
+    return '"' + hashlib.sha1(version.encode()).hexdigest() + '"'
+
+
+def get_player_tier_list(db: Session, player_id: int) -> PlayerTierList | None:
+    """Get complete tier list for a player (one load of player, tiers and scores)"""
+    player = (
+        db.query(Player)
+        .options(selectinload(Player.riot_accounts), selectinload(Player.champion_tiers))
+        .filter(Player.id == player_id)
+        .first()
+    )
+    if not player:
+        return None
+
+    tier_assignments = {ct.champion_id: ct.tier for ct in player.champion_tiers}
+    champions = _with_tiers(score_players_champions(db, [player])[player.id], tier_assignments)
 
     # Add champions that have tiers but weren't played
-    all_champions = list(champions_with_stats)
-    for tier_assignment in tier_assignments:
-        if tier_assignment.champion_id not in champions_with_stats_ids:
-            # Create a placeholder entry for unplayed champion
-            all_champions.append(ChampionStatsWithScore(
-                champion_id=tier_assignment.champion_id,
-                champion_name=get_champion_name(tier_assignment.champion_id),
+    played_ids = {c.champion_id for c in champions}
+    for champion_id, tier in tier_assignments.items():
+        if champion_id not in played_ids:
+            champions.append(ChampionStatsWithScore(
+                champion_id=champion_id,
+                champion_name=get_champion_name(champion_id),
                 games_played=0,
                 wins=0,
                 losses=0,
@@ -217,27 +251,25 @@ def get_player_tier_list(db: Session, player_id: int) -> PlayerTierList | None:
                 avg_damage_per_min=0.0,
                 avg_kill_participation=0.0,
                 performance_score=0,
-                tier=tier_assignment.tier,
+                tier=Tier(tier),
             ))
 
-    # Group by tier
-    tier_s = [c for c in all_champions if c.tier == "S"]
-    tier_a = [c for c in all_champions if c.tier == "A"]
-    tier_b = [c for c in all_champions if c.tier == "B"]
-    tier_c = [c for c in all_champions if c.tier == "C"]
-    tier_d = [c for c in all_champions if c.tier == "D"]
-    unranked = [c for c in all_champions if c.tier is None]
+    # Group by tier in one pass
+    buckets: dict[str | None, list[ChampionStatsWithScore]] = {tier.value: [] for tier in Tier}
+    buckets[None] = []
+    for champion in champions:
+        buckets[champion.tier.value if champion.tier else None].append(champion)
 
     return PlayerTierList(
         player_id=player.id,
         player_name=player.summoner_name,
-        champions=all_champions,
-        tier_s=tier_s,
-        tier_a=tier_a,
-        tier_b=tier_b,
-        tier_c=tier_c,
-        tier_d=tier_d,
-        unranked=unranked,
+        champions=champions,
+        tier_s=buckets["S"],
+        tier_a=buckets["A"],
+        tier_b=buckets["B"],
+        tier_c=buckets["C"],
+        tier_d=buckets["D"],
+        unranked=buckets[None],
     )
 
 
@@ -0,0 +1,79 @@
+"""
+Benchmark: parsing a match payload with stdlib json vs. app.riot.match_json.
+
+Parses the same response body repeatedly and reports, per match:
+- parse time (median and p95)
+- peak memory allocated while parsing (tracemalloc)
+- memory still held by the result (what the response cache keeps)
+
+for:
+- "stdlib": json.loads, the old `response.json()` path
+- "orjson": match_json.loads without projection (only when orjson is installed)
+- "parse_match": the fast path used for match-v5.match responses
+
+Usage (from backend/):
+    python -m benchmarks.match_json --file ../response_1.json --iterations 2000
+"""
+import argparse
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from app.riot import match_json
+
+DEFAULT_FILE = Path(__file__).resolve().parents[2] / "response_1.json"
+
+
+def _time_per_match(parse: Callable[[bytes], dict], body: bytes, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        parse(body)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _memory_per_match(parse: Callable[[bytes], dict], body: bytes) -> tuple[int, int]:
+    """Return (peak bytes while parsing, bytes still held by the result)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = parse(body)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak, retained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", type=Path, default=DEFAULT_FILE, help="Match JSON to parse")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    body = args.file.read_bytes()
+    parsers = {"stdlib": json.loads}
+    if match_json.orjson is not None:
+        parsers["orjson"] = match_json.loads
+    parsers["parse_match"] = match_json.parse_match
+
+    projected = match_json.dumps(match_json.parse_match(body))
+    print(f"{args.file.name}: {len(body) / 1024:.1f} KB, projected to {len(projected) / 1024:.1f} KB; "
+          f"orjson {'installed' if match_json.orjson is not None else 'not installed'}")
+    print(f"{'parser':<12} {'median':>10} {'p95':>10} {'peak mem':>10} {'retained':>10}")
+    for name, parse in parsers.items():
+        parse(body)  # Warm up
+        timings = sorted(_time_per_match(parse, body, args.iterations))
+        peak, retained = _memory_per_match(parse, body)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{name:<12} {statistics.median(timings) * 1e6:>8.1f}us {p95 * 1e6:>8.1f}us "
+              f"{peak / 1024:>8.1f}KB {retained / 1024:>8.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: per-request AsyncClient vs. the shared pooled client.
+
+Starts a local stub of the Riot match endpoint (plain HTTP/1.1 with keep-alive)
+and measures per-request latency for:
+- "per-request": the old behaviour, a fresh httpx.AsyncClient for every call
+- "pooled": one long-lived client from app.riot.http.create_http_client()
+
+Usage (from backend/):
+    python -m benchmarks.riot_http_pool --requests 200 --delay-ms 0
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+# The app settings require these; the benchmark never talks to a real database or Riot
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("RIOT_API_KEY", "bench-key")
+os.environ.setdefault("ACCESS_CODE", "bench")
+os.environ.setdefault("JWT_SECRET", "bench")
+
+import httpx  # noqa: E402
+
+from app.riot.http import create_http_client  # noqa: E402
+
+STUB_BODY = json.dumps({"metadata": {"matchId": "EUW1_1"}, "info": {"queueId": 420}}).encode()
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, delay: float):
+    """Minimal HTTP/1.1 server loop: answer every request on the connection until it closes"""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            if not head:
+                break
+            if delay:
+                await asyncio.sleep(delay)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/json\r\n"
+                b"Content-Length: " + str(len(STUB_BODY)).encode() + b"\r\n"
+                b"Connection: keep-alive\r\n\r\n" + STUB_BODY
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _bench_per_request(url: str, n: int) -> list[float]:
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            response = await client.get(url, timeout=10.0)
+            response.json()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def _bench_pooled(url: str, n: int) -> list[float]:
+    timings = []
+    client = create_http_client()
+    try:
+        for _ in range(n):
+            start = time.perf_counter()
+            response = await client.get(url)
+            response.json()
+            timings.append(time.perf_counter() - start)
+    finally:
+        await client.aclose()
+    return timings
+
+
+def _report(label: str, timings: list[float]) -> None:
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    print(
+        f"{label:<12} n={len(ms):<5} mean={statistics.mean(ms):7.3f} ms  "
+        f"p50={statistics.median(ms):7.3f} ms  p95={p95:7.3f} ms  total={sum(ms):8.1f} ms"
+    )
+
+
+async def main(n: int, delay_ms: float) -> None:
+    server = await asyncio.start_server(
+        lambda r, w: _handle(r, w, delay_ms / 1000), "127.0.0.1", 0
+    )
+    port = server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/lol/match/v5/matches/EUW1_1"
+
+    async with server:
+        # Warm up imports / first connection so neither side pays one-off costs
+        await _bench_pooled(url, 5)
+        await _bench_per_request(url, 5)
+
+        _report("per-request", await _bench_per_request(url, n))
+        _report("pooled", await _bench_pooled(url, n))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Simulated server time")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.delay_ms))
@@ -10,6 +10,36 @@ mock_settings.database_url = "sqlite:///./test.db"
 mock_settings.riot_api_key = "test-key"
 mock_settings.riot_api_region = "euw1"
 mock_settings.riot_api_cache_ttl = 3600
+mock_settings.riot_api_cache_short_ttl = 120
+mock_settings.riot_api_cache_max_entries = 256
+mock_settings.riot_api_cache_url = ""
+mock_settings.team_highlights_cache_ttl = 300
+mock_settings.champion_scores_cache_ttl = 3600
+mock_settings.riot_http_max_connections = 20
+mock_settings.riot_http_max_keepalive_connections = 10
+mock_settings.riot_http_keepalive_expiry = 30.0
+mock_settings.riot_http_timeout = 10.0
+mock_settings.riot_http_connect_timeout = 5.0
+mock_settings.riot_http2 = False
+mock_settings.riot_app_rate_limit = "20:1,100:120"
+mock_settings.riot_fetch_concurrency = 10
+mock_settings.riot_circuit_failure_threshold = 5
+mock_settings.riot_circuit_reset_seconds = 30.0
+mock_settings.riot_circuit_auth_reset_seconds = 300.0
+mock_settings.refresh_concurrency = 4
+mock_settings.refresh_account_timeout = 120.0
+mock_settings.backfill_account_timeout = 3600.0
+mock_settings.job_workers = 2
+mock_settings.job_queue_persistent = False
+mock_settings.job_retention_minutes = 60
+mock_settings.refresher_enabled = False
+mock_settings.refresher_poll_seconds = 300
+mock_settings.refresher_interval_minutes = 60
+mock_settings.refresher_inactive_days = 14
+mock_settings.refresher_inactive_interval_minutes = 1440
+mock_settings.refresher_budget_fraction = 0.5
+mock_settings.log_level = "INFO"
+mock_settings.log_format = "text"
 mock_settings.access_code = "test-code"
 mock_settings.jwt_secret = "test-secret"
 mock_settings.jwt_algorithm = "HS256"
@@ -18,6 +48,8 @@ mock_settings.jwt_expiration_hours = 720
 with patch('app.config.settings', mock_settings):
     from app.database import Base, get_db
     from app.main import app
+    from app.riot.circuit_breaker import circuit_breaker
+    from app.services import game_cache
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
@@ -25,6 +57,20 @@ engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def clear_game_caches():
+    """Ids are reused across tests (fresh database each time): start with empty caches"""
+    game_cache.clear_all()
+    yield
+    game_cache.clear_all()
+
+
+@pytest.fixture(autouse=True)
+def close_riot_circuits():
+    """Riot failures simulated by one test must not open circuits for the next"""
+    circuit_breaker.reset()
+
+
 @pytest.fixture
 def db():
     Base.metadata.create_all(bind=engine)
@@ -46,4 +92,27 @@ def client(db):
 
     app.dependency_overrides[get_db] = override_get_db
     yield TestClient(app)
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def team(db):
+    from app.models.team import Team
+
+    team = Team(name="Test Team", access_code="TEST-TEAM")
+    db.add(team)
+    db.commit()
+    return team
+
+
+@pytest.fixture
+def auth_headers(team):
+    """Coach JWT for the `team` fixture"""
+    from jose import jwt
+
+    token = jwt.encode(
+        {"team_id": team.id, "team_name": team.name, "role": "coach"},
+        mock_settings.jwt_secret,
+        algorithm=mock_settings.jwt_algorithm,
+    )
+    return {"Authorization": f"Bearer {token}"}
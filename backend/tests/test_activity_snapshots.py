@@ -0,0 +1,140 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.models.activity_snapshot import ActivitySnapshot
+from app.models.game import Game
+from app.models.player import Player
+from app.models.riot_account import RiotAccount
+from app.schemas.admin import TeamUpdate
+from app.services import stats_service
+from app.services.admin_service import update_team
+from app.services.stats_service import get_team_activity, week_monday
+
+
+@pytest.fixture
+def account(db, team):
+    player = Player(team_id=team.id, summoner_name="TestPlayer", role="mid")
+    db.add(player)
+    db.commit()
+    account = RiotAccount(player_id=player.id, puuid="puuid1", summoner_name="Summoner1", tag_line="T1", is_main=True)
+    db.add(account)
+    db.commit()
+    return account
+
+
+def last_week_game(account, match_id, **kwargs):
+    monday = week_monday(ZoneInfo("Europe/Paris"), -1)
+    local = datetime.combine(monday, datetime.min.time(), tzinfo=ZoneInfo("Europe/Paris")) + timedelta(hours=20)
+    return Game(
+        riot_account_id=account.id, match_id=match_id, game_type="soloq", champion_id=1, role="middle",
+        stats={"kills": 1, "deaths": 1, "assists": 1, "win": True}, game_duration=1800,
+        game_date=local.astimezone(UTC).replace(tzinfo=None), **kwargs,
+    )
+
+
+def test_closed_week_served_from_snapshot(db, team, account):
+    db.add(last_week_game(account, "m1"))
+    db.commit()
+
+    first = get_team_activity(db, team.id, week_offset=-1)
+    assert db.query(ActivitySnapshot).count() == 1
+
+    with patch.object(stats_service, "compute_team_activity") as compute:
+        second = get_team_activity(db, team.id, week_offset=-1)
+    compute.assert_not_called()
+    assert second == first
+
+
+def test_current_week_is_never_snapshotted(db, team, account):
+    get_team_activity(db, team.id)
+    assert db.query(ActivitySnapshot).count() == 0
+
+
+def test_late_game_and_retag_invalidate_snapshot(db, team, account):
+    game = last_week_game(account, "m1")
+    db.add(game)
+    db.commit()
+    assert get_team_activity(db, team.id, week_offset=-1).total_soloq == 1
+
+    # A game of that week ingested late
+    db.add(last_week_game(account, "m2"))
+    db.commit()
+    assert db.query(ActivitySnapshot).count() == 0
+    activity = get_team_activity(db, team.id, week_offset=-1)
+    assert activity.total_soloq == 2
+
+    # Retagging a game of that week
+    game.game_type = "competitive"
+    db.commit()
+    activity = get_team_activity(db, team.id, week_offset=-1)
+    assert (activity.total_soloq, activity.total_scrims) == (1, 1)
+
+
+def test_games_of_other_weeks_keep_snapshot(db, team, account):
+    get_team_activity(db, team.id, week_offset=-4)
+    db.add(last_week_game(account, "m1"))
+    db.commit()
+    assert db.query(ActivitySnapshot).count() == 1
+
+
+def test_timezone_change_invalidates_team_snapshots(db, team, account):
+    get_team_activity(db, team.id, week_offset=-1)
+    update_team(db, team.id, TeamUpdate(timezone=team.timezone))
+    assert db.query(ActivitySnapshot).count() == 1
+
+    update_team(db, team.id, TeamUpdate(timezone="America/New_York"))
+    assert db.query(ActivitySnapshot).count() == 0
+
+
+def test_roster_changes_invalidate_team_snapshots(db, team, account):
+    # Adding a player
+    get_team_activity(db, team.id, week_offset=-1)
+    player = Player(team_id=team.id, summoner_name="Sub", role="top")
+    db.add(player)
+    db.commit()
+    assert db.query(ActivitySnapshot).count() == 0
+
+    # Adding an account, then making it the main one
+    get_team_activity(db, team.id, week_offset=-1)
+    smurf = RiotAccount(player_id=account.player_id, puuid="puuid2", summoner_name="Smurf", tag_line="T1")
+    db.add(smurf)
+    db.commit()
+    assert db.query(ActivitySnapshot).count() == 0
+
+    get_team_activity(db, team.id, week_offset=-1)
+    account.is_main = False
+    smurf.is_main = True
+    db.commit()
+    assert db.query(ActivitySnapshot).count() == 0
+
+    # Removing a player
+    get_team_activity(db, team.id, week_offset=-1)
+    db.delete(player)
+    db.commit()
+    assert db.query(ActivitySnapshot).count() == 0
+
+
+def test_rank_update_keeps_snapshot(db, team, account):
+    get_team_activity(db, team.id, week_offset=-1)
+    account.lp = 42
+    db.commit()
+    assert db.query(ActivitySnapshot).count() == 1
+
+
+def test_snapshot_serves_live_account_fields(db, team, account):
+    account.rank_tier, account.rank_division, account.lp = "GOLD", "II", 10
+    db.commit()
+    get_team_activity(db, team.id, week_offset=-1)
+    stored = db.query(ActivitySnapshot).one().payload["players"][0]
+    assert "lp" not in stored and "last_refreshed_at" not in stored
+
+    refreshed_at = datetime(2026, 1, 5, 12)
+    account.rank_tier, account.rank_division, account.lp = "PLATINUM", "IV", 0
+    account.last_refreshed_at = refreshed_at
+    db.commit()
+    player = get_team_activity(db, team.id, week_offset=-1).players[0]
+    assert (player.rank_tier, player.rank_division, player.lp) == ("PLATINUM", "IV", 0)
+    assert player.last_refreshed_at == refreshed_at
@@ -0,0 +1,131 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.models.champion_rollup import ChampionRollup
+from app.models.game import Game
+from app.models.player import Player
+from app.models.riot_account import RiotAccount
+from app.riot.client import RiotAPIClient
+from app.services.champion_rollup_service import rebuild_rollups
+from app.services.tier_list_service import get_player_champion_stats
+
+
+@pytest.fixture
+def account(db, team):
+    player = Player(team_id=team.id, summoner_name="TestPlayer", role="mid")
+    db.add(player)
+    db.commit()
+    account = RiotAccount(player_id=player.id, puuid="test-puuid", summoner_name="Summoner", tag_line="EUW")
+    db.add(account)
+    db.commit()
+    return account
+
+
+def make_game(account, match_id, champion_id=1, win=True, kda=3.0, damage=18000):
+    return Game(
+        riot_account_id=account.id,
+        match_id=match_id,
+        game_type="soloq",
+        champion_id=champion_id,
+        role="middle",
+        stats={"kills": 5, "deaths": 2, "assists": 1, "kda": kda, "cs_per_min": 7.0, "kp": 50.0,
+               "damage_dealt": damage, "win": win},
+        game_duration=1800,
+        game_date=datetime(2026, 2, 1),
+    )
+
+
+def rollups(db):
+    return {
+        (r.champion_id, r.game_type): (r.games, r.wins, r.sum_kda)
+        for r in db.query(ChampionRollup).order_by(ChampionRollup.champion_id)
+    }
+
+
+def test_orm_changes_keep_rollups_in_sync(db, account):
+    game1 = make_game(account, "m1", win=True, kda=4.0)
+    game2 = make_game(account, "m2", win=False, kda=2.0)
+    db.add_all([game1, game2, make_game(account, "m3", champion_id=2)])
+    db.commit()
+    assert rollups(db) == {(1, "soloq"): (2, 1, 6.0), (2, "soloq"): (1, 1, 3.0)}
+
+    # Tag change moves the game to another rollup row
+    game2.game_type = "competitive"
+    db.commit()
+    assert rollups(db) == {
+        (1, "soloq"): (1, 1, 4.0),
+        (1, "competitive"): (1, 0, 2.0),
+        (2, "soloq"): (1, 1, 3.0),
+    }
+
+    # Deleting the last game of a row removes the row
+    db.delete(game2)
+    db.commit()
+    assert rollups(db) == {(1, "soloq"): (1, 1, 4.0), (2, "soloq"): (1, 1, 3.0)}
+
+
+def test_tag_endpoint_updates_rollups(client, db, auth_headers, account):
+    game = make_game(account, "m1")
+    db.add(game)
+    db.commit()
+
+    response = client.patch(f"/api/v1/games/{game.id}/tag", json={"game_type": "competitive"}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert rollups(db) == {(1, "competitive"): (1, 1, 3.0)}
+
+
+async def test_ingestion_updates_rollups(db, account):
+    match = {
+        "metadata": {"matchId": "EUW1_1"},
+        "info": {
+            "queueId": 420,
+            "gameCreation": int(datetime(2026, 2, 1).timestamp() * 1000),
+            "gameDuration": 1800,
+            "participants": [{
+                "puuid": "test-puuid", "championId": 7, "teamPosition": "MIDDLE", "teamId": 100,
+                "kills": 6, "deaths": 2, "assists": 4, "totalMinionsKilled": 200, "goldEarned": 12000,
+                "visionScore": 20, "totalDamageDealtToChampions": 24000, "win": True,
+            }],
+        },
+    }
+    riot_client = RiotAPIClient()
+    with patch.object(riot_client, 'get_match_ids_by_puuid', new_callable=AsyncMock) as mock_get_ids, \
+         patch.object(riot_client, 'get_match_details', new_callable=AsyncMock) as mock_get_details:
+        mock_get_ids.return_value = ["EUW1_1"]
+        mock_get_details.return_value = match
+        await riot_client.fetch_and_store_matches(db, account)
+        # Re-ingesting the same match doesn't double count
+        account.last_match_at = None
+        await riot_client.fetch_and_store_matches(db, account)
+
+    rollup = db.query(ChampionRollup).one()
+    assert (rollup.champion_id, rollup.games, rollup.wins, rollup.damage) == (7, 1, 1, 24000)
+
+    champions = get_player_champion_stats(db, account.player_id)
+    assert champions[0].avg_damage_per_min == 800.0  # 24000 / 30 min
+
+
+def test_rebuild_matches_incremental(db, account):
+    db.add_all([make_game(account, f"m{i}", champion_id=i % 3, win=i % 2 == 0) for i in range(10)])
+    db.commit()
+    incremental = rollups(db)
+
+    db.query(ChampionRollup).delete()
+    db.commit()
+    rebuild_rollups(db)
+
+    assert rollups(db) == incremental
+
+
+def test_deleting_riot_account_removes_its_rollups(client, db, auth_headers, account):
+    db.add_all([make_game(account, "m1"), make_game(account, "m2", champion_id=2)])
+    db.commit()
+    assert len(rollups(db)) == 2
+
+    response = client.delete(f"/api/v1/riot-accounts/{account.id}", headers=auth_headers)
+
+    assert response.status_code == 204
+    assert rollups(db) == {}
@@ -0,0 +1,170 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.models.game import Game
+from app.models.player import Player
+from app.models.riot_account import RiotAccount
+from app.riot.cache import ResponseCache
+from app.riot.circuit_breaker import (
+    AUTH,
+    SERVER,
+    CircuitBreaker,
+    RiotUnavailableError,
+    circuit_breaker,
+)
+from app.riot.client import RiotAPIClient
+from app.riot.rate_limit import RateLimiter
+
+HOST = "europe.api.riotgames.com"
+URL = f"https://{HOST}/lol/match/v5/matches/by-puuid/p/ids"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(clock, threshold=2):
+    return CircuitBreaker(failure_threshold=threshold, reset_timeout=30, auth_reset_timeout=300, clock=clock)
+
+
+def make_client(handler, breaker):
+    return RiotAPIClient(
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        limiter=RateLimiter(default_app_limits=""),
+        cache=ResponseCache(max_entries=10),
+        breaker=breaker,
+    )
+
+
+def test_opens_after_threshold_and_half_opens_to_probe():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+
+    breaker.record_failure(HOST, SERVER)
+    breaker.check(HOST)
+    breaker.record_failure(HOST, SERVER)
+    with pytest.raises(RiotUnavailableError) as exc_info:
+        breaker.check(HOST)
+    assert exc_info.value.retry_after == 30
+    # Other hosts are unaffected
+    breaker.check("euw1.api.riotgames.com")
+
+    # Half-open: one probe goes through, the next call still fails fast
+    clock.now = 31
+    breaker.check(HOST)
+    assert breaker.snapshot()["circuits"][f"{HOST} server"]["state"] == "half_open"
+    with pytest.raises(RiotUnavailableError):
+        breaker.check(HOST)
+
+    # A failed probe reopens the circuit for another timeout
+    breaker.record_failure(HOST, SERVER)
+    clock.now = 50
+    with pytest.raises(RiotUnavailableError):
+        breaker.check(HOST)
+
+    # A successful probe closes it
+    clock.now = 62
+    breaker.check(HOST)
+    breaker.record_success(HOST)
+    breaker.check(HOST)
+    assert breaker.snapshot()["circuits"][f"{HOST} server"] == {"state": "closed", "failures": 0, "retry_in": None}
+    assert (breaker.opened, breaker.rejected) == (1, 3)
+
+
+def test_refused_check_leaves_other_circuits_untouched():
+    """A server circuit due for a probe stays open while the host's auth circuit refuses calls"""
+    clock = FakeClock()
+    breaker = make_breaker(clock, threshold=1)
+    breaker.record_failure(HOST, SERVER)
+    breaker.record_failure(HOST, AUTH)
+
+    clock.now = 31
+    with pytest.raises(RiotUnavailableError) as exc_info:
+        breaker.check(HOST)
+
+    assert exc_info.value.failure_class == AUTH
+    assert breaker.snapshot()["circuits"][f"{HOST} server"]["state"] == "open"
+
+
+def test_success_resets_consecutive_failures():
+    breaker = make_breaker(FakeClock())
+    breaker.record_failure(HOST, AUTH)
+    breaker.record_success(HOST)
+    breaker.record_failure(HOST, AUTH)
+    breaker.check(HOST)
+
+
+async def test_expired_key_fails_fast():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(401, text="Unauthorized")
+
+    client = make_client(handler, make_breaker(FakeClock()))
+    for _ in range(2):
+        with pytest.raises(ValueError, match="401"):
+            await client._request(URL)
+
+    with pytest.raises(RiotUnavailableError, match="API key rejected") as exc_info:
+        await client._request(URL)
+    assert exc_info.value.retry_after == 300
+    assert len(calls) == 2
+
+
+async def test_open_circuit_stops_retries():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503, text="Service Unavailable")
+
+    client = make_client(handler, make_breaker(FakeClock()))
+    with patch("app.riot.client.asyncio.sleep"), pytest.raises(RiotUnavailableError):
+        await client._request(URL, retries=3)
+
+    assert len(calls) == 2
+
+
+async def test_rate_limits_and_not_found_dont_open():
+    responses = iter([httpx.Response(429, headers={"Retry-After": "0"})] * 3 + [httpx.Response(404)] * 3)
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    client = make_client(lambda request: next(responses), breaker)
+
+    with pytest.raises(Exception, match="Max retries"):
+        await client._request(URL, retries=3)
+    for _ in range(3):
+        with pytest.raises(ValueError, match="not found"):
+            await client._request(URL)
+    breaker.check(HOST)
+
+
+def test_game_details_503_while_open(client, db, team, auth_headers):
+    player = Player(team_id=team.id, summoner_name="TestPlayer", role="mid")
+    db.add(player)
+    db.commit()
+    account = RiotAccount(player_id=player.id, puuid="test-puuid", summoner_name="Summoner", tag_line="EUW")
+    db.add(account)
+    db.commit()
+    game = Game(
+        riot_account_id=account.id, match_id="EUW1_1", game_type="soloq", champion_id=1, role="middle",
+        stats={"win": True}, game_duration=1800, game_date=datetime(2026, 2, 1),
+    )
+    db.add(game)
+    db.commit()
+
+    for _ in range(circuit_breaker.failure_threshold):
+        circuit_breaker.record_failure(HOST, SERVER)
+    response = client.get(f"/api/v1/games/{game.id}/details", headers=auth_headers)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+    assert "Riot API unavailable" in response.json()["detail"]
@@ -0,0 +1,85 @@
+"""EXPLAIN-based checks that the team-scoped read paths use their indexes"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import sqlite
+
+from app.models.game import Game
+from app.models.player import Player
+from app.models.rank_history import RankHistory
+from app.models.riot_account import RiotAccount
+
+
+@pytest.fixture
+def seeded(db, team):
+    """A few players with accounts, games and rank history, then ANALYZE"""
+    start = datetime(2026, 1, 10)
+    for p in range(5):
+        player = Player(team_id=team.id, summoner_name=f"Player{p}", role="mid")
+        db.add(player)
+        db.flush()
+        for a in range(2):
+            account = RiotAccount(
+                player_id=player.id, puuid=f"puuid-{p}-{a}", summoner_name=f"P{p}A{a}", tag_line="EUW"
+            )
+            db.add(account)
+            db.flush()
+            for g in range(20):
+                db.add(Game(
+                    riot_account_id=account.id,
+                    match_id=f"EUW1_{p}_{a}_{g}",
+                    game_type="soloq",
+                    champion_id=g % 7,
+                    role="middle",
+                    stats={"win": g % 2 == 0},
+                    game_duration=1800,
+                    game_date=start + timedelta(hours=g),
+                    is_pentakill=g == 0,
+                ))
+                db.add(RankHistory(
+                    riot_account_id=account.id, tier="GOLD", division="I", lp=g, wins=g, losses=0,
+                    recorded_at=start + timedelta(hours=g),
+                ))
+    db.commit()
+    db.execute(text("ANALYZE"))
+    return team
+
+
+def query_plan(db, query) -> str:
+    sql = str(query.statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+    rows = db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def test_account_games_newest_first(db, seeded):
+    query = db.query(Game).filter(Game.riot_account_id == 1).order_by(Game.game_date.desc()).limit(20)
+    plan = query_plan(db, query)
+    assert "ix_games_account_date" in plan
+    assert "TEMP B-TREE" not in plan  # No sort step
+
+
+def test_team_pentakills(db, seeded):
+    query = (
+        db.query(Game)
+        .join(RiotAccount)
+        .join(Player)
+        .filter(Game.is_pentakill == True, Player.team_id == seeded.id)  # noqa: E712
+    )
+    assert "ix_games_pentakills" in query_plan(db, query)
+
+
+def test_accounts_by_player(db, seeded):
+    query = db.query(RiotAccount).filter(RiotAccount.player_id == 1)
+    assert "ix_riot_accounts_player_id" in query_plan(db, query)
+
+
+def test_rank_history_by_account(db, seeded):
+    query = (
+        db.query(RankHistory)
+        .filter(RankHistory.riot_account_id == 1)
+        .order_by(RankHistory.recorded_at.asc())
+    )
+    plan = query_plan(db, query)
+    assert "ix_rank_history_account_recorded" in plan
+    assert "TEMP B-TREE" not in plan
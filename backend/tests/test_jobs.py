@@ -0,0 +1,172 @@
+import asyncio
+from unittest.mock import patch
+
+from app.models.player import Player
+from app.models.riot_account import RiotAccount
+from app.models.team import Team
+from app.services.job_service import JobQueue
+from tests.conftest import TestingSessionLocal
+
+
+def create_team_accounts(db, count=2):
+    team = Team(name="Test Team", access_code="JOBS")
+    db.add(team)
+    db.commit()
+    player = Player(team_id=team.id, summoner_name="TestPlayer", role="mid")
+    db.add(player)
+    db.commit()
+    accounts = [
+        RiotAccount(player_id=player.id, puuid=f"puuid-{i}", summoner_name=f"Acc{i}", tag_line="EUW")
+        for i in range(count)
+    ]
+    db.add_all(accounts)
+    db.commit()
+    return team, accounts
+
+
+async def test_refresh_job_reports_progress(db):
+    """A job refreshes every account and records progress, matches and errors"""
+    team, accounts = create_team_accounts(db)
+    queue = JobQueue(workers=1, session_factory=TestingSessionLocal, persistent=False)
+
+    async def fake_refresh(session, riot_account_id):
+        if riot_account_id == accounts[1].id:
+            raise ValueError("403 Forbidden - API key doesn't have required permissions")
+        return 3
+
+    with patch("app.services.stats_service.refresh_player_stats", side_effect=fake_refresh):
+        job = queue.enqueue_refresh(team.id, [acc.id for acc in accounts])
+        assert job.status == "queued"
+        await queue.join()
+
+    assert job.status == "partial"
+    assert job.accounts_done == 2
+    assert job.matches_fetched == 3
+    assert job.refreshed == 1
+    assert job.errors == [{"account": "Acc1#EUW", "error": "403 Forbidden - API key doesn't have required permissions"}]
+    assert queue.get(job.id) is job
+    await queue.shutdown()
+
+
+async def test_duplicate_refresh_coalesces_into_inflight_job(db):
+    """Refreshing an account that is already queued returns the in-flight job"""
+    team, accounts = create_team_accounts(db)
+    queue = JobQueue(workers=1, session_factory=TestingSessionLocal, persistent=False)
+    release = asyncio.Event()
+
+    async def slow_refresh(session, riot_account_id):
+        await release.wait()
+        return 0
+
+    with patch("app.services.stats_service.refresh_player_stats", side_effect=slow_refresh):
+        team_job = queue.enqueue_refresh(team.id, [acc.id for acc in accounts])
+        single_job = queue.enqueue_refresh(team.id, [accounts[0].id])
+        assert single_job is team_job
+
+        release.set()
+        await queue.join()
+
+        # Once finished, a new request starts a new job
+        new_job = queue.enqueue_refresh(team.id, [accounts[0].id])
+        assert new_job is not team_job
+        await queue.join()
+
+    assert team_job.status == "succeeded"
+    assert new_job.status == "succeeded"
+    await queue.shutdown()
+
+
+async def test_persistent_jobs_survive_restart(db):
+    """With persistence on, job state is stored and queued jobs resume on start()"""
+    team, accounts = create_team_accounts(db, count=1)
+    queue = JobQueue(workers=1, session_factory=TestingSessionLocal, persistent=True)
+
+    with patch("app.services.stats_service.refresh_player_stats", return_value=1):
+        job = queue.enqueue_refresh(team.id, [accounts[0].id])
+        await queue.shutdown()  # "Crash" before the job ran
+
+        restarted = JobQueue(workers=1, session_factory=TestingSessionLocal, persistent=True)
+        assert restarted.get(job.id).status == "queued"
+        await restarted.start()
+        await restarted.join()
+
+    assert restarted.get(job.id).status == "succeeded"
+    assert restarted.get(job.id).matches_fetched == 1
+    await restarted.shutdown()
+
+
+async def test_backfill_job_runs_alongside_refresh(db):
+    """Backfill jobs run the backfill, and only coalesce with other backfills"""
+    team, accounts = create_team_accounts(db, count=1)
+    queue = JobQueue(workers=2, session_factory=TestingSessionLocal, persistent=False)
+    release = asyncio.Event()
+
+    async def slow_refresh(session, riot_account_id):
+        await release.wait()
+        return 0
+
+    async def fake_backfill(session, riot_account_id):
+        await release.wait()
+        return 120
+
+    with patch("app.services.stats_service.refresh_player_stats", side_effect=slow_refresh), \
+         patch("app.services.stats_service.backfill_player_matches", side_effect=fake_backfill):
+        refresh_job = queue.enqueue_refresh(team.id, [accounts[0].id])
+        backfill_job = queue.enqueue_backfill(team.id, [accounts[0].id])
+        assert backfill_job is not refresh_job
+        assert queue.enqueue_backfill(team.id, [accounts[0].id]) is backfill_job
+
+        release.set()
+        await queue.join()
+
+    assert backfill_job.kind == "backfill"
+    assert backfill_job.status == "succeeded"
+    assert backfill_job.matches_fetched == 120
+    assert refresh_job.matches_fetched == 0
+    await queue.shutdown()
+
+
+async def test_refresh_without_accounts_succeeds_empty(db):
+    """A team with no accounts gets an empty job, not an error"""
+    team, _ = create_team_accounts(db, count=0)
+    queue = JobQueue(workers=1, session_factory=TestingSessionLocal, persistent=False)
+
+    job = queue.enqueue_refresh(team.id, [])
+    await queue.join()
+
+    assert job.status == "succeeded"
+    assert (job.accounts_total, job.refreshed, job.failed, job.results) == (0, 0, 0, [])
+    await queue.shutdown()
+
+
+async def test_worker_survives_leaked_cancellation_and_save_errors(db):
+    """A job failing with CancelledError, or whose failure can't be saved, doesn't stop the worker"""
+    team, accounts = create_team_accounts(db)
+    queue = JobQueue(workers=1, session_factory=TestingSessionLocal, persistent=False)
+    save = queue._save
+
+    def failing_save(job):
+        if job.status == "failed":
+            raise RuntimeError("database is locked")
+        save(job)
+
+    outcomes = iter([asyncio.CancelledError(), RuntimeError("boom"), None])
+
+    async def fake_refresh_accounts(riot_accounts, **kwargs):
+        outcome = next(outcomes)
+        if outcome is not None:
+            raise outcome
+
+    with patch("app.services.stats_service.refresh_accounts", side_effect=fake_refresh_accounts), \
+            patch.object(queue, "_save", side_effect=failing_save):
+        cancelled_job = queue.enqueue_refresh(team.id, [accounts[0].id])
+        failed_job = queue.enqueue_refresh(team.id, [accounts[1].id])
+        await queue.join()
+        next_job = queue.enqueue_refresh(team.id, [accounts[0].id])
+        await queue.join()
+
+    assert cancelled_job.status == "failed"
+    assert cancelled_job.errors == [{"account": "*", "error": "Refresh was cancelled"}]
+    assert failed_job.status == "failed"
+    assert next_job.status == "succeeded"
+    await queue.shutdown()
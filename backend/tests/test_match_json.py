@@ -0,0 +1,110 @@
+import copy
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+from app.riot import match_json
+from app.riot.cache import ResponseCache
+from app.riot.client import RiotAPIClient
+from app.riot.match_json import parse_match, project_match
+from app.services.match_import_service import build_match_detail_response
+from app.services.match_payload_service import compress_payload, decompress_payload
+
+SAMPLE_CUSTOM_GAME = Path(__file__).resolve().parents[2] / "response_1.json"
+
+
+def v5_match():
+    """Match V5 payload with a few of the fields ingestion never reads"""
+    participants = []
+    for i in range(10):
+        participants.append({
+            "puuid": f"puuid-{i}", "riotIdGameName": f"Player{i}", "riotIdTagline": "EUW",
+            "championId": i + 1, "championName": f"Champ{i}", "teamId": 100 if i < 5 else 200,
+            "teamPosition": ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"][i % 5], "win": i < 5,
+            "kills": i, "deaths": 2, "assists": 3, "pentaKills": 0, "totalMinionsKilled": 150,
+            "neutralMinionsKilled": 10, "goldEarned": 11000, "visionScore": 20,
+            "totalDamageDealtToChampions": 15000, "totalDamageTaken": 12000,
+            "summoner1Id": 4, "summoner2Id": 14, **{f"item{n}": 1000 + n for n in range(7)},
+            "challenges": {"kda": 3.5, "soloKills": 2}, "perks": {"styles": []}, "missions": {},
+        })
+    return {
+        "metadata": {"matchId": "EUW1_1", "participants": [p["puuid"] for p in participants], "dataVersion": "2"},
+        "info": {
+            "gameCreation": 1772531200000, "gameDuration": 1800, "queueId": 420, "gameVersion": "16.2",
+            "participants": participants,
+            "teams": [
+                {"teamId": 100, "win": True, "bans": [{"championId": 20, "pickTurn": 1}], "objectives": {}},
+                {"teamId": 200, "win": False, "bans": [], "objectives": {}},
+            ],
+        },
+    }
+
+
+def test_v5_projection_drops_unread_fields():
+    match = v5_match()
+    projected = project_match(match)
+
+    participant = projected["info"]["participants"][0]
+    assert "challenges" not in participant and "perks" not in participant
+    assert participant["item6"] == 1006
+    assert "objectives" not in projected["info"]["teams"][0]
+    assert projected["metadata"] == {"matchId": "EUW1_1", "participants": match["metadata"]["participants"]}
+    # The original is left untouched
+    assert "challenges" in match["info"]["participants"][0]
+
+
+def test_projection_keeps_what_readers_need():
+    match = v5_match()
+    projected = parse_match(json.dumps(match).encode())
+    team_puuids = {"puuid-0", "puuid-1"}
+
+    assert build_match_detail_response(projected, "EUW1_1", team_puuids, {}) == \
+        build_match_detail_response(match, "EUW1_1", team_puuids, {})
+    assert RiotAPIClient._game_row("EUW1_1", projected, projected["info"]["participants"][0], 1) == \
+        RiotAPIClient._game_row("EUW1_1", match, match["info"]["participants"][0], 1)
+
+
+def test_custom_game_projection():
+    raw = SAMPLE_CUSTOM_GAME.read_bytes()
+    full = json.loads(raw)
+    projected = parse_match(raw)
+
+    assert len(match_json.dumps(projected)) < len(raw) / 2
+    assert build_match_detail_response(projected, "CUSTOM", set(), {}) == \
+        build_match_detail_response(full, "CUSTOM", set(), {})
+
+
+def test_unknown_shape_left_as_is():
+    assert parse_match(b'{"status": {"status_code": 404}}') == {"status": {"status_code": 404}}
+
+
+def test_stdlib_fallback():
+    match = v5_match()
+    with patch.object(match_json, "orjson", None):
+        body = match_json.dumps(match)
+        assert match_json.loads(body) == match
+        assert decompress_payload(compress_payload(match)[0]) == match
+
+
+async def test_match_details_projected_and_cached():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json=v5_match())
+
+    client = RiotAPIClient(
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        cache=ResponseCache(max_entries=10),
+    )
+
+    first = await client.get_match_details("EUW1_1")
+    second = await client.get_match_details("EUW1_1")
+
+    assert len(calls) == 1
+    assert first == second == project_match(copy.deepcopy(v5_match()))
+    assert "challenges" not in first["info"]["participants"][0]
+    # Other endpoints are returned whole
+    assert "objectives" in (await client._request("https://europe.api.riotgames.com/other"))["info"]["teams"][0]
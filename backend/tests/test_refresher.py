@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.models.game import Game
+from app.models.player import Player
+from app.models.riot_account import RiotAccount
+from app.models.team import Team
+from app.refresher import refresh_spacing, run_forever, run_once, select_accounts_to_refresh
+from tests.conftest import TestingSessionLocal
+
+
+def add_account(db, player, name, last_refreshed_at=None, last_game_date=None):
+    account = RiotAccount(
+        player_id=player.id,
+        puuid=f"puuid-{name}",
+        summoner_name=name,
+        tag_line="EUW",
+        last_refreshed_at=last_refreshed_at,
+    )
+    db.add(account)
+    db.commit()
+    if last_game_date:
+        db.add(Game(
+            riot_account_id=account.id,
+            match_id=f"EUW1_{name}",
+            game_type="soloq",
+            champion_id=1,
+            role="middle",
+            stats={"win": True},
+            game_duration=1800,
+            game_date=last_game_date,
+        ))
+        db.commit()
+    return account
+
+
+def test_select_accounts_orders_by_staleness_and_skips_inactive(db):
+    now = datetime(2026, 3, 1, 12, 0)
+    team = Team(name="Team", access_code="REFRESH")
+    db.add(team)
+    db.commit()
+    player = Player(team_id=team.id, summoner_name="Player", role="mid")
+    db.add(player)
+    db.commit()
+
+    fresh = add_account(db, player, "fresh", now - timedelta(minutes=10), now - timedelta(days=1))
+    stale = add_account(db, player, "stale", now - timedelta(hours=2), now - timedelta(days=1))
+    staler = add_account(db, player, "staler", now - timedelta(hours=5), now - timedelta(days=1))
+    never = add_account(db, player, "never")
+    # Inactive for a month: refreshed 2h ago is recent enough, 2 days ago is not
+    inactive_recent = add_account(db, player, "inactive1", now - timedelta(hours=2), now - timedelta(days=30))
+    inactive_due = add_account(db, player, "inactive2", now - timedelta(days=2), now - timedelta(days=30))
+
+    due = select_accounts_to_refresh(db, now=now)
+
+    assert due == [
+        (team.id, never.id),
+        (team.id, inactive_due.id),
+        (team.id, staler.id),
+        (team.id, stale.id),
+    ]
+    assert (team.id, fresh.id) not in due
+    assert (team.id, inactive_recent.id) not in due
+
+
+def test_refresh_spacing_uses_share_of_slowest_window():
+    # Dev key: 100 requests / 120s is the binding window; half of it for the refresher
+    assert round(refresh_spacing(), 2) == round(5 / (100 / 120 * 0.5), 2)
+
+
+async def test_run_once_queues_one_job_per_due_account(db):
+    team = Team(name="Team", access_code="REFRESH")
+    db.add(team)
+    db.commit()
+    player = Player(team_id=team.id, summoner_name="Player", role="mid")
+    db.add(player)
+    db.commit()
+    first = add_account(db, player, "a")
+    second = add_account(db, player, "b")
+
+    queue = MagicMock()
+    queued = await run_once(session_factory=TestingSessionLocal, queue=queue, spacing=0)
+
+    assert queued == 2
+    assert [c.args for c in queue.enqueue_refresh.call_args_list] == [
+        (team.id, [first.id]),
+        (team.id, [second.id]),
+    ]
+
+
+async def test_failed_pass_logged_with_traceback(caplog):
+    with patch("app.refresher.run_once", side_effect=RuntimeError("db down")), \
+         patch("app.refresher.asyncio.sleep", side_effect=asyncio.CancelledError), \
+         pytest.raises(asyncio.CancelledError):
+        await run_forever()
+
+    [record] = [r for r in caplog.records if r.name == "app.refresher"]
+    assert (record.levelno, record.getMessage()) == (logging.ERROR, "Refresher pass failed")
+    assert record.exc_info[1].args == ("db down",)
@@ -1,9 +1,30 @@
+import asyncio
+
+import httpx
 import pytest
 from unittest.mock import AsyncMock, patch
 from datetime import datetime
 
 from app.models.riot_account import RiotAccount
+from app.riot.cache import LRUCache, ResponseCache, SQLCacheBackend
 from app.riot.client import RiotAPIClient
+from app.riot.http import close_http_client
+from app.riot.rate_limit import RateLimiter, parse_rate_limit_header
+
+
+class FakeClock:
+    """Deterministic monotonic clock whose sleep() just advances time"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
 
 
 @pytest.fixture
@@ -154,47 +175,278 @@ class TestRiotAPIClient:
 
         assert result is None
 
-    @patch('httpx.AsyncClient')
-    async def test_request_with_rate_limit_retry(self, mock_client_class, riot_client):
+    async def test_request_with_rate_limit_retry(self):
         """Test rate limit handling with retry"""
-        # Mock the client and response
-        mock_client = mock_client_class.return_value.__aenter__.return_value
-        mock_response = mock_client.get.return_value
+        calls = []
 
-        # First call returns 429 with Retry-After header
-        mock_response.status_code = 429
-        mock_response.headers = {"Retry-After": "1"}
-        mock_response.raise_for_status.side_effect = Exception("429 Client Error")
+        def handler(request):
+            calls.append(request)
+            # First call returns 429 with Retry-After header, second call succeeds
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "1"})
+            return httpx.Response(200, json={"data": "success"})
 
-        # Second call succeeds
-        def side_effect(*args, **kwargs):
-            if mock_response.status_code == 429:
-                mock_response.status_code = 200
-                mock_response.headers = {}
-                mock_response.raise_for_status.side_effect = None
-                mock_response.json.return_value = {"data": "success"}
-            return mock_response
+        clock = FakeClock()
+        riot_client = RiotAPIClient(
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            limiter=RateLimiter(default_app_limits="", clock=clock, sleep=clock.sleep),
+        )
 
-        mock_client.get.side_effect = side_effect
-
-        with patch('asyncio.sleep') as mock_sleep:
-            result = await riot_client._request("test-url")
+        result = await riot_client._request("https://europe.api.riotgames.com/test-url")
 
         assert result == {"data": "success"}
-        assert mock_sleep.called  # Should have waited due to rate limit
+        assert clock.sleeps == [1]  # Should have waited Retry-After due to rate limit
+        assert len(calls) == 2
 
-    @patch('httpx.AsyncClient')
-    async def test_request_max_retries_exceeded(self, mock_client_class, riot_client):
+    async def test_request_max_retries_exceeded(self):
         """Test max retries exceeded"""
-        mock_client = mock_client_class.return_value.__aenter__.return_value
-        mock_response = mock_client.get.return_value
-
         # Always return an error
-        mock_response.status_code = 500
-        mock_response.raise_for_status.side_effect = Exception("500 Server Error")
+        transport = httpx.MockTransport(lambda request: httpx.Response(500, text="500 Server Error"))
+        riot_client = RiotAPIClient(http_client=httpx.AsyncClient(transport=transport))
 
-        with pytest.raises(Exception) as exc_info:
-            await riot_client._request("test-url", retries=2)
+        with patch('asyncio.sleep'):
+            with pytest.raises(Exception) as exc_info:
+                await riot_client._request("https://europe.api.riotgames.com/test-url", retries=2)
 
         # Should contain the original error message
-        assert "500 Server Error" in str(exc_info.value)
\ No newline at end of file
+        assert "500 Server Error" in str(exc_info.value)
+
+    async def test_fetch_match_details_bounded_concurrency(self, riot_client):
+        """Match details are downloaded in parallel, capped, and returned in order"""
+        in_flight = 0
+        max_in_flight = 0
+
+        async def fake_get_match_details(match_id):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {"metadata": {"matchId": match_id}}
+
+        match_ids = [f"EUW1_{i}" for i in range(10)]
+        with patch.object(riot_client, 'get_match_details', side_effect=fake_get_match_details):
+            result = await riot_client.fetch_match_details(match_ids, concurrency=3)
+
+        assert [m["metadata"]["matchId"] for m in result] == match_ids
+        assert max_in_flight == 3
+
+    async def test_fetch_match_details_propagates_errors(self, riot_client):
+        """A failing download surfaces the original error"""
+        mock_details = AsyncMock(side_effect=ValueError("401 Unauthorized - API key is invalid or expired"))
+        with patch.object(riot_client, 'get_match_details', mock_details):
+            with pytest.raises(ValueError, match="401 Unauthorized"):
+                await riot_client.fetch_match_details(["EUW1_1", "EUW1_2"])
+
+    async def test_clients_share_connection_pool(self):
+        """Test that separate RiotAPIClient instances reuse the same pooled HTTP client"""
+        first = RiotAPIClient()
+        second = RiotAPIClient()
+
+        assert first.http_client is second.http_client
+        assert not first.http_client.is_closed
+
+        pooled = first.http_client
+        await close_http_client()
+        assert pooled.is_closed
+        assert not second.http_client.is_closed  # Re-opened lazily after close
+        await close_http_client()
+
+
+    async def test_pool_of_previous_loop_is_closed(self):
+        """A pool replaced because the event loop changed is closed, not leaked"""
+        from app.riot import http
+
+        old = http.get_http_client()
+        previous_loop = asyncio.new_event_loop()
+        http._client_loop = previous_loop  # As if opened by an earlier loop
+        try:
+            new = http.get_http_client()
+            await asyncio.sleep(0.01)
+        finally:
+            previous_loop.close()
+
+        assert new is not old
+        assert old.is_closed
+        assert not new.is_closed
+        await close_http_client()
+
+
+class TestRateLimiter:
+
+    def test_parse_rate_limit_header(self):
+        assert parse_rate_limit_header("20:1,100:120") == [(20, 1), (100, 120)]
+        assert parse_rate_limit_header(None) == []
+
+    async def test_waits_before_exceeding_app_limit(self):
+        """The third request in a 2-per-second window waits instead of hitting a 429"""
+        clock = FakeClock()
+        limiter = RateLimiter(default_app_limits="2:1", clock=clock, sleep=clock.sleep)
+
+        for _ in range(3):
+            await limiter.acquire("europe.api.riotgames.com", "match-v5.match")
+
+        assert clock.sleeps == [1.0]
+        assert limiter.waits == 1
+        assert limiter.requests == 3
+
+    async def test_hosts_have_separate_app_buckets(self):
+        """europe routing and euw1 platform calls don't share an application quota"""
+        clock = FakeClock()
+        limiter = RateLimiter(default_app_limits="1:10", clock=clock, sleep=clock.sleep)
+
+        await limiter.acquire("europe.api.riotgames.com", "match-v5.match")
+        await limiter.acquire("euw1.api.riotgames.com", "league-v4.entries-by-puuid")
+
+        assert clock.sleeps == []
+
+    async def test_method_limits_and_counts_from_headers(self):
+        """Method buckets are created from headers and synced with Riot's counts"""
+        clock = FakeClock()
+        limiter = RateLimiter(default_app_limits="", clock=clock, sleep=clock.sleep)
+        host = "europe.api.riotgames.com"
+
+        await limiter.acquire(host, "match-v5.match")
+        limiter.update(host, "match-v5.match", {
+            "X-Method-Rate-Limit": "3:10",
+            "X-Method-Rate-Limit-Count": "3:10",  # Another process already used the window
+        })
+
+        snapshot = limiter.snapshot()
+        assert snapshot["methods"][f"{host} match-v5.match"] == [
+            {"limit": 3, "window": 10, "tokens_left": 0}
+        ]
+
+        await limiter.acquire(host, "match-v5.match")
+        assert clock.sleeps == [10.0]
+        # Other methods on the same host are unaffected
+        await limiter.acquire(host, "match-v5.ids-by-puuid")
+        assert clock.sleeps == [10.0]
+
+    async def test_penalize_blocks_host(self):
+        clock = FakeClock()
+        limiter = RateLimiter(default_app_limits="", clock=clock, sleep=clock.sleep)
+
+        limiter.penalize("euw1.api.riotgames.com", 5)
+        await limiter.acquire("euw1.api.riotgames.com", "league-v4.entries-by-puuid")
+
+        assert clock.sleeps == [5]
+        assert limiter.rate_limited == 1
+
+
+class TestResponseCache:
+
+    def test_lru_ttl_and_eviction(self):
+        clock = FakeClock()
+        cache = LRUCache(max_entries=2, clock=clock)
+
+        cache.set("a", 1, ttl=10)
+        cache.set("b", 2, ttl=None)
+        assert cache.get("a") == (True, 1)  # "a" is now most recently used
+        cache.set("c", 3, ttl=None)
+        assert cache.get("b") == (False, None)
+        assert cache.evictions == 1
+
+        clock.now = 10
+        assert cache.get("a") == (False, None)
+        assert cache.expirations == 1
+        assert cache.get("c") == (True, 3)
+
+    async def test_uncached_methods_always_fetch(self):
+        cache = ResponseCache(max_entries=10, policies={"match-v5.match": None})
+        fetch = AsyncMock(return_value=["EUW1_1"])
+
+        await cache.get_or_fetch("match-v5.ids-by-puuid", "url", fetch)
+        await cache.get_or_fetch("match-v5.ids-by-puuid", "url", fetch)
+
+        assert fetch.await_count == 2
+        assert cache.snapshot()["misses"] == 0
+
+    async def test_hit_after_first_fetch(self):
+        cache = ResponseCache(max_entries=10, policies={"match-v5.match": None})
+        fetch = AsyncMock(return_value={"info": {}})
+
+        first = await cache.get_or_fetch("match-v5.match", "url", fetch)
+        second = await cache.get_or_fetch("match-v5.match", "url", fetch)
+
+        assert first == second
+        assert fetch.await_count == 1
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    async def test_concurrent_lookups_are_coalesced(self):
+        cache = ResponseCache(max_entries=10, policies={"match-v5.match": None})
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"metadata": {"matchId": "EUW1_1"}}
+
+        results = await asyncio.gather(*[
+            cache.get_or_fetch("match-v5.match", "url", fetch) for _ in range(5)
+        ])
+
+        assert calls == 1
+        assert all(r == results[0] for r in results)
+        assert cache.coalesced == 4
+
+    async def test_waiters_fetch_again_when_owner_is_cancelled(self):
+        cache = ResponseCache(max_entries=10, policies={"match-v5.match": None})
+        started = asyncio.Event()
+
+        async def hanging_fetch():
+            started.set()
+            await asyncio.sleep(10)
+
+        owner = asyncio.create_task(cache.get_or_fetch("match-v5.match", "url", hanging_fetch))
+        await started.wait()
+        waiter = asyncio.create_task(
+            cache.get_or_fetch("match-v5.match", "url", AsyncMock(return_value={"ok": True}))
+        )
+        await asyncio.sleep(0)
+        owner.cancel()
+
+        assert await waiter == {"ok": True}
+        assert owner.cancelled()
+        assert (cache.misses, cache.coalesced) == (2, 0)
+
+    async def test_errors_are_not_cached(self):
+        cache = ResponseCache(max_entries=10, policies={"match-v5.match": None})
+        fetch = AsyncMock(side_effect=[ValueError("boom"), {"ok": True}])
+
+        with pytest.raises(ValueError):
+            await cache.get_or_fetch("match-v5.match", "url", fetch)
+        assert await cache.get_or_fetch("match-v5.match", "url", fetch) == {"ok": True}
+
+    async def test_shared_backend_serves_other_processes(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'riot_cache.db'}"
+        policies = {"summoner-v4.by-puuid": 60}
+        writer = ResponseCache(max_entries=10, backend=SQLCacheBackend(url), policies=policies)
+        reader = ResponseCache(max_entries=10, backend=SQLCacheBackend(url), policies=policies)
+
+        await writer.get_or_fetch("summoner-v4.by-puuid", "url", AsyncMock(return_value={"id": "s1"}))
+        fetch = AsyncMock()
+        assert await reader.get_or_fetch("summoner-v4.by-puuid", "url", fetch) == {"id": "s1"}
+
+        fetch.assert_not_awaited()
+        assert reader.shared_hits == 1
+
+    async def test_client_requests_go_through_cache(self):
+        hits = 0
+
+        def handler(request):
+            nonlocal hits
+            hits += 1
+            return httpx.Response(200, json={"puuid": "p1"})
+
+        cache = ResponseCache(max_entries=10, policies={"summoner-v4.by-puuid": 60})
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+            client = RiotAPIClient(
+                http_client=http, limiter=RateLimiter(default_app_limits=""), cache=cache
+            )
+            await client.get_summoner_by_puuid("p1")
+            await client.get_summoner_by_puuid("p1")
+
+        assert hits == 1
@@ -1,3 +1,4 @@
+import copy
 import pytest
 from datetime import datetime
 from unittest.mock import AsyncMock, patch
@@ -5,7 +6,10 @@ from unittest.mock import AsyncMock, patch
 from app.models.game import Game
 from app.models.player import Player
 from app.models.riot_account import RiotAccount
-from app.riot.client import RiotAPIClient
+from app.models.match_payload import MatchPayload
+from app.models.rejected_match import RejectedMatch
+from app.riot.client import SEASON_26_START, RiotAPIClient, ingestion_report, match_listings
+from app.services.match_payload_service import get_match_payload, store_match_payload
 
 
 @pytest.fixture
@@ -351,4 +355,472 @@ class TestRiotIntegration:
 
             # Should still be only 1 game
             games = db.query(Game).filter(Game.riot_account_id == riot_account.id).all()
-            assert len(games) == 1
\ No newline at end of file
+            assert len(games) == 1
+
+
+@pytest.fixture
+def team_riot_account(db, team):
+    """Riot account (puuid test-puuid) on a player of the `team` fixture"""
+    player = Player(team_id=team.id, summoner_name="TestPlayer", role="adc")
+    db.add(player)
+    db.commit()
+    riot_account = RiotAccount(
+        player_id=player.id,
+        puuid="test-puuid",
+        summoner_name="TestSummoner",
+        tag_line="TEST",
+    )
+    db.add(riot_account)
+    db.commit()
+    return riot_account
+
+
+class TestMatchPayloadStore:
+
+    async def test_ingestion_stores_match_payload(self, db, team_riot_account, season_26_match_data):
+        """The downloaded payload is kept, compressed, alongside the new game"""
+        client = RiotAPIClient()
+
+        with patch.object(client, 'get_match_ids_by_puuid', new_callable=AsyncMock) as mock_get_ids, \
+             patch.object(client, 'get_match_details', new_callable=AsyncMock) as mock_get_details:
+            mock_get_ids.return_value = ["EUW1_987654321"]
+            mock_get_details.return_value = season_26_match_data
+
+            await client.fetch_and_store_matches(db, team_riot_account)
+
+        assert get_match_payload(db, "EUW1_987654321") == season_26_match_data
+        stored = db.get(MatchPayload, "EUW1_987654321")
+        assert len(stored.payload) < stored.raw_size
+
+    async def test_stored_payload_keeps_unprojected_fields(self, db, team_riot_account, season_26_match_data):
+        """The payload store gets the body Riot sent; ingestion and the cache get the projection"""
+        import httpx
+
+        from app.riot.cache import ResponseCache
+        from app.riot.rate_limit import RateLimiter
+
+        season_26_match_data["info"]["participants"][0]["challenges"] = {"soloKills": 2}
+        cache = ResponseCache(max_entries=10)
+        http = httpx.AsyncClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, json=season_26_match_data)
+        ))
+        client = RiotAPIClient(http_client=http, limiter=RateLimiter(default_app_limits=""), cache=cache)
+
+        with patch.object(client, 'get_match_ids_by_puuid', new_callable=AsyncMock) as mock_get_ids:
+            mock_get_ids.return_value = ["EUW1_987654321"]
+            await client.fetch_and_store_matches(db, team_riot_account)
+
+        assert get_match_payload(db, "EUW1_987654321") == season_26_match_data
+        cached = await client.get_match_details("EUW1_987654321")
+        assert "challenges" not in cached["info"]["participants"][0]
+
+    def test_match_details_served_without_riot_call(
+        self, client, db, auth_headers, team_riot_account, season_26_match_data
+    ):
+        """GET /games/{id}/details reads the stored payload and never calls Riot"""
+        season_26_match_data["info"]["teams"] = [
+            {"teamId": 100, "win": True, "bans": []},
+            {"teamId": 200, "win": False, "bans": []},
+        ]
+        game = Game(
+            riot_account_id=team_riot_account.id,
+            match_id="EUW1_987654321",
+            game_type="soloq",
+            champion_id=3,
+            role="bottom",
+            stats={"win": True},
+            game_duration=2100,
+            game_date=datetime(2026, 1, 10),
+        )
+        db.add(game)
+        store_match_payload(db, "EUW1_987654321", season_26_match_data)
+        db.commit()
+
+        with patch('app.routers.games.riot_client.get_match_details', new_callable=AsyncMock) as mock_details:
+            response = client.get(f"/api/v1/games/{game.id}/details", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["match_id"] == "EUW1_987654321"
+        mock_details.assert_not_called()
+
+
+    def test_match_details_stored_concurrently(
+        self, client, db, auth_headers, team_riot_account, season_26_match_data
+    ):
+        """Two detail requests for the same uncached match both succeed"""
+        from sqlalchemy.orm import Session
+
+        from tests.conftest import TestingSessionLocal
+
+        season_26_match_data["info"]["teams"] = []
+        game = Game(
+            riot_account_id=team_riot_account.id,
+            match_id="EUW1_987654321",
+            game_type="soloq",
+            champion_id=3,
+            role="bottom",
+            stats={"win": True},
+            game_duration=2100,
+            game_date=datetime(2026, 1, 10),
+        )
+        db.add(game)
+        db.commit()
+
+        async def details_stored_meanwhile(match_id):
+            other = TestingSessionLocal()
+            store_match_payload(other, match_id, season_26_match_data)
+            other.commit()
+            other.close()
+            return season_26_match_data
+
+        session_get = Session.get
+
+        def get_before_other_commit(session, entity, ident, **kwargs):
+            # The other request's payload isn't visible to this one yet
+            return None if entity is MatchPayload else session_get(session, entity, ident, **kwargs)
+
+        with patch.object(Session, 'get', get_before_other_commit), \
+             patch('app.routers.games.riot_client.get_match_details', side_effect=details_stored_meanwhile):
+            response = client.get(f"/api/v1/games/{game.id}/details", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert db.query(MatchPayload).count() == 1
+
+
+class TestBulkIngestion:
+
+    async def test_existing_ids_checked_in_one_query(self, db, team_riot_account, season_26_match_data):
+        """Known match ids are never downloaded again"""
+        db.add(Game(
+            riot_account_id=team_riot_account.id,
+            match_id="EUW1_111",
+            game_type="soloq",
+            champion_id=3,
+            role="bottom",
+            stats={"win": True},
+            game_duration=2100,
+            game_date=datetime(2026, 1, 10),
+        ))
+        db.commit()
+        client = RiotAPIClient()
+
+        with patch.object(client, 'get_match_ids_by_puuid', new_callable=AsyncMock) as mock_get_ids, \
+             patch.object(client, 'get_match_details', new_callable=AsyncMock) as mock_get_details:
+            mock_get_ids.return_value = ["EUW1_111", "EUW1_987654321"]
+            mock_get_details.return_value = season_26_match_data
+
+            new_games = await client.fetch_and_store_matches(db, team_riot_account)
+
+        assert new_games == 1
+        mock_get_details.assert_awaited_once_with("EUW1_987654321")
+        assert db.query(Game).count() == 2
+
+    async def test_concurrent_insert_of_same_match_is_skipped(self, db, team_riot_account, season_26_match_data):
+        """A duo partner's refresh storing the match first doesn't fail this refresh"""
+        from tests.conftest import TestingSessionLocal
+
+        client = RiotAPIClient()
+
+        async def details_stored_meanwhile(match_id):
+            other = TestingSessionLocal()
+            other.add(Game(
+                riot_account_id=team_riot_account.id,
+                match_id=match_id,
+                game_type="soloq",
+                champion_id=3,
+                role="bottom",
+                stats={"win": True},
+                game_duration=2100,
+                game_date=datetime(2026, 1, 10),
+            ))
+            store_match_payload(other, match_id, season_26_match_data)
+            other.commit()
+            other.close()
+            return season_26_match_data
+
+        with patch.object(client, 'get_match_ids_by_puuid', new_callable=AsyncMock) as mock_get_ids, \
+             patch.object(client, 'get_match_details', side_effect=details_stored_meanwhile):
+            mock_get_ids.return_value = ["EUW1_987654321"]
+
+            new_games = await client.fetch_and_store_matches(db, team_riot_account)
+
+        assert new_games == 0
+        assert db.query(Game).filter(Game.match_id == "EUW1_987654321").count() == 1
+
+
+class TestSharedMatches:
+
+    async def test_match_stored_for_every_team_participant(self, db, team, team_riot_account, season_26_match_data):
+        """One download yields a row for each of our accounts in the match"""
+        partner = Player(team_id=team.id, summoner_name="Partner", role="support")
+        db.add(partner)
+        db.commit()
+        partner_account = RiotAccount(
+            player_id=partner.id, puuid="teammate1-puuid", summoner_name="Partner", tag_line="TEST"
+        )
+        db.add(partner_account)
+        db.commit()
+        client = RiotAPIClient()
+
+        with patch.object(client, 'get_match_ids_by_puuid', new_callable=AsyncMock) as mock_get_ids, \
+             patch.object(client, 'get_match_details', new_callable=AsyncMock) as mock_get_details:
+            mock_get_ids.return_value = ["EUW1_987654321"]
+            mock_get_details.return_value = season_26_match_data
+
+            assert await client.fetch_and_store_matches(db, team_riot_account) == 2
+            # The partner's own refresh finds its row already there: no download
+            assert await client.fetch_and_store_matches(db, partner_account) == 0
+
+        assert mock_get_details.await_count == 1
+        rows = {g.riot_account_id: g for g in db.query(Game).filter(Game.match_id == "EUW1_987654321")}
+        assert set(rows) == {team_riot_account.id, partner_account.id}
+        assert rows[partner_account.id].champion_id != rows[team_riot_account.id].champion_id
+
+    async def test_teammate_rows_dont_advance_own_cursor(self, db, team_riot_account, season_26_match_data):
+        """Incremental fetch starts after the newest match of the account's own listing"""
+        db.add(Game(
+            riot_account_id=team_riot_account.id,
+            match_id="EUW1_FROM_PARTNER",
+            game_type="soloq",
+            champion_id=3,
+            role="bottom",
+            stats={"win": True},
+            game_duration=2100,
+            game_date=datetime(2026, 3, 1),
+        ))
+        team_riot_account.last_match_at = datetime(2026, 2, 1)
+        db.commit()
+        client = RiotAPIClient()
+
+        with patch.object(client, 'get_match_ids_by_puuid', new_callable=AsyncMock) as mock_get_ids:
+            mock_get_ids.return_value = []
+            await client.fetch_and_store_matches(db, team_riot_account)
+
+        assert mock_get_ids.await_args.kwargs["start_time"] == int(datetime(2026, 2, 1).timestamp()) + 1
+
+
+class TestTypedStatColumns:
+
+    async def test_ingestion_writes_json_and_typed_columns(self, db, team_riot_account, season_26_match_data):
+        client = RiotAPIClient()
+
+        with patch.object(client, 'get_match_ids_by_puuid', new_callable=AsyncMock) as mock_get_ids, \
+             patch.object(client, 'get_match_details', new_callable=AsyncMock) as mock_get_details:
+            mock_get_ids.return_value = ["EUW1_987654321"]
+            mock_get_details.return_value = season_26_match_data
+
+            await client.fetch_and_store_matches(db, team_riot_account)
+
+        game = db.query(Game).filter(Game.riot_account_id == team_riot_account.id).one()
+        assert (game.kills, game.deaths, game.assists) == (8, 3, 12)
+        assert game.kda == game.stats["kda"]
+        assert game.win is True
+        assert game.queue_id == 420
+
+    def test_orm_games_mirror_stats(self, db, team_riot_account):
+        game = Game(
+            riot_account_id=team_riot_account.id,
+            match_id="EUW1_1",
+            game_type="soloq",
+            champion_id=1,
+            role="top",
+            stats={"kills": 2, "kp": 40.0, "win": False},
+            game_duration=1800,
+            game_date=datetime(2026, 2, 1),
+        )
+        db.add(game)
+        db.commit()
+
+        assert (game.kills, game.kp, game.win, game.kda) == (2, 40.0, False, 0.0)
+
+
+def listed_match(season_26_match_data, match_id):
+    """Copy of the Season 26 match under another id"""
+    match_data = copy.deepcopy(season_26_match_data)
+    match_data["metadata"]["matchId"] = match_id
+    return match_data
+
+
+class TestMatchHistoryBackfill:
+
+    async def test_incremental_fetch_pages_through_every_new_match(
+        self, db, team_riot_account, season_26_match_data
+    ):
+        """More than a page of games since the last refresh are all stored"""
+        team_riot_account.last_match_at = datetime(2026, 1, 9, 12)
+        db.commit()
+        ids = [f"EUW1_{i}" for i in range(130)]
+        client = RiotAPIClient()
+
+        async def list_ids(puuid, start=0, count=100, **kwargs):
+            return ids[start:start + count]
+
+        async def details(match_id):
+            return listed_match(season_26_match_data, match_id)
+
+        with patch.object(client, 'get_match_ids_by_puuid', side_effect=list_ids) as mock_get_ids, \
+             patch.object(client, 'get_match_details', side_effect=details):
+            new_games = await client.fetch_and_store_matches(db, team_riot_account)
+
+        assert new_games == 130
+        assert [call.kwargs["start"] for call in mock_get_ids.await_args_list] == [0, 100]
+
+    async def test_backfill_resumes_from_cursor(self, db, team_riot_account, season_26_match_data):
+        """Each page is committed with the cursor: a failed crawl resumes where it stopped"""
+        ids = [f"EUW1_{i}" for i in range(150)]
+        client = RiotAPIClient()
+        fail_second_page = True
+
+        async def list_ids(puuid, start=0, count=100, **kwargs):
+            if start == 100 and fail_second_page:
+                raise Exception("429 Too Many Requests")
+            return ids[start:start + count]
+
+        async def details(match_id):
+            return listed_match(season_26_match_data, match_id)
+
+        with patch.object(client, 'get_match_ids_by_puuid', side_effect=list_ids) as mock_get_ids, \
+             patch.object(client, 'get_match_details', side_effect=details):
+            with pytest.raises(Exception):
+                await client.backfill_matches(db, team_riot_account)
+
+            assert db.query(Game).count() == 100
+            assert team_riot_account.backfill_offset == 100
+            assert team_riot_account.backfill_completed_at is None
+            window_end = team_riot_account.backfill_until
+            assert mock_get_ids.await_args.kwargs["end_time"] == int(window_end.timestamp())
+
+            fail_second_page = False
+            assert await client.backfill_matches(db, team_riot_account) == 50
+            assert mock_get_ids.await_args.kwargs["start"] == 100
+            assert team_riot_account.backfill_until == window_end
+            assert team_riot_account.backfill_completed_at is not None
+
+            # Nothing left to crawl
+            calls = mock_get_ids.await_count
+            assert await client.backfill_matches(db, team_riot_account) == 0
+            assert mock_get_ids.await_count == calls
+
+        assert db.query(Game).count() == 150
+
+
+class TestQueueFilters:
+
+    def test_match_listings(self):
+        assert match_listings({420}) == [{"queue": 420}]
+        assert match_listings({420, 440}) == [{"match_type": "ranked"}]
+        assert match_listings({420, 0, 3100}) == [{"queue": 0}, {"queue": 420}, {"queue": 3100}]
+
+    async def test_listing_asks_riot_for_allowed_queues_only(self, db, team_riot_account, season_26_match_data):
+        client = RiotAPIClient()
+
+        with patch.object(client, 'get_match_ids_by_puuid', new_callable=AsyncMock) as mock_get_ids, \
+             patch.object(client, 'get_match_details', new_callable=AsyncMock) as mock_get_details:
+            mock_get_ids.return_value = ["EUW1_987654321"]
+            mock_get_details.return_value = season_26_match_data
+            await client.fetch_and_store_matches(db, team_riot_account)
+
+        kwargs = mock_get_ids.await_args.kwargs
+        assert kwargs["queue"] == 420
+        assert kwargs["start_time"] == int(SEASON_26_START.timestamp())
+
+    async def test_team_customs_stored_as_competitive(self, db, team, team_riot_account, season_26_match_data):
+        team.allowed_queues = [0, 420]
+        db.commit()
+        custom = listed_match(season_26_match_data, "EUW1_CUSTOM")
+        custom["info"]["queueId"] = 0
+        client = RiotAPIClient()
+
+        async def list_ids(puuid, queue=None, **kwargs):
+            return {0: ["EUW1_CUSTOM"], 420: ["EUW1_987654321"]}[queue]
+
+        async def details(match_id):
+            return custom if match_id == "EUW1_CUSTOM" else season_26_match_data
+
+        with patch.object(client, 'get_match_ids_by_puuid', side_effect=list_ids) as mock_get_ids, \
+             patch.object(client, 'get_match_details', side_effect=details):
+            assert await client.fetch_and_store_matches(db, team_riot_account) == 2
+
+        assert mock_get_ids.await_count == 2
+        game_types = {g.match_id: g.game_type for g in db.query(Game)}
+        assert game_types == {"EUW1_CUSTOM": "competitive", "EUW1_987654321": "soloq"}
+
+    def test_changing_queues_restarts_backfill(self, db, team, team_riot_account):
+        from app.schemas.admin import TeamUpdate
+        from app.services.admin_service import update_team
+
+        team_riot_account.backfill_until = datetime(2026, 3, 1)
+        team_riot_account.backfill_offset = 40
+        team_riot_account.backfill_completed_at = datetime(2026, 3, 1)
+        db.commit()
+
+        update_team(db, team.id, TeamUpdate(allowed_queues=[420]))
+        db.refresh(team_riot_account)
+        assert team_riot_account.backfill_completed_at is not None
+
+        update_team(db, team.id, TeamUpdate(allowed_queues=[440, 420]))
+        db.refresh(team_riot_account)
+        assert team.allowed_queues == [420, 440]
+        assert team_riot_account.backfill_until is None
+        assert team_riot_account.backfill_offset == 0
+        assert team_riot_account.backfill_completed_at is None
+
+
+class TestRejectedMatches:
+
+    async def test_rejected_match_not_looked_at_again(
+        self, db, team_riot_account, sample_match_data, season_26_match_data
+    ):
+        """A pre-season match listed again is skipped without a payload read or Riot call"""
+        client = RiotAPIClient()
+
+        with patch.object(client, 'get_match_ids_by_puuid', new_callable=AsyncMock) as mock_get_ids, \
+             patch.object(client, 'get_match_details', new_callable=AsyncMock) as mock_get_details:
+            mock_get_ids.return_value = ["EUW1_123456789"]
+            mock_get_details.return_value = sample_match_data
+            assert await client.fetch_and_store_matches(db, team_riot_account) == 0
+
+        rejected = db.query(RejectedMatch).one()
+        assert (rejected.match_id, rejected.reason) == ("EUW1_123456789", "season")
+        # Rejected payloads are not kept
+        assert get_match_payload(db, "EUW1_123456789") is None
+
+        db.info.clear()
+        with patch.object(client, 'get_match_ids_by_puuid', new_callable=AsyncMock) as mock_get_ids, \
+             patch.object(client, 'get_match_details', new_callable=AsyncMock) as mock_get_details, \
+             patch("app.riot.client.get_match_payloads", return_value={}) as mock_payloads:
+            mock_get_ids.return_value = ["EUW1_123456789", "EUW1_987654321"]
+            mock_get_details.return_value = season_26_match_data
+            assert await client.fetch_and_store_matches(db, team_riot_account) == 1
+
+        assert [c.args[0] for c in mock_get_details.await_args_list] == ["EUW1_987654321"]
+        assert mock_payloads.call_args.args[1] == ["EUW1_987654321"]
+        report = ingestion_report(db)
+        assert (report.listed, report.skipped_rejected, report.downloaded, report.new_games) == (2, 1, 1, 1)
+        assert report.riot_calls_saved == 1
+
+    async def test_payload_store_counts_as_saved_call(self, db, team_riot_account, season_26_match_data):
+        store_match_payload(db, "EUW1_987654321", season_26_match_data)
+        db.commit()
+        client = RiotAPIClient()
+
+        with patch.object(client, 'get_match_ids_by_puuid', new_callable=AsyncMock) as mock_get_ids, \
+             patch.object(client, 'get_match_details', new_callable=AsyncMock) as mock_get_details:
+            mock_get_ids.return_value = ["EUW1_987654321"]
+            assert await client.fetch_and_store_matches(db, team_riot_account) == 1
+
+        mock_get_details.assert_not_awaited()
+        assert ingestion_report(db).as_dict()["riot_calls_saved"] == 1
+
+    def test_changing_queues_clears_queue_rejections(self, db, team, team_riot_account):
+        from app.schemas.admin import TeamUpdate
+        from app.services.admin_service import update_team
+
+        db.add_all([
+            RejectedMatch(riot_account_id=team_riot_account.id, match_id="EUW1_1", reason="queue"),
+            RejectedMatch(riot_account_id=team_riot_account.id, match_id="EUW1_2", reason="season"),
+        ])
+        db.commit()
+
+        update_team(db, team.id, TeamUpdate(allowed_queues=[420, 440]))
+        assert [r.match_id for r in db.query(RejectedMatch)] == ["EUW1_2"]
@@ -0,0 +1,110 @@
+import json
+import logging
+from unittest.mock import patch
+
+import httpx
+
+from app.logging_config import JSONFormatter, KeyValueFormatter
+from app.riot.cache import ResponseCache
+from app.riot.client import RiotAPIClient
+from app.riot.metrics import RiotMetrics
+from app.riot.rate_limit import RateLimiter
+
+URL = "https://europe.api.riotgames.com/lol/match/v5/matches/EUW1_1"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_client(handler, metrics, limiter=None):
+    clock = FakeClock()
+    return RiotAPIClient(
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        limiter=limiter or RateLimiter(default_app_limits="", clock=clock, sleep=clock.sleep),
+        cache=ResponseCache(max_entries=10),
+        metrics=metrics,
+    )
+
+
+async def test_attempts_retries_and_sizes_recorded():
+    responses = iter([httpx.Response(503, text="down"), httpx.Response(200, json={"ok": True})])
+    metrics = RiotMetrics()
+    client = make_client(lambda request: next(responses), metrics)
+
+    with patch("app.riot.client.asyncio.sleep"):
+        assert await client._request(URL, method="match-v5.ids-by-puuid") == {"ok": True}
+
+    assert dict(metrics.requests) == {("match-v5.ids-by-puuid", "503"): 1, ("match-v5.ids-by-puuid", "200"): 1}
+    assert dict(metrics.retries) == {("match-v5.ids-by-puuid", "5xx"): 1}
+    assert metrics.latency.count("match-v5.ids-by-puuid") == 2
+    assert metrics.response_bytes.count("match-v5.ids-by-puuid") == 2
+
+
+async def test_rate_limit_sleeps_and_429s_recorded():
+    responses = iter([httpx.Response(429, headers={"Retry-After": "2"}), httpx.Response(200, json={})])
+    metrics = RiotMetrics()
+    client = make_client(lambda request: next(responses), metrics)
+
+    await client._request(URL, method="summoner-v4.by-puuid")
+
+    assert dict(metrics.retries) == {("summoner-v4.by-puuid", "429"): 1}
+    assert metrics.rate_limit_sleeps["summoner-v4.by-puuid"] == 1
+    assert metrics.rate_limit_sleep_seconds["summoner-v4.by-puuid"] == 2
+
+
+async def test_transport_errors_counted():
+    def handler(request):
+        raise httpx.ConnectError("refused")
+
+    metrics = RiotMetrics()
+    client = make_client(handler, metrics)
+
+    with patch("app.riot.client.asyncio.sleep"):
+        try:
+            await client._request(URL, method="summoner-v4.by-puuid", retries=2)
+        except httpx.ConnectError:
+            pass
+
+    assert metrics.requests[("summoner-v4.by-puuid", "error")] == 2
+    assert metrics.retries[("summoner-v4.by-puuid", "error")] == 1
+
+
+def test_prometheus_histogram_format():
+    metrics = RiotMetrics()
+    metrics.observe_response("match-v5.match", 200, 0.2, 20000)
+    metrics.observe_response("match-v5.match", 200, 3.0, 30000)
+
+    lines = metrics.render()
+
+    assert 'riot_requests_total{method="match-v5.match",status="200"} 2' in lines
+    assert 'riot_request_duration_seconds_bucket{method="match-v5.match",le="0.25"} 1' in lines
+    assert 'riot_request_duration_seconds_bucket{method="match-v5.match",le="+Inf"} 2' in lines
+    assert 'riot_request_duration_seconds_count{method="match-v5.match"} 2' in lines
+    assert 'riot_response_bytes_bucket{method="match-v5.match",le="65536"} 2' in lines
+
+
+def test_metrics_endpoint(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE riot_requests_total counter" in response.text
+    assert "riot_cache_misses_total" in response.text
+
+
+def test_log_formatters_render_extra_fields():
+    record = logging.LogRecord("app.riot.client", logging.WARNING, "", 0, "Riot API HTTP error", None, None)
+    record.method = "match-v5.match"
+    record.status = 503
+
+    assert KeyValueFormatter().format(record).endswith("Riot API HTTP error method=match-v5.match status=503")
+    entry = json.loads(JSONFormatter().format(record))
+    assert (entry["message"], entry["method"], entry["status"]) == ("Riot API HTTP error", "match-v5.match", 503)
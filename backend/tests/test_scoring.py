@@ -0,0 +1,115 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.models.game import Game
+from app.models.player import Player
+from app.models.riot_account import RiotAccount
+from app.models.tier_list import ChampionTier
+from app.services.scoring_service import (
+    DEFAULT_BENCHMARKS,
+    ROLE_BENCHMARKS,
+    ChampionBatch,
+    score_batch,
+)
+from app.services.tier_list_service import (
+    calculate_performance_score,
+    get_player_champion_stats,
+    get_team_champion_stats,
+)
+
+
+def rollup_row(player_id, champion_id, games, wins, kda, cs, gold, vision, kp, damage_per_min):
+    return SimpleNamespace(
+        player_id=player_id, champion_id=champion_id, games=games, wins=wins,
+        sum_kda=kda * games, sum_cs_per_min=cs * games, sum_gold_per_min=gold * games,
+        sum_vision_per_min=vision * games, sum_kp=kp * games,
+        damage=damage_per_min * 30 * games, duration=1800 * games,
+    )
+
+
+def test_score_batch_matches_scalar_score():
+    rows = [
+        rollup_row(1, 1, 10, 6, 4.0, 8.0, 450, 1.5, 70, 600),
+        rollup_row(1, 2, 4, 1, 2.0, 6.0, 380, 0.8, 45, 420),
+        rollup_row(2, 1, 2, 0, 0.5, 1.0, 250, 3.0, 80, 200),
+    ]
+    batch = ChampionBatch.from_rows(rows)
+    scored = score_batch(batch, [DEFAULT_BENCHMARKS] * len(batch))
+
+    assert scored.score[0] == 100
+    for i in range(len(batch)):
+        assert scored.score[i] == calculate_performance_score(
+            scored.winrate[i], scored.kda[i], scored.cs_per_min[i], scored.gold_per_min[i],
+            scored.vision_per_min[i], scored.damage_per_min[i], scored.kp[i],
+        )
+
+
+def test_role_benchmarks_change_score():
+    # A typical good support game: few CS, lots of vision
+    batch = ChampionBatch.from_rows([rollup_row(1, 16, 10, 6, 3.5, 1.5, 300, 3.0, 75, 350)])
+    default = score_batch(batch, [DEFAULT_BENCHMARKS]).score[0]
+    support = score_batch(batch, [ROLE_BENCHMARKS["support"]]).score[0]
+    assert support == 100
+    assert default < support
+
+
+@pytest.fixture
+def players(db, team):
+    mid = Player(team_id=team.id, summoner_name="Mid", role="mid")
+    support = Player(team_id=team.id, summoner_name="Support", role="support")
+    db.add_all([mid, support])
+    db.commit()
+    for player, puuid in ((mid, "puuid1"), (support, "puuid2")):
+        db.add(RiotAccount(player_id=player.id, puuid=puuid, summoner_name=player.summoner_name, tag_line="EUW"))
+    db.commit()
+    return mid, support
+
+
+def add_game(db, player, match_id, champion_id, win=True):
+    db.add(Game(
+        riot_account_id=player.riot_accounts[0].id, match_id=match_id, game_type="soloq",
+        champion_id=champion_id, role="middle", game_duration=1800, game_date=datetime(2026, 2, 1),
+        stats={"kills": 5, "deaths": 2, "assists": 5, "kda": 5.0, "cs_per_min": 1.5, "vision_per_min": 3.0,
+               "gold_per_min": 300.0, "kp": 75.0, "damage_dealt": 10500, "win": win},
+    ))
+    db.commit()
+
+
+def test_team_champion_stats_scored_per_role(db, team, players):
+    mid, support = players
+    add_game(db, mid, "m1", champion_id=1)
+    add_game(db, support, "m1", champion_id=16)
+    add_game(db, support, "m2", champion_id=12, win=False)
+    db.add(ChampionTier(player_id=support.id, champion_id=16, tier="S"))
+    db.commit()
+
+    stats = get_team_champion_stats(db, team.id)
+
+    assert [c.champion_id for c in stats[support.id]] == [16, 12]
+    assert stats[support.id][0].tier == "S"
+    assert stats[support.id][1].tier is None
+    # Identical games, scored against each role's benchmarks
+    assert stats[support.id][0].performance_score > stats[mid.id][0].performance_score
+    assert stats[mid.id][0].tier is None
+
+
+def test_champion_scores_cached_until_new_games(db, players):
+    mid, _ = players
+    add_game(db, mid, "m1", champion_id=1)
+    first = get_player_champion_stats(db, mid.id)
+    assert [c.games_played for c in first] == [1]
+
+    with patch("app.services.tier_list_service.score_batch", side_effect=AssertionError("cache miss")):
+        assert get_player_champion_stats(db, mid.id) == first
+
+    # Tier changes don't need a rescore
+    db.add(ChampionTier(player_id=mid.id, champion_id=1, tier="A"))
+    db.commit()
+    with patch("app.services.tier_list_service.score_batch", side_effect=AssertionError("cache miss")):
+        assert get_player_champion_stats(db, mid.id)[0].tier == "A"
+
+    add_game(db, mid, "m2", champion_id=1, win=False)
+    assert get_player_champion_stats(db, mid.id)[0].games_played == 2
@@ -1,15 +1,16 @@
+from datetime import UTC, datetime
+
 import pytest
-from datetime import datetime
 
 from app.models.game import Game
 from app.models.player import Player
 from app.models.riot_account import RiotAccount
-from app.services.stats_service import get_player_stats
+from app.services.stats_service import get_lane_stats, get_player_stats, get_players_stats
 
 
-def test_get_player_stats_no_games(db):
+def test_get_player_stats_no_games(db, team):
     """Test stats for player with no games"""
-    player = Player(summoner_name="TestPlayer", role="top")
+    player = Player(team_id=team.id, summoner_name="TestPlayer", role="top")
     db.add(player)
     db.commit()
 
@@ -28,10 +29,10 @@ def test_get_player_stats_no_games(db):
     assert stats.winrate == 0.0
 
 
-def test_get_player_stats_with_games(db):
+def test_get_player_stats_with_games(db, team):
     """Test stats calculation with actual games"""
     # Create player and riot account
-    player = Player(summoner_name="TestPlayer", role="mid")
+    player = Player(team_id=team.id, summoner_name="TestPlayer", role="mid")
     db.add(player)
     db.commit()  # Commit player first to get ID
 
@@ -100,9 +101,9 @@ def test_get_player_stats_with_games(db):
     assert stats.winrate == 50.0  # 1 win out of 2 games
 
 
-def test_get_player_stats_multiple_accounts(db):
+def test_get_player_stats_multiple_accounts(db, team):
     """Test stats aggregation across multiple riot accounts"""
-    player = Player(summoner_name="TestPlayer", role="adc")
+    player = Player(team_id=team.id, summoner_name="TestPlayer", role="adc")
     db.add(player)
     db.commit()  # Commit player first
 
@@ -149,4 +150,256 @@ def test_get_player_stats_multiple_accounts(db):
     assert stats is not None
     assert stats.total_games == 2  # Games from both accounts
     assert abs(stats.avg_kda - 4.58) < 0.01  # (7.5 + 1.67) / 2
-    assert stats.winrate == 50.0
\ No newline at end of file
+    assert stats.winrate == 50.0
+
+
+def test_get_players_stats_batched(db, team):
+    """Several players' stats come from a fixed number of queries"""
+    from sqlalchemy import event
+
+    adc = Player(team_id=team.id, summoner_name="Adc", role="adc")
+    support = Player(team_id=team.id, summoner_name="Support", role="support")
+    mid = Player(team_id=team.id, summoner_name="Mid", role="mid")
+    db.add_all([adc, support, mid])
+    db.commit()
+    adc_account = RiotAccount(player_id=adc.id, puuid="puuid1", summoner_name="Adc1", tag_line="T1", wins=6, losses=4)
+    support_account = RiotAccount(player_id=support.id, puuid="puuid2", summoner_name="Support1", tag_line="T2")
+    db.add_all([adc_account, support_account])
+    db.commit()
+    for index, (account, win) in enumerate([(adc_account, True), (adc_account, False), (support_account, True)]):
+        db.add(Game(
+            riot_account_id=account.id, match_id=f"match{index}", game_type="soloq", champion_id=1,
+            role="bottom", stats={"kills": 2, "deaths": 1, "assists": 4, "kda": 6.0, "win": win},
+            game_duration=1800, game_date=datetime.utcnow(), is_pentakill=False,
+        ))
+    db.commit()
+    adc_id, support_id, mid_id, team_id = adc.id, support.id, mid.id, team.id
+    db.expire_all()
+
+    statements = []
+    bind = db.get_bind()
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(bind, "before_cursor_execute", listener)
+    try:
+        stats = get_players_stats(db, [support_id, adc_id, mid_id, 9999])
+        lane = get_lane_stats(db, team_id, "botlane")
+    finally:
+        event.remove(bind, "before_cursor_execute", listener)
+
+    assert list(stats) == [support_id, adc_id, mid_id]
+    assert stats[adc_id].total_games == 2
+    assert stats[adc_id].winrate == 50.0
+    assert stats[adc_id].ranked_winrate == 60.0
+    assert stats[support_id].total_games == 1
+    assert stats[mid_id].total_games == 0
+    # players + riot accounts + grouped rollups, and one more for the lane's player ids
+    assert len(statements) == 3 + 4
+
+    assert lane.total_games == 3
+    assert {p.player_id for p in lane.players} == {adc_id, support_id}
+    assert lane.combined_winrate == 66.67
+
+
+def test_get_player_stats_missing_stat_keys_count_as_zero(db, team):
+    """Games stored before a stat existed average in as 0, like stats.get(key, 0)"""
+    player = Player(team_id=team.id, summoner_name="TestPlayer", role="top")
+    db.add(player)
+    db.commit()
+    account = RiotAccount(player_id=player.id, puuid="puuid1", summoner_name="Summoner1", tag_line="T1")
+    db.add(account)
+    db.commit()
+
+    for match_id, stats in (("match1", {"kda": 4.0, "kp": 50.0, "win": True}), ("match2", {"kda": 2.0})):
+        db.add(Game(
+            riot_account_id=account.id,
+            match_id=match_id,
+            game_type="soloq",
+            champion_id=1,
+            role="top",
+            stats=stats,
+            game_duration=1800,
+            game_date=datetime.utcnow(),
+        ))
+    db.commit()
+
+    stats = get_player_stats(db, player.id)
+
+    assert stats.total_games == 2
+    assert stats.avg_kda == 3.0
+    assert stats.avg_kill_participation == 25.0
+    assert stats.avg_cs_per_min == 0.0
+    assert stats.winrate == 50.0
+
+async def test_refresh_accounts_isolates_failures_and_timeouts():
+    """Each account gets its own session; failures and timeouts don't affect the others"""
+    import asyncio
+    from unittest.mock import MagicMock, patch
+
+    from app.services.stats_service import refresh_accounts
+
+    accounts = [
+        RiotAccount(id=1, summoner_name="Fast", tag_line="EUW"),
+        RiotAccount(id=2, summoner_name="Broken", tag_line="EUW"),
+        RiotAccount(id=3, summoner_name="Slow", tag_line="EUW"),
+    ]
+    sessions = []
+
+    def session_factory():
+        session = MagicMock()
+        sessions.append(session)
+        return session
+
+    async def fake_refresh(session, riot_account_id):
+        if riot_account_id == 2:
+            raise ValueError("Resource not found")
+        if riot_account_id == 3:
+            await asyncio.sleep(1)
+
+    with patch("app.services.stats_service.refresh_player_stats", side_effect=fake_refresh):
+        result = await refresh_accounts(accounts, session_factory=session_factory, timeout=0.05)
+
+    assert result["refreshed"] == 1
+    assert result["failed"] == 2
+    assert [r["status"] for r in result["results"]] == ["success", "failed", "failed"]
+    assert result["results"][1]["error"] == "Resource not found"
+    assert "Timed out" in result["results"][2]["error"]
+    assert len(sessions) == 3
+    assert all(s.close.called for s in sessions)
+
+
+async def test_refresh_accounts_reports_leaked_cancellation_per_account():
+    """A CancelledError that didn't cancel the refresh only fails its own account"""
+    import asyncio
+    from unittest.mock import MagicMock, patch
+
+    from app.services.stats_service import refresh_accounts
+
+    accounts = [RiotAccount(id=i, summoner_name=f"Acc{i}", tag_line="EUW") for i in range(3)]
+
+    async def fake_refresh(session, riot_account_id):
+        if riot_account_id == 1:
+            raise asyncio.CancelledError()
+        return 2
+
+    with patch("app.services.stats_service.refresh_player_stats", side_effect=fake_refresh):
+        result = await refresh_accounts(accounts, session_factory=MagicMock)
+
+    assert (result["refreshed"], result["failed"]) == (2, 1)
+    assert result["results"][1] == {"account": "Acc1#EUW", "status": "failed", "error": "Refresh was cancelled"}
+
+
+async def test_refresh_accounts_bounded_concurrency():
+    """No more than `concurrency` accounts are refreshed at once"""
+    import asyncio
+    from unittest.mock import MagicMock, patch
+
+    from app.services.stats_service import refresh_accounts
+
+    accounts = [RiotAccount(id=i, summoner_name=f"Acc{i}", tag_line="EUW") for i in range(6)]
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_refresh(session, riot_account_id):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    with patch("app.services.stats_service.refresh_player_stats", side_effect=fake_refresh):
+        result = await refresh_accounts(accounts, session_factory=MagicMock, concurrency=2)
+
+    assert result["refreshed"] == 6
+    assert max_in_flight == 2
+
+
+async def test_refresh_player_stats_logs_failures(db, team, caplog):
+    """Refresh failures are logged with the account, not printed"""
+    import logging
+    from unittest.mock import AsyncMock, patch
+
+    from fastapi import HTTPException
+
+    from app.services.stats_service import refresh_player_stats
+
+    player = Player(team_id=team.id, summoner_name="Player", role="mid")
+    db.add(player)
+    db.commit()
+    account = RiotAccount(player_id=player.id, puuid="puuid1", summoner_name="Summoner", tag_line="EUW")
+    db.add(account)
+    db.commit()
+
+    failing = AsyncMock(side_effect=Exception("401 Unauthorized"))
+    with patch("app.riot.client.RiotAPIClient.fetch_and_update_rank", failing), \
+            caplog.at_level(logging.INFO, logger="app.services.stats_service"), \
+            pytest.raises(HTTPException):
+        await refresh_player_stats(db, account.id)
+
+    records = [r for r in caplog.records if r.name == "app.services.stats_service"]
+    assert [r.levelname for r in records] == ["INFO", "WARNING"]
+    assert records[1].account == "Summoner#EUW"
+    assert records[1].error == "401 Unauthorized"
+
+
+def test_local_time_converter_handles_mid_hour_transitions():
+    """DST transitions off the hour (America/St_Johns, 2026-03-08 05:30 UTC) use the right offset"""
+    from zoneinfo import ZoneInfo
+
+    from app.services.stats_service import LocalTimeConverter
+
+    zone = ZoneInfo("America/St_Johns")
+    to_local = LocalTimeConverter(zone)
+    for minute in (0, 10, 29, 30, 45, 59):
+        utc = datetime(2026, 3, 8, 5, minute)
+        expected = utc.replace(tzinfo=UTC).astimezone(zone).replace(tzinfo=None)
+        assert to_local(utc) == expected
+    assert to_local(datetime(2026, 3, 8, 5, 10)) == datetime(2026, 3, 8, 1, 40)
+    assert to_local(datetime(2026, 3, 8, 5, 45)) == datetime(2026, 3, 8, 3, 15)
+
+
+def test_team_activity_uses_team_timezone(db, team):
+    """Games are bucketed by the team's local day, week bounds included"""
+    from datetime import timedelta
+    from zoneinfo import ZoneInfo
+
+    from app.services.stats_service import get_team_activity
+
+    team.timezone = "America/New_York"
+    player = Player(team_id=team.id, summoner_name="TestPlayer", role="mid")
+    db.add(player)
+    db.commit()
+    account = RiotAccount(player_id=player.id, puuid="puuid1", summoner_name="Summoner1", tag_line="T1", is_main=True)
+    db.add(account)
+    db.commit()
+
+    zone = ZoneInfo("America/New_York")
+    today = datetime.now(tz=zone).date()
+    monday = today - timedelta(days=today.weekday())
+
+    def utc(day, hour, minute=0):
+        local = datetime.combine(day, datetime.min.time(), tzinfo=zone).replace(hour=hour, minute=minute)
+        return local.astimezone(UTC).replace(tzinfo=None)
+
+    for match_id, game_date, win in (
+        ("m1", utc(monday, 0, 30), True),  # Monday 00:30 local = Monday 04:30/05:30 UTC
+        ("m2", utc(monday, 23, 30), False),  # Still Monday locally, Tuesday in UTC
+        ("m3", utc(monday - timedelta(days=1), 23, 0), True),  # Previous week locally
+    ):
+        db.add(Game(
+            riot_account_id=account.id, match_id=match_id, game_type="soloq", champion_id=1, role="middle",
+            stats={"kills": 1, "deaths": 1, "assists": 1, "win": win}, game_duration=1800, game_date=game_date,
+        ))
+    db.commit()
+
+    activity = get_team_activity(db, team.id)
+
+    assert activity.week_start == monday.isoformat()
+    summary = activity.players[0]
+    assert summary.total_games == 2
+    assert list(summary.games_by_day) == [monday.isoformat()]
+    assert [g.start_time for g in summary.games_by_day[monday.isoformat()]] == ["00:30", "23:30"]
+    assert summary.games_by_day[monday.isoformat()][1].end_time == "00:00"
+    assert summary.wins == 1
+
+    previous = get_team_activity(db, team.id, week_offset=-1)
+    assert previous.players[0].total_games == 1
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.models.game import Game
+from app.models.player import Player
+from app.models.riot_account import RiotAccount
+from app.services.game_cache import GameDerivedCache
+from app.services.stats_service import get_team_highlights
+
+
+@pytest.fixture
+def account(db, team):
+    player = Player(team_id=team.id, summoner_name="TestPlayer", role="mid")
+    db.add(player)
+    db.commit()
+    account = RiotAccount(player_id=player.id, puuid="puuid1", summoner_name="Summoner1", tag_line="T1", is_main=True)
+    db.add(account)
+    db.commit()
+    return account
+
+
+def make_game(account, match_id, win=True, game_type="soloq", is_pentakill=False, minutes_ago=0):
+    return Game(
+        riot_account_id=account.id, match_id=match_id, game_type=game_type, champion_id=1, role="middle",
+        stats={"kills": 1, "deaths": 1, "assists": 1, "win": win}, game_duration=1800,
+        game_date=datetime.utcnow() - timedelta(minutes=minutes_ago), is_pentakill=is_pentakill,
+    )
+
+
+def test_highlights_counts(db, team, account):
+    db.add_all([
+        make_game(account, "m1", win=True, minutes_ago=40),
+        make_game(account, "m2", win=False, minutes_ago=30),
+        make_game(account, "m3", win=True, game_type="competitive", is_pentakill=True, minutes_ago=20),
+        make_game(account, "m4", win=False, game_type="competitive", minutes_ago=10),
+    ])
+    # Another team's games are not counted
+    other = Player(team_id=team.id + 1, summoner_name="Other", role="top")
+    db.add(other)
+    db.commit()
+    other_account = RiotAccount(player_id=other.id, puuid="puuid2", summoner_name="Other", tag_line="T2")
+    db.add(other_account)
+    db.commit()
+    db.add(make_game(other_account, "m5", is_pentakill=True))
+    db.commit()
+
+    highlights = get_team_highlights(db, team.id)
+
+    assert highlights.total_games == 4
+    assert highlights.total_wins == 2
+    assert highlights.winrate == 50.0
+    assert highlights.competitive_games == 2
+    assert highlights.competitive_wins == 1
+    assert highlights.competitive_winrate == 50.0
+    assert highlights.total_pentakills == 1
+    assert [g.match_id for g in highlights.recent_matches] == ["m4", "m3", "m2", "m1"]
+
+
+def test_highlights_empty_team(db, team):
+    highlights = get_team_highlights(db, team.id)
+    assert highlights.total_games == 0
+    assert highlights.winrate == 0.0
+    assert highlights.recent_matches == []
+
+
+def test_highlights_cached_until_team_game_changes(db, team, account):
+    game = make_game(account, "m1")
+    db.add(game)
+    db.commit()
+    first = get_team_highlights(db, team.id)
+
+    with patch.object(db, "query", side_effect=AssertionError("cache miss")):
+        assert get_team_highlights(db, team.id) is first
+
+    # ORM insert invalidates once committed
+    db.add(make_game(account, "m2", win=False))
+    db.commit()
+    assert get_team_highlights(db, team.id).total_games == 2
+
+    # Retag invalidates
+    game.game_type = "competitive"
+    db.commit()
+    assert get_team_highlights(db, team.id).competitive_games == 1
+
+    # Delete invalidates
+    db.delete(game)
+    db.commit()
+    assert get_team_highlights(db, team.id).total_games == 1
+
+
+def test_rolled_back_change_keeps_cache(db, team, account):
+    db.add(make_game(account, "m1"))
+    db.commit()
+    first = get_team_highlights(db, team.id)
+
+    db.add(make_game(account, "m2"))
+    db.flush()
+    db.rollback()
+    assert get_team_highlights(db, team.id) is first
+
+
+def test_cache_invalidate_accounts_and_ttl():
+    now = [0.0]
+    cache = GameDerivedCache(ttl=lambda: 60, clock=lambda: now[0])
+    cache.set(1, [10, 11], "team1")
+    cache.set(2, [20], "team2")
+
+    cache.invalidate_accounts([11])
+    assert cache.get(1) is None
+    assert cache.get(2) == "team2"
+
+    now[0] = 61
+    assert cache.get(2) is None
+
+
+def test_deleting_riot_account_invalidates_cache(client, db, auth_headers, team, account):
+    team_id, account_id = team.id, account.id
+    db.add(make_game(account, "m1"))
+    db.commit()
+    assert get_team_highlights(db, team_id).total_games == 1
+
+    response = client.delete(f"/api/v1/riot-accounts/{account_id}", headers=auth_headers)
+
+    assert response.status_code == 204
+    assert get_team_highlights(db, team_id).total_games == 0
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.game import Game
+from app.models.player import Player
+from app.models.riot_account import RiotAccount
+from app.schemas.tier_list import Tier
+from app.services.tier_list_service import get_player_tier_list, set_champion_tier
+
+
+@pytest.fixture
+def player(db, team):
+    player = Player(team_id=team.id, summoner_name="TestPlayer", role="mid")
+    db.add(player)
+    db.commit()
+    db.add(RiotAccount(player_id=player.id, puuid="puuid1", summoner_name="Summoner1", tag_line="EUW"))
+    db.commit()
+    return player
+
+
+def add_game(db, player, match_id, champion_id):
+    db.add(Game(
+        riot_account_id=player.riot_accounts[0].id, match_id=match_id, game_type="soloq",
+        champion_id=champion_id, role="middle", game_duration=1800, game_date=datetime(2026, 2, 1),
+        stats={"kills": 5, "deaths": 2, "assists": 5, "kda": 5.0, "win": True},
+    ))
+    db.commit()
+
+
+def test_tier_list_buckets(db, player):
+    add_game(db, player, "m1", champion_id=1)
+    add_game(db, player, "m2", champion_id=2)
+    set_champion_tier(db, player.id, 1, Tier.S)
+    set_champion_tier(db, player.id, 99, Tier.D)  # Unplayed
+
+    tier_list = get_player_tier_list(db, player.id)
+
+    assert [c.champion_id for c in tier_list.tier_s] == [1]
+    assert [c.champion_id for c in tier_list.tier_d] == [99]
+    assert tier_list.tier_d[0].games_played == 0
+    assert [c.champion_id for c in tier_list.unranked] == [2]
+    assert tier_list.tier_a == tier_list.tier_b == tier_list.tier_c == []
+    assert len(tier_list.champions) == 3
+
+
+def test_tier_list_not_modified_until_games_or_tiers_change(client, db, player, auth_headers):
+    add_game(db, player, "m1", champion_id=1)
+    url = f"/api/v1/tier-list/player/{player.id}"
+
+    first = client.get(url, headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    unchanged = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    # A tier assignment changes the ETag
+    client.post(f"{url}/champion/1", json={"champion_id": 1, "tier": "A"}, headers=auth_headers)
+    after_tier = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert after_tier.status_code == 200
+    assert after_tier.json()["tier_a"][0]["champion_id"] == 1
+    etag = after_tier.headers["ETag"]
+
+    # So does a new game
+    add_game(db, player, "m2", champion_id=2)
+    after_game = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert after_game.status_code == 200
+    assert len(after_game.json()["champions"]) == 2
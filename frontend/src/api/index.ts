@@ -30,6 +30,8 @@ import type {
   AdminTeamStats,
   TeamActivityResponse,
   MatchDetailResponse,
+  RefreshJob,
+  RefreshJobQueued,
 } from '@/types'
 import apiClient from './client'
 import axios from 'axios'
@@ -115,20 +117,44 @@ export const draftSeriesApi = {
 export const statsApi = {
   getPlayerStats: (playerId: number) => apiClient.get<PlayerStats>(`/api/v1/stats/player/${playerId}`),
   getLaneStats: (lane: string) => apiClient.get<LaneStats>(`/api/v1/stats/lane/${lane}`),
-  refreshStats: (riotAccountId: number) =>
-    apiClient.post(`/api/v1/stats/refresh/${riotAccountId}`),
-  refreshAllStats: () =>
-    apiClient.post<{
-      message: string
-      refreshed: number
-      failed: number
-      results: Array<{ account: string; status: string; error?: string }>
-    }>('/api/v1/stats/refresh-all'),
+  // Refreshes run as background jobs: enqueue, then poll until the job finishes
+  refreshStats: async (riotAccountId: number) => {
+    const res = await apiClient.post<RefreshJobQueued>(`/api/v1/stats/refresh/${riotAccountId}`)
+    const job = await jobsApi.waitFor(res.data.job_id)
+    if (job.data.status === 'failed') {
+      // Same shape as an axios error so callers can read response.data.detail
+      throw { response: { data: { detail: job.data.errors[0]?.error || 'Refresh failed' } } }
+    }
+    return job
+  },
+  refreshAllStats: async () => {
+    const res = await apiClient.post<RefreshJobQueued>('/api/v1/stats/refresh-all')
+    return jobsApi.waitFor(res.data.job_id)
+  },
+  // Season history can take minutes: returns the queued job, poll it with jobsApi
+  backfillMatchHistory: () => apiClient.post<RefreshJobQueued>('/api/v1/stats/backfill'),
   getTeamHighlights: () => apiClient.get<TeamHighlights>(`/api/v1/stats/team/highlights`),
   getTeamActivity: (weekOffset = 0) =>
     apiClient.get<TeamActivityResponse>(`/api/v1/stats/activity?week_offset=${weekOffset}`),
 }
 
+export const jobsApi = {
+  get: (jobId: string) => apiClient.get<RefreshJob>(`/api/v1/jobs/${jobId}`),
+  // Polls until the job finishes; gives up after maxWaitMs (e.g. if the job worker died)
+  waitFor: async (jobId: string, intervalMs = 1500, maxWaitMs = 10 * 60 * 1000) => {
+    const deadline = Date.now() + maxWaitMs
+    for (;;) {
+      const res = await jobsApi.get(jobId)
+      if (['succeeded', 'partial', 'failed'].includes(res.data.status)) return res
+      if (Date.now() + intervalMs > deadline) {
+        // Same shape as an axios error so callers can read response.data.detail
+        throw { response: { data: { detail: 'The refresh is taking too long. Please try again later.' } } }
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs))
+    }
+  },
+}
+
 export const gamesApi = {
   getPentakills: () => apiClient.get<Game[]>('/api/v1/games/pentakills'),
   updateGameTag: (gameId: number, data: { game_type?: string; is_pentakill?: boolean }) =>
@@ -196,6 +222,8 @@ export const tierListApi = {
     apiClient.get<PlayerTierList>(`/api/v1/tier-list/player/${playerId}`),
   getPlayerChampionStats: (playerId: number) =>
     apiClient.get<ChampionStatsWithScore[]>(`/api/v1/tier-list/player/${playerId}/champions`),
+  getTeamChampionStats: () =>
+    apiClient.get<Record<number, ChampionStatsWithScore[]>>('/api/v1/tier-list/team/champions'),
   setChampionTier: (playerId: number, championId: number, tier: TierLevel) =>
     apiClient.post(`/api/v1/tier-list/player/${playerId}/champion/${championId}`, {
       champion_id: championId,
@@ -300,10 +328,13 @@ export const adminApi = {
   getTeamDetails: (teamId: number) =>
     adminClient.get<AdminTeamDetails>(`/api/v1/admin/teams/${teamId}`),
 
-  createTeam: (data: { name: string; access_code: string }) =>
+  createTeam: (data: { name: string; access_code: string; timezone?: string; allowed_queues?: number[] }) =>
     adminClient.post<AdminTeamStats>('/api/v1/admin/teams', data),
 
-  updateTeam: (teamId: number, data: { name?: string; access_code?: string }) =>
+  updateTeam: (
+    teamId: number,
+    data: { name?: string; access_code?: string; timezone?: string; allowed_queues?: number[] }
+  ) =>
     adminClient.patch<AdminTeamDetails>(`/api/v1/admin/teams/${teamId}`, data),
 
   deleteTeam: (teamId: number) =>
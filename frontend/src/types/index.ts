@@ -377,6 +377,8 @@ export interface AdminTeamDetails {
   id: number
   name: string
   access_code: string
+  timezone: string
+  allowed_queues: number[]
   created_at: string
   players: AdminPlayerSummary[]
   coaches: AdminCoachSummary[]
@@ -499,3 +501,36 @@ export interface MatchDetailResponse {
   blue_team: MatchTeam
   red_team: MatchTeam
 }
+
+// Background refresh jobs
+
+export type RefreshJobStatus = 'queued' | 'running' | 'succeeded' | 'partial' | 'failed'
+
+export interface RefreshJobQueued {
+  message: string
+  job_id: string
+  status: RefreshJobStatus
+}
+
+export interface RefreshJob {
+  id: string
+  kind: 'refresh' | 'backfill'
+  status: RefreshJobStatus
+  accounts_total: number
+  accounts_done: number
+  matches_fetched: number
+  refreshed: number
+  failed: number
+  errors: Array<{ account: string; error: string }>
+  results: Array<{
+    account: string
+    status: string
+    new_games?: number | null
+    matches_downloaded?: number | null
+    riot_calls_saved?: number | null
+    error?: string | null
+  }>
+  created_at: string
+  started_at: string | null
+  finished_at: string | null
+}